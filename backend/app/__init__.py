@@ -5,6 +5,7 @@ from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_mail import Mail
 from flask_caching import Cache
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from .config import config
 from .models import db
@@ -18,6 +19,11 @@ def create_app(config_name='default'):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
     
+    # Client addresses come from the trusted proxies' X-Forwarded-For
+    if app.config.get('PROXY_FIX_HOPS'):
+        hops = app.config['PROXY_FIX_HOPS']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+    
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
@@ -30,6 +36,13 @@ def create_app(config_name='default'):
     from . import cli
     cli.init_app(app)
     
+    # Keep observation rollups in sync with observation writes
+    from .utils import rollups  # noqa: F401
+    
+    # Per-client API budgets
+    from .utils import rate_limit
+    rate_limit.init_app(app)
+    
     # Register blueprints
     from .routes.auth import auth_bp
     from .routes.projects import projects_bp
@@ -39,6 +52,7 @@ def create_app(config_name='default'):
     from .routes.resources import resources_bp
     from .routes.uploads import uploads_bp
     from .routes.reports import reports_bp
+    from .routes.tiles import tiles_bp
     
     app.register_blueprint(auth_bp)
     app.register_blueprint(projects_bp)
@@ -48,6 +62,7 @@ def create_app(config_name='default'):
     app.register_blueprint(resources_bp)
     app.register_blueprint(uploads_bp)
     app.register_blueprint(reports_bp)
+    app.register_blueprint(tiles_bp)
     
     # Error handlers
     @app.errorhandler(404)
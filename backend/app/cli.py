@@ -2,7 +2,7 @@
 import click
 from flask.cli import with_appcontext
 from flask import current_app
-from .models import db, User, Species
+from .models import db, User, Species, Project
 
 @click.command()
 @with_appcontext
@@ -73,7 +73,132 @@ def seed_data():
     db.session.commit()
     click.echo('Database seeded successfully!')
 
+@click.command()
+@click.option('--project-id', help='Only rebuild rollups for this project.')
+@with_appcontext
+def rebuild_rollups(project_id):
+    """Rebuild observation rollups from raw observations."""
+    from .utils.rollups import rebuild_project_rollups
+    
+    if project_id:
+        project_ids = [project_id]
+    else:
+        project_ids = [row.id for row in db.session.query(Project.id).all()]
+    
+    for pid in project_ids:
+        rows = rebuild_project_rollups(pid)
+        click.echo(f'Rebuilt {rows} rollup rows for project {pid}')
+    
+    click.echo('Rollups rebuilt successfully!')
+
+@click.command()
+@click.option('--samples', default=10000, help='Number of random coordinates for offline lookups.')
+@click.option('--remote-samples', default=5, help='Number of coordinates for the remote geocoder (0 to skip).')
+@with_appcontext
+def benchmark_geocoder(samples, remote_samples):
+    """Compare offline gazetteer lookups with the remote geocoder."""
+    import time
+    import numpy as np
+    from .utils.gazetteer import get_offline_geocoder
+    from .utils.geo_utils import get_location_name
+    
+    rng = np.random.default_rng(42)
+    latitudes = rng.uniform(-60, 70, samples)
+    longitudes = rng.uniform(-180, 180, samples)
+    
+    start = time.perf_counter()
+    geocoder = get_offline_geocoder()
+    click.echo(f'Loaded {len(geocoder)} gazetteer places in {time.perf_counter() - start:.3f}s')
+    
+    start = time.perf_counter()
+    for latitude, longitude in zip(latitudes, longitudes):
+        geocoder.reverse(latitude, longitude)
+    elapsed = time.perf_counter() - start
+    click.echo(f'Offline, per call: {elapsed / samples * 1e6:.1f} us/lookup')
+    
+    start = time.perf_counter()
+    geocoder.reverse_batch(latitudes, longitudes)
+    elapsed = time.perf_counter() - start
+    click.echo(f'Offline, batch:    {elapsed / samples * 1e6:.1f} us/lookup')
+    
+    if remote_samples:
+        start = time.perf_counter()
+        for latitude, longitude in zip(latitudes[:remote_samples], longitudes[:remote_samples]):
+            get_location_name(latitude, longitude)
+        elapsed = time.perf_counter() - start
+        click.echo(f'Nominatim:         {elapsed / remote_samples * 1e6:.1f} us/lookup')
+
+@click.command()
+@click.option('--single-rows', default=100, help='Number of single-row POSTs.')
+@click.option('--bulk-rows', default=2000, help='Number of rows in the bulk request.')
+@with_appcontext
+def benchmark_bulk_ingest(single_rows, bulk_rows):
+    """Compare bulk observation ingestion with single-row POSTs, per row.
+    
+    Runs against the configured database with a throwaway user, project
+    and species, which are deleted afterwards.
+    """
+    import time
+    from flask_jwt_extended import create_access_token
+    from .models import Observation, ObservationRollup
+    from .utils.access import access_claims
+    
+    user = User(username='bulk-benchmark', email='bulk-benchmark@example.com', first_name='Bulk', last_name='Benchmark', role='admin')
+    user.set_password('bulk-benchmark')
+    species = Species(scientific_name='Benchmarkus bulkii', common_name='Bulk Benchmark')
+    db.session.add_all([user, species])
+    db.session.flush()
+    project = Project(name='Bulk ingestion benchmark', created_by_id=user.id)
+    db.session.add(project)
+    db.session.commit()
+    project_id, species_id = project.id, species.id
+    
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id), additional_claims=access_claims(user))}'}
+    row = {
+        'project_id': str(project_id),
+        'species_id': str(species_id),
+        'observation_date': '2024-01-15T10:30:00Z',
+        'latitude': -1.2921,
+        'longitude': 36.8219,
+        'location_name': 'Nairobi',
+        'count': 2
+    }
+    
+    rate_limit_enabled = current_app.config.get('RATE_LIMIT_ENABLED')
+    current_app.config['RATE_LIMIT_ENABLED'] = False
+    client = current_app.test_client()
+    try:
+        start = time.perf_counter()
+        for _ in range(single_rows):
+            response = client.post('/api/observations', json=row, headers=headers)
+            if response.status_code != 201:
+                raise click.ClickException(f'Single-row POST failed: {response.get_json()}')
+        single = (time.perf_counter() - start) / single_rows
+        
+        start = time.perf_counter()
+        response = client.post('/api/observations/bulk', json=[row] * bulk_rows, headers=headers)
+        bulk = (time.perf_counter() - start) / bulk_rows
+        if response.status_code != 201:
+            raise click.ClickException(f'Bulk POST failed: {response.get_json()}')
+    finally:
+        current_app.config['RATE_LIMIT_ENABLED'] = rate_limit_enabled
+        db.session.rollback()
+        Observation.query.filter_by(project_id=project_id).delete()
+        ObservationRollup.query.filter_by(project_id=project_id).delete()
+        Project.query.filter_by(id=project_id).delete()
+        Species.query.filter_by(id=species_id).delete()
+        User.query.filter_by(username='bulk-benchmark').delete()
+        db.session.commit()
+    
+    method = 'COPY' if db.engine.dialect.name == 'postgresql' else 'batched inserts'
+    click.echo(f'Single-row POSTs: {single * 1000:.2f} ms/row')
+    click.echo(f'Bulk ({method}):  {bulk * 1000:.3f} ms/row')
+    click.echo(f'Speedup on {db.engine.dialect.name}: {single / bulk:.0f}x')
+
 def init_app(app):
     """Register CLI commands with the app."""
     app.cli.add_command(init_db)
-    app.cli.add_command(seed_data)
\ No newline at end of file
+    app.cli.add_command(seed_data)
+    app.cli.add_command(rebuild_rollups)
+    app.cli.add_command(benchmark_geocoder)
+    app.cli.add_command(benchmark_bulk_ingest)
\ No newline at end of file
@@ -17,9 +17,84 @@ class Config:
     CACHE_TYPE = 'SimpleCache'
     CACHE_DEFAULT_TIMEOUT = 300
     
+    # Users' role, active flag and project memberships used for
+    # authorization are cached for this many seconds. Access tokens carry
+    # them as claims, with member project IDs for up to
+    # TOKEN_PROJECT_CLAIMS_MAX projects.
+    ACCESS_CACHE_TIMEOUT = int(os.environ.get('ACCESS_CACHE_TIMEOUT', 60))
+    TOKEN_PROJECT_CLAIMS_MAX = int(os.environ.get('TOKEN_PROJECT_CLAIMS_MAX', 50))
+    
+    # Every API request draws its cost (1 unless weighted) from the
+    # client's budget of RATE_LIMIT_USER_BUDGET units per
+    # RATE_LIMIT_USER_WINDOW seconds. Buckets are kept in Redis, or in
+    # process with 'memory://'.
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ['true', 'on', '1']
+    RATE_LIMIT_STORAGE_URL = os.environ.get('RATE_LIMIT_STORAGE_URL') or REDIS_URL
+    RATE_LIMIT_USER_BUDGET = int(os.environ.get('RATE_LIMIT_USER_BUDGET', 100))
+    RATE_LIMIT_USER_WINDOW = int(os.environ.get('RATE_LIMIT_USER_WINDOW', 60))
+    # Seconds to wait for the rate limit store before letting the request
+    # through, so a slow Redis doesn't stall every API request
+    RATE_LIMIT_REDIS_CONNECT_TIMEOUT = float(os.environ.get('RATE_LIMIT_REDIS_CONNECT_TIMEOUT', 0.2))
+    RATE_LIMIT_REDIS_TIMEOUT = float(os.environ.get('RATE_LIMIT_REDIS_TIMEOUT', 0.2))
+    
+    # Number of reverse proxies (nginx) in front of the app whose
+    # X-Forwarded-For and X-Forwarded-Proto headers are trusted. Leave at
+    # 0 while the app's port is reachable directly: clients could
+    # otherwise forge their address and get a fresh rate limit bucket.
+    PROXY_FIX_HOPS = int(os.environ.get('PROXY_FIX_HOPS', 0))
+    
+    # Password hashing: 'pbkdf2', 'scrypt' or 'argon2' (needs argon2-cffi).
+    # Hashes made with other settings are upgraded on login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    PBKDF2_ITERATIONS = int(os.environ.get('PBKDF2_ITERATIONS', 600000))
+    SCRYPT_N = int(os.environ.get('SCRYPT_N', 2 ** 15))
+    SCRYPT_R = int(os.environ.get('SCRYPT_R', 8))
+    SCRYPT_P = int(os.environ.get('SCRYPT_P', 1))
+    ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', 3))
+    ARGON2_MEMORY_COST = int(os.environ.get('ARGON2_MEMORY_COST', 64 * 1024))  # KiB
+    ARGON2_PARALLELISM = int(os.environ.get('ARGON2_PARALLELISM', 1))
+    
+    # Read indicator aggregates from observation_rollups. Off until the
+    # table has been backfilled with `flask rebuild-rollups`; observation
+    # writes keep it in sync either way
+    USE_OBSERVATION_ROLLUPS = os.environ.get('USE_OBSERVATION_ROLLUPS', 'false').lower() in ['true', 'on', '1']
+    
+    # Observation map vector tiles
+    TILE_EXTENT = 4096
+    TILE_CLUSTER_RADIUS = 40  # pixels, relative to a 256px tile
+    TILE_CLUSTER_MAX_ZOOM = 16
+    TILE_USE_POSTGIS = os.environ.get('TILE_USE_POSTGIS', 'true').lower() in ['true', 'on', '1']
+    TILE_CACHE_TIMEOUT = int(os.environ.get('TILE_CACHE_TIMEOUT', 3600))
+    
+    # Indicator and summary results are cached per project data version;
+    # the timeout only bounds how long unused entries take memory
+    PROJECT_DATA_CACHE_TIMEOUT = int(os.environ.get('PROJECT_DATA_CACHE_TIMEOUT', 3600))
+    
     CELERY_BROKER_URL = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
     CELERY_RESULT_BACKEND = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
     
+    # Exports above EXPORT_SHARD_MIN_ROWS run as EXPORT_SHARD_COUNT parallel
+    # date-range shards
+    EXPORT_SHARD_COUNT = int(os.environ.get('EXPORT_SHARD_COUNT', 8))
+    EXPORT_SHARD_MIN_ROWS = int(os.environ.get('EXPORT_SHARD_MIN_ROWS', 1000000))
+    
+    # Export and report files are cached by content; the least recently
+    # used are evicted past RESULT_CACHE_MAX_BYTES. RESULT_JOB_TIMEOUT bounds
+    # how long an identical request waits on an in-flight job.
+    RESULT_CACHE_MAX_BYTES = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 5 * 1024 ** 3))
+    RESULT_JOB_TIMEOUT = int(os.environ.get('RESULT_JOB_TIMEOUT', 6 * 3600))
+    
+    # Charts render in CHART_RENDER_WORKERS processes (0 renders inline)
+    CHART_RENDER_WORKERS = int(os.environ.get('CHART_RENDER_WORKERS', 2))
+    CHART_DPI = int(os.environ.get('CHART_DPI', 100))
+    
+    # Threads computing the sections of one custom report
+    REPORT_SECTION_WORKERS = int(os.environ.get('REPORT_SECTION_WORKERS', 4))
+    
+    # Bulk observation ingestion
+    BULK_OBSERVATION_MAX_ROWS = int(os.environ.get('BULK_OBSERVATION_MAX_ROWS', 5000))
+    BULK_INSERT_CHUNK_SIZE = 500
+    
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or 'uploads'
     MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
     
@@ -30,6 +105,18 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     
     GEOCODING_API_KEY = os.environ.get('GEOCODING_API_KEY')
+    # Reverse geocoding runs in a Celery task; results are cached per
+    # rounded coordinate (3 decimals is roughly a 110 m cell)
+    GEOCODE_TIMEOUT = int(os.environ.get('GEOCODE_TIMEOUT', 10))
+    GEOCODE_CACHE_PRECISION = int(os.environ.get('GEOCODE_CACHE_PRECISION', 3))
+    GEOCODE_CACHE_TIMEOUT = int(os.environ.get('GEOCODE_CACHE_TIMEOUT', 30 * 24 * 3600))
+    # 'nominatim' (remote) or 'offline' (local GeoNames gazetteer)
+    GEOCODER_BACKEND = os.environ.get('GEOCODER_BACKEND', 'nominatim')
+    GAZETTEER_PATH = os.environ.get('GAZETTEER_PATH')
+    GAZETTEER_MAX_DISTANCE_KM = float(os.environ.get('GAZETTEER_MAX_DISTANCE_KM', 50))
+    # Where parsed gazetteer arrays are cached (next to GAZETTEER_PATH
+    # when unset); set it when the gazetteer is on a read-only mount
+    GAZETTEER_CACHE_DIR = os.environ.get('GAZETTEER_CACHE_DIR')
     WEATHER_API_KEY = os.environ.get('WEATHER_API_KEY')
 
 class DevelopmentConfig(Config):
@@ -45,6 +132,13 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     CACHE_TYPE = 'NullCache'
+    CHART_RENDER_WORKERS = 0
+    REPORT_SECTION_WORKERS = 1
+    RATE_LIMIT_ENABLED = False
+    RATE_LIMIT_STORAGE_URL = 'memory://'
+    # Cheap hashes keep user fixtures fast
+    PASSWORD_HASH_METHOD = 'pbkdf2'
+    PBKDF2_ITERATIONS = 1000
 
 config = {
     'development': DevelopmentConfig,
@@ -1,9 +1,10 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 
+from .utils.passwords import hash_password, verify_password
+
 db = SQLAlchemy()
 
 # Association tables for many-to-many relationships
@@ -23,6 +24,8 @@ class User(db.Model):
     last_name = db.Column(db.String(50), nullable=False)
     role = db.Column(db.String(20), default='observer')
     is_active = db.Column(db.Boolean, default=True)
+    # Bumped when role or memberships change; older token claims are ignored
+    token_version = db.Column(db.Integer, nullable=False, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
     
@@ -31,10 +34,10 @@ class User(db.Model):
     projects = db.relationship('Project', secondary=project_users, back_populates='members')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
     
     def to_dict(self):
         return {
@@ -169,6 +172,25 @@ class Observation(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class ObservationRollup(db.Model):
+    """Per-(project, species, day) observation totals, kept in sync on write."""
+    __tablename__ = 'observation_rollups'
+    
+    project_id = db.Column(UUID(as_uuid=True), db.ForeignKey('projects.id'), primary_key=True)
+    species_id = db.Column(UUID(as_uuid=True), db.ForeignKey('species.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    observation_count = db.Column(db.Integer, nullable=False, default=0)
+    individual_count = db.Column(db.BigInteger, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'project_id': str(self.project_id),
+            'species_id': str(self.species_id),
+            'day': self.day.isoformat() if self.day else None,
+            'observation_count': self.observation_count,
+            'individual_count': self.individual_count
+        }
+
 class Indicator(db.Model):
     __tablename__ = 'indicators'
     
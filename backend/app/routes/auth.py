@@ -6,6 +6,11 @@ from datetime import datetime
 from ..models import db, User
 from ..schemas import UserSchema, LoginSchema
 from ..utils.auth_utils import admin_required
+from ..utils.decorators import rate_limit
+from ..utils.rate_limit import client_identity
+from ..utils.access import access_claims, invalidate_user_access
+from ..utils.cache_utils import bump_reference_data_version
+from ..utils.passwords import needs_rehash
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
@@ -13,7 +18,15 @@ user_schema = UserSchema()
 users_schema = UserSchema(many=True)
 login_schema = LoginSchema()
 
+def login_identity():
+    """Rate limit logins per client address and submitted username."""
+    data = request.get_json(silent=True)
+    username = data.get('username') if isinstance(data, dict) else None
+    # Usernames are at most 80 characters; longer ones can't log in anyway
+    return f"{client_identity()}:username:{str(username or '')[:80]}"
+
 @auth_bp.route('/register', methods=['POST'])
+@rate_limit(max_requests=10, per_seconds=60, scope='auth')
 def register():
     try:
         data = request.get_json()
@@ -42,7 +55,7 @@ def register():
         db.session.commit()
         
         # Create tokens
-        access_token = create_access_token(identity=str(user.id))
+        access_token = create_access_token(identity=str(user.id), additional_claims=access_claims(user))
         refresh_token = create_refresh_token(identity=str(user.id))
         
         return jsonify({
@@ -59,6 +72,7 @@ def register():
         return jsonify({'error': 'Internal server error'}), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit(max_requests=10, per_seconds=60, scope='login', identity=login_identity)
 def login():
     try:
         data = request.get_json()
@@ -69,10 +83,15 @@ def login():
         if user and user.check_password(result['password']) and user.is_active:
             # Update last login
             user.last_login = datetime.utcnow()
+            
+            # Upgrade hashes made with older hashing settings
+            if needs_rehash(user.password_hash):
+                user.set_password(result['password'])
+            
             db.session.commit()
             
             # Create tokens
-            access_token = create_access_token(identity=str(user.id))
+            access_token = create_access_token(identity=str(user.id), additional_claims=access_claims(user))
             refresh_token = create_refresh_token(identity=str(user.id))
             
             return jsonify({
@@ -100,7 +119,7 @@ def refresh():
         if not user or not user.is_active:
             return jsonify({'error': 'User not found or inactive'}), 404
         
-        access_token = create_access_token(identity=str(user.id))
+        access_token = create_access_token(identity=str(user.id), additional_claims=access_claims(user))
         
         return jsonify({
             'access_token': access_token,
@@ -146,12 +165,20 @@ def update_profile():
         data.pop('password', None)  # Password changes have separate endpoint
         
         result = user_schema.load(data, partial=True)
+        previous_access = (user.role, user.is_active)
         
         for key, value in result.items():
             setattr(user, key, value)
         
+        # Only authorization changes revoke the user's access claims
+        if (user.role, user.is_active) != previous_access:
+            invalidate_user_access(user.id)
         db.session.commit()
         
+        # Observer names appear in cached project summaries
+        if 'first_name' in result or 'last_name' in result:
+            bump_reference_data_version()
+        
         return jsonify({
             'message': 'Profile updated successfully',
             'user': user_schema.dump(user)
@@ -1,19 +1,36 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
-from datetime import datetime, timedelta
+from datetime import datetime, time
 from sqlalchemy import func, distinct, and_, or_
-from collections import defaultdict
+import math
 
-from ..models import db, Observation, Species, Project, User, Indicator, project_users
+from ..models import db, Species, Project, Indicator, project_users
 from ..schemas import IndicatorSchema
-from ..utils.auth_utils import researcher_required, project_member_required
+from ..utils.auth_utils import admin_required, researcher_required
+from ..utils.access import get_user_access, is_project_member
+from ..utils.decorators import rate_limit
+from ..utils.diversity import diversity_profile, shannon, simpson
+from ..utils.cache_utils import cached_project_data, project_data_cache_stats, reset_project_data_cache_stats
+from ..utils.aggregation import (
+    species_abundance, abundance_totals, temporal_counts, spatial_grid_counts
+)
 
 indicators_bp = Blueprint('indicators', __name__, url_prefix='/api/indicators')
 
 indicator_schema = IndicatorSchema()
 indicators_schema = IndicatorSchema(many=True)
 
+# Rate limit budget units of a spatial request at the default grid size
+SPATIAL_BASE_COST = 10
+
+def spatial_request_cost():
+    """Get the rate limit cost of a spatial request; finer grids cost more."""
+    grid_size = request.args.get('grid_size', 0.01, type=float)
+    if not grid_size or grid_size <= 0:
+        return 1
+    return SPATIAL_BASE_COST * max(1.0, 0.01 / grid_size)
+
 @indicators_bp.route('/health')
 def health():
     return {'status': 'ok'}
@@ -35,8 +52,8 @@ def create_indicator():
             return jsonify({'error': 'Project not found'}), 404
         
         # Check if user is project member or admin
-        user = User.query.get(current_user_id)
-        if user not in project.members and user.role != 'admin':
+        access = get_user_access(current_user_id)
+        if not access or not access.can_access_project(project.id):
             return jsonify({'error': 'Access denied to this project'}), 403
         
         indicator = Indicator(**result)
@@ -116,6 +133,7 @@ def get_indicator(indicator_id):
 
 @indicators_bp.route('/calculate', methods=['POST'])
 @jwt_required()
+@rate_limit(max_requests=None, cost=10)
 @researcher_required
 def calculate_indicators():
     """Calculate indicators for a project."""
@@ -128,12 +146,7 @@ def calculate_indicators():
             return jsonify({'error': 'Project ID is required'}), 400
         
         # Verify project access
-        project = db.session.query(Project).join(project_users).filter(
-            Project.id == project_id,
-            project_users.c.user_id == current_user_id
-        ).first()
-        
-        if not project:
+        if not is_project_member(current_user_id, project_id):
             return jsonify({'error': 'Project not found or access denied'}), 404
         
         # Calculate various indicators
@@ -162,29 +175,22 @@ def get_indicators_summary():
             return jsonify({'error': 'Project ID is required'}), 400
         
         # Verify project access
-        project = db.session.query(Project).join(project_users).filter(
-            Project.id == project_id,
-            project_users.c.user_id == current_user_id
-        ).first()
-        
-        if not project:
+        if not is_project_member(current_user_id, project_id):
             return jsonify({'error': 'Project not found or access denied'}), 404
         
-        # Get observations for the project
-        query = Observation.query.filter_by(project_id=project_id)
-        
+        start_dt = None
         if start_date:
             start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-            query = query.filter(Observation.observation_date >= start_dt)
         
+        end_dt = None
         if end_date:
             end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-            query = query.filter(Observation.observation_date <= end_dt)
-        
-        observations = query.all()
+            # A plain date (YYYY-MM-DD) includes the whole day
+            if len(end_date) == 10:
+                end_dt = datetime.combine(end_dt.date(), time.max)
         
         # Calculate summary statistics
-        summary = calculate_summary_statistics(observations)
+        summary = calculate_summary_statistics(project_id, start_date=start_dt, end_date=end_dt)
         
         return jsonify(summary)
         
@@ -207,16 +213,13 @@ def get_time_series():
             return jsonify({'error': 'Project ID is required'}), 400
         
         # Verify project access
-        project = db.session.query(Project).join(project_users).filter(
-            Project.id == project_id,
-            project_users.c.user_id == current_user_id
-        ).first()
-        
-        if not project:
+        if not is_project_member(current_user_id, project_id):
             return jsonify({'error': 'Project not found or access denied'}), 404
         
         # Generate time series data
-        time_series = generate_time_series_data(project_id, metric_type, interval, species_id)
+        time_series = generate_time_series_data(
+            project_id, metric_type=metric_type, interval=interval, species_id=species_id
+        )
         
         return jsonify(time_series)
         
@@ -226,6 +229,7 @@ def get_time_series():
 
 @indicators_bp.route('/spatial', methods=['GET'])
 @jwt_required()
+@rate_limit(max_requests=30, per_seconds=60, cost=spatial_request_cost)
 def get_spatial_indicators():
     """Get spatial distribution indicators."""
     try:
@@ -237,17 +241,15 @@ def get_spatial_indicators():
         if not project_id:
             return jsonify({'error': 'Project ID is required'}), 400
         
-        # Verify project access
-        project = db.session.query(Project).join(project_users).filter(
-            Project.id == project_id,
-            project_users.c.user_id == current_user_id
-        ).first()
+        if not grid_size or grid_size <= 0:
+            return jsonify({'error': 'Grid size must be a positive number'}), 400
         
-        if not project:
+        # Verify project access
+        if not is_project_member(current_user_id, project_id):
             return jsonify({'error': 'Project not found or access denied'}), 404
         
         # Generate spatial distribution data
-        spatial_data = generate_spatial_distribution(project_id, grid_size, species_id)
+        spatial_data = generate_spatial_distribution(project_id, grid_size=grid_size, species_id=species_id)
         
         return jsonify(spatial_data)
         
@@ -267,12 +269,7 @@ def get_diversity_indicators():
             return jsonify({'error': 'Project ID is required'}), 400
         
         # Verify project access
-        project = db.session.query(Project).join(project_users).filter(
-            Project.id == project_id,
-            project_users.c.user_id == current_user_id
-        ).first()
-        
-        if not project:
+        if not is_project_member(current_user_id, project_id):
             return jsonify({'error': 'Project not found or access denied'}), 404
         
         # Calculate diversity indicators
@@ -284,14 +281,39 @@ def get_diversity_indicators():
         current_app.logger.error(f"Diversity indicators error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@indicators_bp.route('/cache-stats', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_cache_stats():
+    """Get hit and miss counts of the indicator and summary caches."""
+    try:
+        return jsonify({'caches': project_data_cache_stats()})
+        
+    except Exception as e:
+        current_app.logger.error(f"Cache stats error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@indicators_bp.route('/cache-stats', methods=['DELETE'])
+@jwt_required()
+@admin_required
+def reset_cache_stats():
+    """Reset the hit and miss counts of the indicator and summary caches."""
+    try:
+        reset_project_data_cache_stats()
+        return jsonify({'message': 'Cache statistics reset'})
+        
+    except Exception as e:
+        current_app.logger.error(f"Cache stats reset error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 def calculate_project_indicators(project_id):
     """Calculate all indicators for a project."""
-    observations = Observation.query.filter_by(project_id=project_id).all()
+    abundance_rows = species_abundance(project_id)
+    total_obs, unique_species, total_individuals = abundance_totals(abundance_rows)
     
     indicators = []
     
     # Total observations
-    total_obs = len(observations)
     indicators.append({
         'name': 'Total Observations',
         'metric_type': 'count',
@@ -300,7 +322,6 @@ def calculate_project_indicators(project_id):
     })
     
     # Species richness
-    unique_species = len(set(obs.species_id for obs in observations))
     indicators.append({
         'name': 'Species Richness',
         'metric_type': 'diversity',
@@ -309,7 +330,6 @@ def calculate_project_indicators(project_id):
     })
     
     # Total individuals
-    total_individuals = sum(obs.count for obs in observations)
     indicators.append({
         'name': 'Total Individuals',
         'metric_type': 'abundance',
@@ -318,8 +338,8 @@ def calculate_project_indicators(project_id):
     })
     
     # Shannon diversity index
-    if observations:
-        shannon_index = calculate_shannon_diversity(observations)
+    if total_obs:
+        shannon_index = calculate_shannon_diversity([row.individuals for row in abundance_rows])
         indicators.append({
             'name': 'Shannon Diversity Index',
             'metric_type': 'diversity',
@@ -329,74 +349,47 @@ def calculate_project_indicators(project_id):
     
     return indicators
 
-def calculate_summary_statistics(observations):
-    """Calculate summary statistics from observations."""
-    total_observations = len(observations)
-    unique_species = len(set(obs.species_id for obs in observations))
-    total_individuals = sum(obs.count for obs in observations)
+@cached_project_data('indicators_summary')
+def calculate_summary_statistics(project_id, start_date=None, end_date=None):
+    """Calculate summary statistics for a project's observations."""
+    abundance_rows = species_abundance(project_id, start_date, end_date)
+    total_observations, unique_species, total_individuals = abundance_totals(abundance_rows)
     
     # Species frequency
-    species_counts = defaultdict(int)
-    for obs in observations:
-        species_counts[obs.species_id] += obs.count
+    species_counts = {str(row.species_id): row.individuals for row in abundance_rows}
     
     # Temporal distribution
-    temporal_dist = defaultdict(int)
-    for obs in observations:
-        month = obs.observation_date.strftime('%Y-%m')
-        temporal_dist[month] += 1
+    temporal_dist = temporal_counts(project_id, 'monthly', 'count', start_date, end_date)
     
     # Most common species
     most_common = []
-    if species_counts:
-        sorted_species = sorted(species_counts.items(), key=lambda x: x[1], reverse=True)
-        for species_id, count in sorted_species[:5]:
-            species = Species.query.get(species_id)
-            if species:
+    if abundance_rows:
+        top_rows = sorted(abundance_rows, key=lambda row: row.individuals, reverse=True)[:5]
+        names = dict(
+            db.session.query(Species.id, Species.common_name).filter(
+                Species.id.in_([row.species_id for row in top_rows])
+            ).all()
+        )
+        for row in top_rows:
+            if row.species_id in names:
                 most_common.append({
-                    'species': species.common_name,
-                    'count': count
+                    'species': names[row.species_id],
+                    'count': row.individuals
                 })
     
     return {
         'total_observations': total_observations,
         'unique_species': unique_species,
         'total_individuals': total_individuals,
-        'species_frequency': dict(species_counts),
-        'temporal_distribution': dict(temporal_dist),
+        'species_frequency': species_counts,
+        'temporal_distribution': temporal_dist,
         'most_common_species': most_common
     }
 
+@cached_project_data('indicators_time_series')
 def generate_time_series_data(project_id, metric_type, interval, species_id=None):
     """Generate time series data for observations."""
-    query = Observation.query.filter_by(project_id=project_id)
-    
-    if species_id:
-        query = query.filter_by(species_id=species_id)
-    
-    observations = query.order_by(Observation.observation_date).all()
-    
-    # Group by time interval
-    time_groups = defaultdict(int)
-    
-    for obs in observations:
-        if interval == 'daily':
-            key = obs.observation_date.strftime('%Y-%m-%d')
-        elif interval == 'weekly':
-            # Get start of week
-            start = obs.observation_date - timedelta(days=obs.observation_date.weekday())
-            key = start.strftime('%Y-%m-%d')
-        elif interval == 'monthly':
-            key = obs.observation_date.strftime('%Y-%m')
-        elif interval == 'yearly':
-            key = obs.observation_date.strftime('%Y')
-        else:
-            key = obs.observation_date.strftime('%Y-%m')
-        
-        if metric_type == 'count':
-            time_groups[key] += 1
-        elif metric_type == 'abundance':
-            time_groups[key] += obs.count
+    time_groups = temporal_counts(project_id, interval, metric_type, species_id=species_id)
     
     # Convert to lists for charting
     dates = sorted(time_groups.keys())
@@ -409,139 +402,58 @@ def generate_time_series_data(project_id, metric_type, interval, species_id=None
         'interval': interval
     }
 
+@cached_project_data('indicators_spatial')
 def generate_spatial_distribution(project_id, grid_size, species_id=None):
     """Generate spatial distribution data."""
-    query = Observation.query.filter_by(project_id=project_id)
+    min_lat, min_lon, cells = spatial_grid_counts(project_id, grid_size, species_id)
     
-    if species_id:
-        query = query.filter_by(species_id=species_id)
-    
-    observations = query.all()
-    
-    # Create spatial grid
-    if not observations:
-        return {
-            'type': 'FeatureCollection',
-            'features': []
-        }
-    
-    # Find bounds
-    lats = [obs.latitude for obs in observations]
-    lons = [obs.longitude for obs in observations]
-    
-    min_lat, max_lat = min(lats), max(lats)
-    min_lon, max_lon = min(lons), max(lons)
-    
-    # Create grid
+    # Emit one feature per non-empty grid cell
     grid_features = []
-    lat = min_lat
-    while lat <= max_lat:
-        lon = min_lon
-        while lon <= max_lon:
-            # Count observations in this grid cell
-            count = sum(1 for obs in observations 
-                       if lat <= obs.latitude < lat + grid_size 
-                       and lon <= obs.longitude < lon + grid_size)
-            
-            if count > 0:
-                feature = {
-                    'type': 'Feature',
-                    'geometry': {
-                        'type': 'Polygon',
-                        'coordinates': [[
-                            [lon, lat],
-                            [lon + grid_size, lat],
-                            [lon + grid_size, lat + grid_size],
-                            [lon, lat + grid_size],
-                            [lon, lat]
-                        ]]
-                    },
-                    'properties': {
-                        'density': count,
-                        'lat': lat,
-                        'lon': lon
-                    }
-                }
-                grid_features.append(feature)
-            
-            lon += grid_size
-        lat += grid_size
+    for cell in cells:
+        lat = min_lat + int(cell.row) * grid_size
+        lon = min_lon + int(cell.col) * grid_size
+        
+        feature = {
+            'type': 'Feature',
+            'geometry': {
+                'type': 'Polygon',
+                'coordinates': [[
+                    [lon, lat],
+                    [lon + grid_size, lat],
+                    [lon + grid_size, lat + grid_size],
+                    [lon, lat + grid_size],
+                    [lon, lat]
+                ]]
+            },
+            'properties': {
+                'density': cell.density,
+                'lat': lat,
+                'lon': lon
+            }
+        }
+        grid_features.append(feature)
     
     return {
         'type': 'FeatureCollection',
         'features': grid_features
     }
 
+@cached_project_data('indicators_diversity')
 def calculate_diversity_indicators(project_id):
     """Calculate species diversity indicators."""
-    observations = Observation.query.filter_by(project_id=project_id).all()
-    
-    if not observations:
-        return {
-            'species_richness': 0,
-            'shannon_index': 0,
-            'simpson_index': 0,
-            'evenness': 0
-        }
-    
-    # Count species abundances
-    species_counts = defaultdict(int)
-    for obs in observations:
-        species_counts[obs.species_id] += obs.count
+    abundances = [row.individuals for row in species_abundance(project_id)]
+    diversity = diversity_profile(abundances)
     
-    # Species richness
-    richness = len(species_counts)
-    
-    # Shannon diversity index
-    shannon = calculate_shannon_diversity(observations)
+    # Undefined when every individual is a different species
+    if not math.isfinite(diversity['fisher_alpha']):
+        diversity['fisher_alpha'] = None
     
-    # Simpson diversity index
-    simpson = calculate_simpson_diversity(list(species_counts.values()))
-    
-    # Evenness (Shannon evenness)
-    max_shannon = math.log(richness) if richness > 1 else 0
-    evenness = shannon / max_shannon if max_shannon > 0 else 0
-    
-    return {
-        'species_richness': richness,
-        'shannon_index': shannon,
-        'simpson_index': simpson,
-        'evenness': evenness,
-        'total_individuals': sum(species_counts.values())
-    }
+    return diversity
 
-def calculate_shannon_diversity(observations):
-    """Calculate Shannon diversity index."""
-    import math
-    
-    # Count species abundances
-    species_counts = defaultdict(int)
-    for obs in observations:
-        species_counts[obs.species_id] += obs.count
-    
-    total_individuals = sum(species_counts.values())
-    
-    if total_individuals <= 1:
-        return 0
-    
-    shannon = 0
-    for count in species_counts.values():
-        if count > 0:
-            proportion = count / total_individuals
-            shannon -= proportion * math.log(proportion)
-    
-    return shannon
+def calculate_shannon_diversity(species_counts):
+    """Calculate Shannon diversity index from per-species abundances."""
+    return shannon(species_counts)
 
 def calculate_simpson_diversity(species_counts):
     """Calculate Simpson diversity index."""
-    total = sum(species_counts)
-    
-    if total <= 1:
-        return 0
-    
-    simpson = 0
-    for count in species_counts:
-        proportion = count / total
-        simpson += proportion ** 2
-    
-    return 1 - simpson
\ No newline at end of file
+    return simpson(species_counts)
\ No newline at end of file
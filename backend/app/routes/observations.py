@@ -2,16 +2,34 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
 from datetime import datetime
+import math
+from sqlalchemy.orm import joinedload
 
-from ..models import db, Observation, Project, Species, User, project_users
+from ..models import db, Observation, Project, project_users
 from ..schemas import ObservationSchema
-from ..utils.geo_utils import get_location_name
+from ..utils.cache_utils import bump_project_data_version
+from ..utils.result_cache import project_result_version, result_stem, submit_result_job
+from ..utils.identity_cache import get_user, get_species
+from ..utils.access import get_user_access, is_project_member
+from ..utils.bulk_import import parse_bulk_payload, ingest_observations
+from ..utils.pagination import decode_cursor, keyset_page, estimate_query_count
 
 observations_bp = Blueprint('observations', __name__, url_prefix='/api/observations')
 
 observation_schema = ObservationSchema()
 observations_schema = ObservationSchema(many=True)
 
+def observation_load_options():
+    """Eager-load the relationships that serialization nests.
+
+    Without these every serialized observation issues two lazy SELECTs,
+    one for its species and one for its observer.
+    """
+    return (
+        joinedload(Observation.species),
+        joinedload(Observation.observer)
+    )
+
 @observations_bp.route('', methods=['POST'])
 @jwt_required()
 def create_observation():
@@ -26,23 +44,15 @@ def create_observation():
         if not project:
             return jsonify({'error': 'Project not found'}), 404
         
-        user = User.query.get(current_user_id)
-        if user not in project.members and user.role != 'admin':
+        access = get_user_access(current_user_id)
+        if not access or not access.can_access_project(project.id):
             return jsonify({'error': 'Access denied to this project'}), 403
         
         # Verify species exists
-        species = Species.query.get(result['species_id'])
+        species = get_species(result['species_id'])
         if not species:
             return jsonify({'error': 'Species not found'}), 404
         
-        # Get location name if not provided
-        location_name = result.get('location_name')
-        if not location_name:
-            try:
-                location_name = get_location_name(result['latitude'], result['longitude'])
-            except:
-                location_name = f"Location ({result['latitude']:.4f}, {result['longitude']:.4f})"
-        
         observation = Observation(
             project_id=result['project_id'],
             species_id=result['species_id'],
@@ -50,7 +60,7 @@ def create_observation():
             observation_date=result['observation_date'],
             latitude=result['latitude'],
             longitude=result['longitude'],
-            location_name=location_name,
+            location_name=result.get('location_name'),
             count=result.get('count', 1),
             behavior=result.get('behavior'),
             habitat_description=result.get('habitat_description'),
@@ -64,6 +74,11 @@ def create_observation():
         
         db.session.add(observation)
         db.session.commit()
+        bump_project_data_version(observation.project_id)
+        
+        # Location name is filled in by a background task when not provided
+        if not observation.location_name:
+            queue_geocoding(observation.id)
         
         return jsonify({
             'message': 'Observation created successfully',
@@ -76,6 +91,68 @@ def create_observation():
         current_app.logger.error(f"Observation creation error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@observations_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+def create_observations_bulk():
+    """Create many observations from a JSON array or NDJSON body."""
+    try:
+        current_user_id = get_jwt_identity()
+        user = get_user(current_user_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        try:
+            rows, errors = parse_bulk_payload(request)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if len(rows) > current_app.config['BULK_OBSERVATION_MAX_ROWS']:
+            return jsonify({
+                'error': f"At most {current_app.config['BULK_OBSERVATION_MAX_ROWS']} observations per request"
+            }), 413
+        
+        created, errors = ingest_observations(
+            rows, user, errors, chunk_size=current_app.config['BULK_INSERT_CHUNK_SIZE']
+        )
+        db.session.commit()
+        
+        for project_id in {row['project_id'] for row in created}:
+            bump_project_data_version(project_id)
+        
+        missing_location = [str(row['id']) for row in created if not row['location_name']]
+        if missing_location:
+            queue_bulk_geocoding(missing_location)
+        
+        response = {
+            'message': f'{len(created)} observations created',
+            'created': len(created),
+            'observation_ids': [str(row['id']) for row in created],
+            'errors': {str(index): messages for index, messages in sorted(errors.items())}
+        }
+        
+        return jsonify(response), 201 if created or not errors else 400
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Bulk observation creation error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+def queue_geocoding(observation_id):
+    """Queue reverse geocoding of an observation's location name."""
+    try:
+        from ..tasks import geocode_observation_task
+        geocode_observation_task.apply_async((str(observation_id),), retry=False)
+    except Exception as e:
+        current_app.logger.warning(f"Could not queue geocoding for {observation_id}: {str(e)}")
+
+def queue_bulk_geocoding(observation_ids):
+    """Queue reverse geocoding for a batch of observations."""
+    try:
+        from ..tasks import geocode_observations_task
+        geocode_observations_task.apply_async((observation_ids,), retry=False)
+    except Exception as e:
+        current_app.logger.warning(f"Could not queue geocoding for {len(observation_ids)} observations: {str(e)}")
+
 @observations_bp.route('', methods=['GET'])
 @jwt_required()
 def get_observations():
@@ -87,11 +164,14 @@ def get_observations():
         species_id = request.args.get('species_id')
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
+        # Passing cursor (empty for the first page) opts into keyset pagination
+        cursor = request.args.get('cursor')
+        estimate_total = request.args.get('estimate_total', 'false').lower() == 'true'
         
         # Base query - only observations from projects user is member of
         query = db.session.query(Observation).join(Project).join(project_users).filter(
             project_users.c.user_id == current_user_id
-        )
+        ).options(*observation_load_options())
         
         if project_id:
             query = query.filter(Observation.project_id == project_id)
@@ -107,14 +187,41 @@ def get_observations():
             end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
             query = query.filter(Observation.observation_date <= end_dt)
         
+        if cursor is not None:
+            try:
+                after = decode_cursor(cursor) if cursor else None
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            
+            items, next_cursor = keyset_page(
+                query, Observation.observation_date, Observation.id, after, per_page
+            )
+            
+            response = {
+                'observations': observations_schema.dump(items),
+                'next_cursor': next_cursor,
+                'per_page': per_page
+            }
+            if estimate_total:
+                response['total_estimate'] = estimate_query_count(query)
+            
+            return jsonify(response)
+        
         observations = query.order_by(Observation.observation_date.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
+            page=page, per_page=per_page, error_out=False, count=not estimate_total
         )
         
+        if estimate_total:
+            total = estimate_query_count(query)
+            pages = math.ceil(total / per_page) if per_page else 0
+        else:
+            total = observations.total
+            pages = observations.pages
+        
         return jsonify({
             'observations': observations_schema.dump(observations.items),
-            'total': observations.total,
-            'pages': observations.pages,
+            'total': total,
+            'pages': pages,
             'current_page': page,
             'per_page': per_page
         })
@@ -123,7 +230,7 @@ def get_observations():
         current_app.logger.error(f"Observations fetch error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
-@observations_bp.route('/', methods=['GET'])
+@observations_bp.route('/<observation_id>', methods=['GET'])
 @jwt_required()
 def get_observation(observation_id):
     try:
@@ -133,7 +240,7 @@ def get_observation(observation_id):
         observation = db.session.query(Observation).join(Project).join(project_users).filter(
             Observation.id == observation_id,
             project_users.c.user_id == current_user_id
-        ).first()
+        ).options(*observation_load_options()).first()
         
         if not observation:
             return jsonify({'error': 'Observation not found'}), 404
@@ -144,27 +251,33 @@ def get_observation(observation_id):
         current_app.logger.error(f"Observation fetch error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
-@observations_bp.route('/', methods=['PUT'])
+@observations_bp.route('/<observation_id>', methods=['PUT'])
 @jwt_required()
 def update_observation(observation_id):
     try:
         current_user_id = get_jwt_identity()
         
-        observation = Observation.query.get_or_404(observation_id)
+        observation = Observation.query.options(
+            *observation_load_options()
+        ).filter(Observation.id == observation_id).first_or_404()
         
         # Only observer or admin can edit
-        user = User.query.get(current_user_id)
-        if str(observation.observer_id) != current_user_id and user.role != 'admin':
+        access = get_user_access(current_user_id)
+        if str(observation.observer_id) != current_user_id and not (access and access.is_admin):
             return jsonify({'error': 'Permission denied'}), 403
         
         data = request.get_json()
         result = observation_schema.load(data, partial=True)
         
+        previous_project_id = observation.project_id
         for key, value in result.items():
             if key not in ['id', 'observer', 'created_at']:
                 setattr(observation, key, value)
         
         db.session.commit()
+        bump_project_data_version(previous_project_id)
+        if str(observation.project_id) != str(previous_project_id):
+            bump_project_data_version(observation.project_id)
         
         return jsonify({
             'message': 'Observation updated successfully',
@@ -177,21 +290,25 @@ def update_observation(observation_id):
         current_app.logger.error(f"Observation update error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
-@observations_bp.route('/', methods=['DELETE'])
+@observations_bp.route('/<observation_id>', methods=['DELETE'])
 @jwt_required()
 def delete_observation(observation_id):
     try:
         current_user_id = get_jwt_identity()
         
-        observation = Observation.query.get_or_404(observation_id)
+        observation = Observation.query.options(
+            *observation_load_options()
+        ).filter(Observation.id == observation_id).first_or_404()
         
         # Only observer or admin can delete
-        user = User.query.get(current_user_id)
-        if str(observation.observer_id) != current_user_id and user.role != 'admin':
+        access = get_user_access(current_user_id)
+        if str(observation.observer_id) != current_user_id and not (access and access.is_admin):
             return jsonify({'error': 'Permission denied'}), 403
         
+        project_id = observation.project_id
         db.session.delete(observation)
         db.session.commit()
+        bump_project_data_version(project_id)
         
         return jsonify({'message': 'Observation deleted successfully'})
         
@@ -211,21 +328,21 @@ def export_observations():
             return jsonify({'error': 'Project ID required'}), 400
         
         # Verify user has access to project
-        project = Project.query.join(project_users).filter(
-            Project.id == project_id,
-            project_users.c.user_id == current_user_id
-        ).first()
-        
-        if not project:
+        if not is_project_member(current_user_id, project_id):
             return jsonify({'error': 'Project not found or access denied'}), 404
         
-        # Queue export task
+        # Reuse an identical finished or in-flight export
         from ..tasks import export_observations_task
-        task = export_observations_task.delay(project_id, format_type, current_user_id)
+        stem = result_stem('export', project_id, format_type, version=project_result_version(project_id))
+        job = submit_result_job(export_observations_task, 'export', stem, project_id, format_type, current_user_id)
+        
+        if job['status'] == 'completed':
+            return jsonify({'message': 'Export ready', **job})
         
         return jsonify({
-            'message': 'Export started',
-            'task_id': task.id
+            'message': 'Export started' if job['queued'] else 'Export already in progress',
+            'task_id': job['task_id'],
+            'status': job['status']
         })
         
     except Exception as e:
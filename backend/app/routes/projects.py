@@ -6,6 +6,8 @@ from sqlalchemy.exc import IntegrityError
 from ..models import db, Project, User, project_users
 from ..schemas import ProjectSchema
 from ..utils.auth_utils import project_member_required
+from ..utils.access import get_user_access, invalidate_user_access
+from ..utils.cache_utils import bump_project_data_version
 
 projects_bp = Blueprint('projects', __name__, url_prefix='/api/projects')
 
@@ -38,6 +40,7 @@ def create_project():
         creator = User.query.get(current_user_id)
         project.members.append(creator)
         
+        invalidate_user_access(current_user_id)
         db.session.commit()
         
         return jsonify({
@@ -115,8 +118,8 @@ def update_project(project_id):
         current_user_id = get_jwt_identity()
         
         # Only creator or admin can edit project
-        user = User.query.get(current_user_id)
-        if str(project.created_by_id) != current_user_id and user.role != 'admin':
+        access = get_user_access(current_user_id)
+        if str(project.created_by_id) != current_user_id and not access.is_admin:
             return jsonify({'error': 'Permission denied'}), 403
         
         data = request.get_json()
@@ -127,6 +130,8 @@ def update_project(project_id):
                 setattr(project, key, value)
         
         db.session.commit()
+        # Project details appear in cached reports
+        bump_project_data_version(project.id)
         
         return jsonify({
             'message': 'Project updated successfully',
@@ -166,8 +171,8 @@ def add_project_member(project_id):
         current_user_id = get_jwt_identity()
         
         # Only creator or admin can add members
-        user = User.query.get(current_user_id)
-        if str(project.created_by_id) != current_user_id and user.role != 'admin':
+        access = get_user_access(current_user_id)
+        if str(project.created_by_id) != current_user_id and not access.is_admin:
             return jsonify({'error': 'Permission denied'}), 403
         
         data = request.get_json()
@@ -184,6 +189,7 @@ def add_project_member(project_id):
             return jsonify({'error': 'User is already a member'}), 400
         
         project.members.append(member)
+        invalidate_user_access(member.id)
         db.session.commit()
         
         return jsonify({
@@ -203,8 +209,8 @@ def remove_project_member(project_id, user_id):
         current_user_id = get_jwt_identity()
         
         # Only creator or admin can remove members
-        user = User.query.get(current_user_id)
-        if str(project.created_by_id) != current_user_id and user.role != 'admin':
+        access = get_user_access(current_user_id)
+        if str(project.created_by_id) != current_user_id and not access.is_admin:
             return jsonify({'error': 'Permission denied'}), 403
         
         # Cannot remove project creator
@@ -219,6 +225,7 @@ def remove_project_member(project_id, user_id):
             return jsonify({'error': 'User is not a member'}), 400
         
         project.members.remove(member)
+        invalidate_user_access(member.id)
         db.session.commit()
         
         return jsonify({
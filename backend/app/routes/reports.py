@@ -1,15 +1,22 @@
 from flask import Blueprint, request, jsonify, current_app, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
-from datetime import datetime
 import os
 import tempfile
 from io import BytesIO
 
-from ..models import db, Project, Observation, Species, User, project_users
+from ..models import db, Project, Observation, project_users
 from ..utils.auth_utils import project_member_required
+from ..utils.access import get_user_access, is_project_member
+from ..utils.decorators import rate_limit
 from ..utils.pdf_generator import generate_report_pdf
-from ..tasks import generate_project_report_task
+from ..utils.report_data import PROJECT_CHARTS, project_chart, project_summary
+from ..utils.charts import CHART_FORMATS, render_chart
+from ..utils.result_cache import (
+    project_result_version, result_stem, submit_result_job, touch_result, evict_results
+)
+from ..utils.report_sections import REPORT_SECTIONS, REPORT_TEMPLATES, resolve_sections, parse_report_filters
+from ..tasks import generate_project_report_task, generate_custom_report_task
 
 reports_bp = Blueprint('reports', __name__, url_prefix='/api/reports')
 
@@ -33,27 +40,67 @@ def generate_report():
             return jsonify({'error': 'Project ID is required'}), 400
         
         # Verify project access
-        project = db.session.query(Project).join(project_users).filter(
-            Project.id == project_id,
-            project_users.c.user_id == current_user_id
-        ).first()
-        
-        if not project:
+        if not is_project_member(current_user_id, project_id):
             return jsonify({'error': 'Project not found or access denied'}), 404
         
-        # Generate report asynchronously
-        task = generate_project_report_task.delay(project_id, current_user_id)
+        # Reuse an identical finished or in-flight report
+        stem = result_stem(
+            'report', project_id, format_type,
+            filters={'report_type': report_type},
+            version=project_result_version(project_id)
+        )
+        job = submit_result_job(generate_project_report_task, 'report', stem, project_id, current_user_id)
+        
+        if job['status'] == 'completed':
+            return jsonify({'message': 'Report ready', **job})
         
         return jsonify({
-            'message': 'Report generation started',
-            'task_id': task.id,
-            'status': 'pending'
+            'message': 'Report generation started' if job['queued'] else 'Report generation already in progress',
+            'task_id': job['task_id'],
+            'status': job['status']
         })
         
     except Exception as e:
         current_app.logger.error(f"Report generation error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+def sharded_export_status(celery, result):
+    """Aggregate the progress of a sharded export's shard and finalizer tasks."""
+    total = result['total']
+    finalizer = celery.AsyncResult(result['finalizer_task_id'])
+    
+    if finalizer.state == 'SUCCESS':
+        return {
+            'status': 'completed',
+            'current': total,
+            'total': total,
+            'result': finalizer.info,
+            'download_url': finalizer.info.get('download_url')
+        }
+    
+    current = 0
+    finished = 0
+    for shard_task_id in result['shard_task_ids']:
+        shard = celery.AsyncResult(shard_task_id)
+        if shard.state == 'SUCCESS':
+            current += shard.info.get('rows', 0)
+            finished += 1
+        elif shard.state == 'PROGRESS':
+            current += shard.info.get('current', 0)
+        elif shard.state == 'FAILURE':
+            return {'status': 'failed', 'current': current, 'total': total, 'error': str(shard.info)}
+    
+    if finalizer.state == 'FAILURE':
+        return {'status': 'failed', 'current': current, 'total': total, 'error': str(finalizer.info)}
+    
+    shard_count = len(result['shard_task_ids'])
+    return {
+        'status': 'in_progress',
+        'current': min(current, total),
+        'total': total,
+        'message': f'Exported {current} of {total} observations ({finished}/{shard_count} parts done)'
+    }
+
 @reports_bp.route('/status/<task_id>', methods=['GET'])
 @jwt_required()
 def get_report_status(task_id):
@@ -77,6 +124,8 @@ def get_report_status(task_id):
                 'total': task.info.get('total', 100),
                 'message': task.info.get('message', 'Generating report...')
             }
+        elif task.state == 'SUCCESS' and (task.info or {}).get('status') == 'sharded':
+            response = sharded_export_status(celery, task.info)
         elif task.state == 'SUCCESS':
             response = {
                 'status': 'completed',
@@ -114,15 +163,10 @@ def download_report(filename):
         reports_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'reports')
         file_path = os.path.join(reports_dir, filename)
         
-        if not os.path.exists(file_path):
+        # Downloads count as use for LRU eviction
+        if not touch_result(file_path):
             return jsonify({'error': 'Report not found'}), 404
         
-        # Check if file is too old (cleanup old reports)
-        file_age = datetime.now().timestamp() - os.path.getmtime(file_path)
-        if file_age > 7 * 24 * 60 * 60:  # 7 days
-            os.remove(file_path)
-            return jsonify({'error': 'Report has expired'}), 404
-        
         return send_file(
             file_path,
             as_attachment=True,
@@ -136,6 +180,7 @@ def download_report(filename):
 
 @reports_bp.route('/quick-pdf', methods=['POST'])
 @jwt_required()
+@rate_limit(max_requests=None, cost=10)
 def generate_quick_pdf():
     """Generate a quick PDF report synchronously for small projects."""
     try:
@@ -148,12 +193,7 @@ def generate_quick_pdf():
             return jsonify({'error': 'Project ID is required'}), 400
         
         # Verify project access
-        project = db.session.query(Project).join(project_users).filter(
-            Project.id == project_id,
-            project_users.c.user_id == current_user_id
-        ).first()
-        
-        if not project:
+        if not is_project_member(current_user_id, project_id):
             return jsonify({'error': 'Project not found or access denied'}), 404
         
         # Check if project is small enough for quick generation
@@ -165,6 +205,7 @@ def generate_quick_pdf():
             }), 400
         
         # Generate PDF in memory
+        project = db.session.get(Project, project_id)
         pdf_buffer = BytesIO()
         generate_report_pdf(project, pdf_buffer)
         pdf_buffer.seek(0)
@@ -208,61 +249,12 @@ def get_project_summary():
             return jsonify({'error': 'Project ID is required'}), 400
         
         # Verify project access
-        project = db.session.query(Project).join(project_users).filter(
-            Project.id == project_id,
-            project_users.c.user_id == current_user_id
-        ).first()
-        
-        if not project:
+        if not is_project_member(current_user_id, project_id):
             return jsonify({'error': 'Project not found or access denied'}), 404
         
-        # Get project data
-        observations = Observation.query.filter_by(project_id=project_id).all()
-        
-        # Calculate summary statistics
-        total_observations = len(observations)
-        unique_species = len(set(obs.species_id for obs in observations))
-        total_individuals = sum(obs.count for obs in observations)
-        unique_observers = len(set(obs.observer_id for obs in observations))
-        
-        # Date range
-        date_range = None
-        if observations:
-            dates = [obs.observation_date for obs in observations]
-            date_range = {
-                'start': min(dates).isoformat(),
-                'end': max(dates).isoformat()
-            }
-        
-        # Species breakdown
-        species_counts = {}
-        species_observations = {}
-        for obs in observations:
-            species_name = obs.species.common_name if obs.species else 'Unknown'
-            species_counts[species_name] = species_counts.get(species_name, 0) + obs.count
-            species_observations[species_name] = species_observations.get(species_name, 0) + 1
-        
-        # Top species
-        top_species = sorted(species_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-        
-        # Observer contributions
-        observer_counts = {}
-        for obs in observations:
-            observer_name = f"{obs.observer.first_name} {obs.observer.last_name}" if obs.observer else 'Unknown'
-            observer_counts[observer_name] = observer_counts.get(observer_name, 0) + 1
-        
-        # Monthly distribution
-        monthly_counts = {}
-        for obs in observations:
-            month = obs.observation_date.strftime('%Y-%m')
-            monthly_counts[month] = monthly_counts.get(month, 0) + 1
-        
-        # Location distribution
-        location_counts = {}
-        for obs in observations:
-            location = obs.location_name or f"{obs.latitude:.2f}, {obs.longitude:.2f}"
-            location_counts[location] = location_counts.get(location, 0) + 1
+        project = db.session.get(Project, project_id)
         
+        # Grouped breakdowns and totals in one round trip
         summary = {
             'project': {
                 'id': project.id,
@@ -273,23 +265,11 @@ def get_project_summary():
                 'start_date': project.start_date.isoformat() if project.start_date else None,
                 'end_date': project.end_date.isoformat() if project.end_date else None,
                 'created_by': f"{project.created_by.first_name} {project.created_by.last_name}",
-                'members_count': len(project.members)
-            },
-            'statistics': {
-                'total_observations': total_observations,
-                'unique_species': unique_species,
-                'total_individuals': total_individuals,
-                'unique_observers': unique_observers,
-                'date_range': date_range
+                'members_count': db.session.query(project_users).filter(
+                    project_users.c.project_id == project.id
+                ).count()
             },
-            'species_breakdown': {
-                'counts': species_counts,
-                'observations': species_observations,
-                'top_species': top_species
-            },
-            'observer_contributions': observer_counts,
-            'temporal_distribution': monthly_counts,
-            'location_distribution': location_counts
+            **project_summary(project.id)
         }
         
         return jsonify(summary)
@@ -298,6 +278,38 @@ def get_project_summary():
         current_app.logger.error(f"Project summary error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@reports_bp.route('/charts/<chart_type>', methods=['GET'])
+@jwt_required()
+def get_project_chart(chart_type):
+    """Get a rendered project chart (PNG or SVG) for the dashboard."""
+    try:
+        current_user_id = get_jwt_identity()
+        project_id = request.args.get('project_id')
+        chart_format = request.args.get('format', 'png')
+        
+        if not project_id:
+            return jsonify({'error': 'Project ID is required'}), 400
+        
+        if chart_type not in PROJECT_CHARTS:
+            return jsonify({'error': f'Unknown chart type. Available: {", ".join(PROJECT_CHARTS)}'}), 404
+        
+        if chart_format not in CHART_FORMATS:
+            return jsonify({'error': f'Invalid format. Must be one of: {", ".join(CHART_FORMATS)}'}), 400
+        
+        # Verify project access
+        if not is_project_member(current_user_id, project_id):
+            return jsonify({'error': 'Project not found or access denied'}), 404
+        
+        # Identical series reuse the cached rendering
+        chart = project_chart(project_id, chart_type)
+        chart_path = render_chart(fmt=chart_format, **chart)
+        
+        return send_file(chart_path, mimetype=CHART_FORMATS[chart_format])
+        
+    except Exception as e:
+        current_app.logger.error(f"Chart rendering error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @reports_bp.route('/export-data', methods=['POST'])
 @jwt_required()
 def export_project_data():
@@ -314,21 +326,20 @@ def export_project_data():
             return jsonify({'error': 'Project ID is required'}), 400
         
         # Verify project access
-        project = db.session.query(Project).join(project_users).filter(
-            Project.id == project_id,
-            project_users.c.user_id == current_user_id
-        ).first()
-        
-        if not project:
+        if not is_project_member(current_user_id, project_id):
             return jsonify({'error': 'Project not found or access denied'}), 404
         
-        # Export data using existing task
+        # Reuse an identical finished or in-flight export
         from ..tasks import export_observations_task
-        task = export_observations_task.delay(project_id, format_type, current_user_id)
+        stem = result_stem('export', project_id, format_type, version=project_result_version(project_id))
+        job = submit_result_job(export_observations_task, 'export', stem, project_id, format_type, current_user_id)
+        
+        if job['status'] == 'completed':
+            return jsonify({'message': 'Data export ready', 'format': format_type, **job})
         
         return jsonify({
-            'message': 'Data export started',
-            'task_id': task.id,
+            'message': 'Data export started' if job['queued'] else 'Data export already in progress',
+            'task_id': job['task_id'],
             'format': format_type
         })
         
@@ -372,7 +383,10 @@ def get_report_templates():
             }
         ]
         
-        return jsonify({'templates': templates})
+        for template in templates:
+            template['sections'] = REPORT_TEMPLATES[template['id']]
+        
+        return jsonify({'templates': templates, 'sections': list(REPORT_SECTIONS)})
         
     except Exception as e:
         current_app.logger.error(f"Templates fetch error: {str(e)}")
@@ -396,21 +410,36 @@ def generate_custom_report():
             return jsonify({'error': 'Project ID is required'}), 400
         
         # Verify project access
-        project = db.session.query(Project).join(project_users).filter(
-            Project.id == project_id,
-            project_users.c.user_id == current_user_id
-        ).first()
-        
-        if not project:
+        if not is_project_member(current_user_id, project_id):
             return jsonify({'error': 'Project not found or access denied'}), 404
         
-        # Generate custom report
-        # This would be implemented with more sophisticated report generation
+        try:
+            section_names = resolve_sections(template_id, sections)
+            filters = parse_report_filters(date_range, species_filter)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Reuse an identical finished or in-flight report
+        stem = result_stem(
+            'report', project_id, 'pdf',
+            filters={'sections': section_names, **filters},
+            version=project_result_version(project_id)
+        )
+        job = submit_result_job(
+            generate_custom_report_task, 'report', stem,
+            project_id, current_user_id, section_names, filters
+        )
+        
+        if job['status'] == 'completed':
+            return jsonify({'message': 'Report ready', 'sections': section_names, **job})
+        
         return jsonify({
-            'message': 'Custom report generation not yet implemented',
-            'requested_template': template_id,
-            'requested_sections': sections
-        }), 501
+            'message': 'Report generation started' if job['queued'] else 'Report generation already in progress',
+            'task_id': job['task_id'],
+            'status': job['status'],
+            'template_id': template_id,
+            'sections': section_names
+        }), 202
         
     except Exception as e:
         current_app.logger.error(f"Custom report error: {str(e)}")
@@ -424,32 +453,15 @@ def cleanup_old_reports():
         current_user_id = get_jwt_identity()
         
         # Only admins can trigger cleanup
-        user = User.query.get(current_user_id)
-        if user.role != 'admin':
+        access = get_user_access(current_user_id)
+        if not access or not access.is_admin:
             return jsonify({'error': 'Admin access required'}), 403
         
-        reports_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'reports')
-        
-        if not os.path.exists(reports_dir):
-            return jsonify({'message': 'No reports directory found'})
-        
-        # Remove files older than 7 days
-        current_time = datetime.now().timestamp()
-        removed_count = 0
-        total_size = 0
-        
-        for filename in os.listdir(reports_dir):
-            file_path = os.path.join(reports_dir, filename)
-            if os.path.isfile(file_path):
-                file_age = current_time - os.path.getmtime(file_path)
-                if file_age > 7 * 24 * 60 * 60:  # 7 days
-                    file_size = os.path.getsize(file_path)
-                    os.remove(file_path)
-                    removed_count += 1
-                    total_size += file_size
+        # Evict least recently used results over the size budget
+        removed_count, total_size = evict_results(current_app.config['RESULT_CACHE_MAX_BYTES'])
         
         return jsonify({
-            'message': f'Cleaned up {removed_count} old report files',
+            'message': f'Cleaned up {removed_count} old report and export files',
             'files_removed': removed_count,
             'space_freed': f"{total_size / 1024 / 1024:.2f} MB"
         })
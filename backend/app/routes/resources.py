@@ -5,9 +5,10 @@ import os
 from datetime import datetime
 from uuid import uuid4
 
-from ..models import db, Resource, User
+from ..models import db, Resource
 from ..schemas import ResourceSchema
 from ..utils.decorators import admin_required, role_required
+from ..utils.access import get_user_access
 from ..utils.validation import validate_json
 
 resources_bp = Blueprint('resources', __name__, url_prefix='/api/resources')
@@ -88,9 +89,9 @@ def get_resource(resource_id):
         
         # Check if user can access this resource
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        access = get_user_access(current_user_id)
         
-        if not resource.is_public and resource.created_by_id != current_user_id and current_user.role != 'admin':
+        if not resource.is_public and resource.created_by_id != current_user_id and not access.is_admin:
             return jsonify({'error': 'Access denied'}), 403
         
         return jsonify({'resource': resource_schema.dump(resource)}), 200
@@ -165,14 +166,14 @@ def update_resource(resource_id):
     """Update a specific resource"""
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        access = get_user_access(current_user_id)
         
         resource = Resource.query.filter_by(id=resource_id).first()
         if not resource:
             return jsonify({'error': 'Resource not found'}), 404
         
         # Check permissions
-        if resource.created_by_id != current_user_id and current_user.role != 'admin':
+        if resource.created_by_id != current_user_id and not access.is_admin:
             return jsonify({'error': 'Access denied'}), 403
         
         # Handle file upload if present
@@ -226,14 +227,14 @@ def delete_resource(resource_id):
     """Delete a specific resource"""
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        access = get_user_access(current_user_id)
         
         resource = Resource.query.filter_by(id=resource_id).first()
         if not resource:
             return jsonify({'error': 'Resource not found'}), 404
         
         # Check permissions
-        if resource.created_by_id != current_user_id and current_user.role != 'admin':
+        if resource.created_by_id != current_user_id and not access.is_admin:
             return jsonify({'error': 'Access denied'}), 403
         
         # Delete associated file if exists
@@ -297,14 +298,14 @@ def download_resource(resource_id):
     """Download a resource file"""
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        access = get_user_access(current_user_id)
         
         resource = Resource.query.filter_by(id=resource_id).first()
         if not resource:
             return jsonify({'error': 'Resource not found'}), 404
         
         # Check permissions
-        if not resource.is_public and resource.created_by_id != current_user_id and current_user.role != 'admin':
+        if not resource.is_public and resource.created_by_id != current_user_id and not access.is_admin:
             return jsonify({'error': 'Access denied'}), 403
         
         if not resource.file_url:
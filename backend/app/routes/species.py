@@ -5,6 +5,7 @@ from marshmallow import ValidationError
 from ..models import db, Species, User
 from ..schemas import SpeciesSchema
 from ..utils.auth_utils import researcher_required
+from ..utils.cache_utils import bump_reference_data_version
 
 species_bp = Blueprint('species', __name__, url_prefix='/api/species')
 
@@ -102,6 +103,7 @@ def update_species(species_id):
                 setattr(species, key, value)
         
         db.session.commit()
+        bump_reference_data_version()
         
         return jsonify({
             'message': 'Species updated successfully',
@@ -0,0 +1,168 @@
+from flask import Blueprint, jsonify, current_app, make_response
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import text
+
+from .. import cache
+from ..models import db, Observation
+from ..utils.cache_utils import get_project_data_version
+from ..utils.access import is_project_member
+from ..utils.decorators import rate_limit
+from ..utils.mvt import (
+    tile_bounds, tile_width_meters, lonlat_to_tile_coords, encode_point_layer
+)
+
+tiles_bp = Blueprint('tiles', __name__, url_prefix='/api/tiles')
+
+MVT_MIMETYPE = 'application/vnd.mapbox-vector-tile'
+MAX_ZOOM = 22
+
+POSTGIS_TILE_SQL = text("""
+    WITH pts AS (
+        SELECT
+            ST_Transform(ST_SetSRID(ST_MakePoint(o.longitude, o.latitude), 4326), 3857) AS geom,
+            o.species_id,
+            o.count
+        FROM observations o
+        WHERE o.project_id = :project_id
+          AND ST_MakePoint(o.longitude, o.latitude) && ST_MakeEnvelope(:west, :south, :east, :north)
+    ),
+    clusters AS (
+        SELECT
+            ST_Centroid(ST_Collect(geom)) AS geom,
+            COUNT(*) AS point_count,
+            COALESCE(SUM(count), 0) AS individuals,
+            COUNT(DISTINCT species_id) AS species_count,
+            MIN(species_id::text) AS species_id
+        FROM pts
+        GROUP BY ST_SnapToGrid(geom, :cell_size)
+    )
+    SELECT ST_AsMVT(tile, 'observations', :extent, 'geom')
+    FROM (
+        SELECT
+            ST_AsMVTGeom(geom, ST_TileEnvelope(:z, :x, :y), :extent, 64, true) AS geom,
+            point_count,
+            individuals,
+            species_count,
+            CASE WHEN species_count = 1 THEN species_id END AS species_id
+        FROM clusters
+    ) AS tile
+""")
+
+@tiles_bp.route('/<project_id>/<int:z>/<int:x>/<int:y>.mvt', methods=['GET'])
+@jwt_required()
+@rate_limit(max_requests=None, cost=0.25)  # A map view loads dozens of tiles
+def get_observation_tile(project_id, z, x, y):
+    """Get clustered observation points for a map tile as MVT."""
+    try:
+        current_user_id = get_jwt_identity()
+
+        if z > MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+            return jsonify({'error': 'Invalid tile coordinates'}), 400
+
+        # Verify project access
+        if not is_project_member(current_user_id, project_id):
+            return jsonify({'error': 'Project not found or access denied'}), 404
+
+        version = get_project_data_version(project_id)
+        cache_key = f"tile:{project_id}:{version}:{z}/{x}/{y}"
+
+        tile = cache.get(cache_key)
+        if tile is None:
+            tile = generate_observation_tile(project_id, z, x, y)
+            cache.set(cache_key, tile, timeout=current_app.config['TILE_CACHE_TIMEOUT'])
+
+        response = make_response(tile)
+        response.headers['Content-Type'] = MVT_MIMETYPE
+        response.headers['Cache-Control'] = 'private, max-age=60'
+        return response
+
+    except Exception as e:
+        current_app.logger.error(f"Tile generation error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+def generate_observation_tile(project_id, z, x, y):
+    """Generate an MVT tile, using PostGIS when available."""
+    extent = current_app.config['TILE_EXTENT']
+
+    # Points closer than the cluster radius (in pixels of a 256px tile) are
+    # merged; from TILE_CLUSTER_MAX_ZOOM on only coincident points merge.
+    if z >= current_app.config['TILE_CLUSTER_MAX_ZOOM']:
+        cluster_units = 1
+    else:
+        cluster_units = extent * current_app.config['TILE_CLUSTER_RADIUS'] // 256
+
+    if db.engine.dialect.name == 'postgresql' and current_app.config['TILE_USE_POSTGIS']:
+        return generate_postgis_tile(project_id, z, x, y, extent, cluster_units)
+
+    return generate_python_tile(project_id, z, x, y, extent, cluster_units)
+
+def generate_postgis_tile(project_id, z, x, y, extent, cluster_units):
+    """Generate a tile with ST_AsMVT on the observations GIST index."""
+    west, south, east, north = tile_bounds(z, x, y)
+
+    tile = db.session.execute(POSTGIS_TILE_SQL, {
+        'project_id': project_id,
+        'west': west,
+        'south': south,
+        'east': east,
+        'north': north,
+        'cell_size': tile_width_meters(z) / extent * cluster_units,
+        'extent': extent,
+        'z': z,
+        'x': x,
+        'y': y
+    }).scalar()
+
+    return bytes(tile) if tile else b''
+
+def generate_python_tile(project_id, z, x, y, extent, cluster_units):
+    """Generate a tile with the pure-Python encoder."""
+    west, south, east, north = tile_bounds(z, x, y)
+
+    points = db.session.query(
+        Observation.latitude,
+        Observation.longitude,
+        Observation.species_id,
+        Observation.count
+    ).filter(
+        Observation.project_id == project_id,
+        Observation.longitude >= west,
+        Observation.longitude <= east,
+        Observation.latitude >= south,
+        Observation.latitude <= north
+    )
+
+    clusters = {}
+    for latitude, longitude, species_id, count in points:
+        px, py = lonlat_to_tile_coords(longitude, latitude, z, x, y, extent)
+        cell = (px // cluster_units, py // cluster_units)
+
+        cluster = clusters.setdefault(cell, {
+            'sum_x': 0, 'sum_y': 0, 'point_count': 0, 'individuals': 0, 'species': set()
+        })
+        cluster['sum_x'] += px
+        cluster['sum_y'] += py
+        cluster['point_count'] += 1
+        cluster['individuals'] += count or 0
+        cluster['species'].add(str(species_id))
+
+    if not clusters:
+        return b''
+
+    features = []
+    for cluster in clusters.values():
+        species = cluster['species']
+        features.append({
+            'geometry': (
+                cluster['sum_x'] // cluster['point_count'],
+                cluster['sum_y'] // cluster['point_count']
+            ),
+            'properties': {
+                'point_count': cluster['point_count'],
+                'individuals': cluster['individuals'],
+                'species_count': len(species),
+                'species_id': next(iter(species)) if len(species) == 1 else None
+            }
+        })
+
+    return encode_point_layer('observations', features, extent)
@@ -6,6 +6,8 @@ from werkzeug.utils import secure_filename
 from PIL import Image
 import magic
 
+from ..utils.decorators import rate_limit
+
 uploads_bp = Blueprint('uploads', __name__, url_prefix='/api/uploads')
 
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
@@ -30,6 +32,7 @@ def is_safe_file(file_path):
 
 @uploads_bp.route('/image', methods=['POST'])
 @jwt_required()
+@rate_limit(max_requests=10, per_seconds=60, scope='uploads')
 def upload_image():
     try:
         if 'file' not in request.files:
@@ -89,6 +92,7 @@ def upload_image():
 
 @uploads_bp.route('/audio', methods=['POST'])
 @jwt_required()
+@rate_limit(max_requests=10, per_seconds=60, scope='uploads')
 def upload_audio():
     try:
         if 'file' not in request.files:
@@ -1,132 +1,203 @@
-from celery import Celery
-from flask import current_app
-import pandas as pd
+from celery import Celery, chord
+from flask import current_app, has_app_context
 import os
-import csv
+import shutil
+import uuid
 from datetime import datetime
-from io import StringIO
 
-from .models import db, Observation, Species, User, Project
+from .config import config
+from .models import db, Observation, User, Project
+from .utils.cache_utils import bump_project_data_version
+from .utils.geo_utils import reverse_geocode, reverse_geocode_batch, format_coordinates
+from .utils.export_utils import (
+    count_export_rows, export_extension, export_file_path, export_date_ranges, write_export,
+    shard_part_path, concatenate_csv_parts, zip_parts
+)
 from .utils.pdf_generator import generate_report_pdf
+from .utils.report_sections import build_section_report
+from .utils.result_cache import (
+    result_file_path, result_download_url, temp_result_path, publish_result, release_job, evict_results
+)
 
-def make_celery(app):
+def make_celery(app=None):
+    """Create the Celery app that runs these tasks.
+
+    Broker settings come from ``app`` when given, otherwise from the
+    config selected by FLASK_ENV, so this module can be imported outside
+    an application context (e.g. by the worker).
+    """
+    if app is not None:
+        broker = app.config['CELERY_BROKER_URL']
+        backend = app.config['CELERY_RESULT_BACKEND']
+    else:
+        settings = config.get(os.getenv('FLASK_ENV', 'development'), config['default'])
+        broker = settings.CELERY_BROKER_URL
+        backend = settings.CELERY_RESULT_BACKEND
+    
     celery = Celery(
-        app.import_name,
-        backend=app.config['CELERY_RESULT_BACKEND'],
-        broker=app.config['CELERY_BROKER_URL']
+        app.import_name if app is not None else __name__,
+        backend=backend,
+        broker=broker
     )
     
+    flask_app = app
+    
     class ContextTask(celery.Task):
         """Make celery tasks work with Flask app context."""
         def __call__(self, *args, **kwargs):
-            with app.app_context():
+            nonlocal flask_app
+            if has_app_context():
+                return self.run(*args, **kwargs)
+            if flask_app is None:
+                from . import create_app
+                flask_app = create_app(os.getenv('FLASK_ENV', 'development'))
+            with flask_app.app_context():
                 return self.run(*args, **kwargs)
     
     celery.Task = ContextTask
     return celery
 
-celery = make_celery(current_app)
+celery = make_celery()
+
+def _remove_temp_file(temp_path):
+    if temp_path and os.path.exists(temp_path):
+        os.remove(temp_path)
 
 @celery.task(bind=True)
-def export_observations_task(self, project_id, format_type, user_id):
+def export_observations_task(self, project_id, format_type, user_id, result_stem=None):
     """Export observations for a project"""
+    temp_path = None
     try:
-        self.update_state(state='PROGRESS', meta={'current': 10, 'total': 100})
+        extension = export_extension(format_type)
+        total = count_export_rows(project_id)
         
-        # Get observations
-        observations = db.session.query(Observation).filter(
-            Observation.project_id == project_id
-        ).join(Species).join(User).all()
+        # Large projects fan out into shard tasks joined by a chord
+        shard_count = current_app.config['EXPORT_SHARD_COUNT']
+        if shard_count > 1 and total >= current_app.config['EXPORT_SHARD_MIN_ROWS']:
+            return start_sharded_export(
+                self.request.id, project_id, format_type, total, shard_count, result_stem
+            )
         
-        self.update_state(state='PROGRESS', meta={'current': 30, 'total': 100})
+        def report_progress(written):
+            self.update_state(state='PROGRESS', meta={
+                'current': written,
+                'total': total,
+                'message': f'Exported {written} of {total} observations'
+            })
         
-        if format_type == 'csv':
-            # Create CSV
-            output = StringIO()
-            writer = csv.writer(output)
-            
-            # Headers
-            headers = [
-                'ID', 'Species Scientific Name', 'Species Common Name',
-                'Observer', 'Date', 'Latitude', 'Longitude', 'Location',
-                'Count', 'Behavior', 'Habitat', 'Weather', 'Notes'
-            ]
-            writer.writerow(headers)
-            
-            # Data rows
-            for obs in observations:
-                writer.writerow([
-                    str(obs.id),
-                    obs.species.scientific_name,
-                    obs.species.common_name,
-                    f"{obs.observer.first_name} {obs.observer.last_name}",
-                    obs.observation_date.isoformat(),
-                    obs.latitude,
-                    obs.longitude,
-                    obs.location_name or '',
-                    obs.count,
-                    obs.behavior or '',
-                    obs.habitat_description or '',
-                    obs.weather_conditions or '',
-                    obs.notes or ''
-                ])
-            
-            self.update_state(state='PROGRESS', meta={'current': 80, 'total': 100})
-            
-            # Save file
-            filename = f"observations_{project_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'exports', filename)
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            
-            with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                f.write(output.getvalue())
-        
-        elif format_type == 'excel':
-            # Create Excel file
-            data = []
-            for obs in observations:
-                data.append({
-                    'ID': str(obs.id),
-                    'Species Scientific Name': obs.species.scientific_name,
-                    'Species Common Name': obs.species.common_name,
-                    'Observer': f"{obs.observer.first_name} {obs.observer.last_name}",
-                    'Date': obs.observation_date,
-                    'Latitude': obs.latitude,
-                    'Longitude': obs.longitude,
-                    'Location': obs.location_name or '',
-                    'Count': obs.count,
-                    'Behavior': obs.behavior or '',
-                    'Habitat': obs.habitat_description or '',
-                    'Weather': obs.weather_conditions or '',
-                    'Notes': obs.notes or ''
-                })
-            
-            df = pd.DataFrame(data)
-            filename = f"observations_{project_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'exports', filename)
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            
-            df.to_excel(file_path, index=False)
+        report_progress(0)
         
-        self.update_state(state='PROGRESS', meta={'current': 100, 'total': 100})
+        if result_stem:
+            filename, file_path = result_file_path('export', result_stem, extension)
+        else:
+            filename, file_path = export_file_path(project_id, extension)
+        temp_path = temp_result_path(file_path)
+        write_export(temp_path, project_id, format_type, progress=report_progress)
+        publish_result(temp_path, file_path, result_stem)
+        
+        report_progress(total)
         
         return {
             'status': 'completed',
             'filename': filename,
             'file_path': file_path,
-            'download_url': f"/api/uploads/exports/{filename}"
+            'download_url': result_download_url('export', filename)
         }
         
     except Exception as e:
+        _remove_temp_file(temp_path)
+        if result_stem:
+            release_job(result_stem, self.request.id)
         self.update_state(
             state='FAILURE',
             meta={'error': str(e)}
         )
         raise
 
+def start_sharded_export(parent_id, project_id, format_type, total, shard_count, result_stem=None):
+    """Launch a chord of date-range shard exports and a finalizer"""
+    shard_task_ids = []
+    shards = []
+    for shard_index, (after, until) in enumerate(export_date_ranges(project_id, shard_count)):
+        shard_task_id = str(uuid.uuid4())
+        shard_task_ids.append(shard_task_id)
+        shards.append(export_observations_shard_task.s(
+            project_id, format_type, parent_id, shard_index,
+            after.isoformat() if after else None,
+            until.isoformat() if until else None
+        ).set(task_id=shard_task_id))
+    
+    finalizer = chord(shards)(
+        finalize_sharded_export_task.s(project_id, format_type, parent_id, result_stem)
+    )
+    
+    return {
+        'status': 'sharded',
+        'total': total,
+        'shard_task_ids': shard_task_ids,
+        'finalizer_task_id': finalizer.id
+    }
+
 @celery.task(bind=True)
-def generate_project_report_task(self, project_id, user_id):
+def export_observations_shard_task(self, project_id, format_type, parent_id, shard_index, after, until):
+    """Export one date-range shard of a project's observations to a part file"""
+    date_range = (
+        datetime.fromisoformat(after) if after else None,
+        datetime.fromisoformat(until) if until else None
+    )
+    part_path = shard_part_path(parent_id, shard_index, export_extension(format_type))
+    
+    def report_progress(written):
+        self.update_state(state='PROGRESS', meta={'current': written})
+    
+    rows = write_export(
+        part_path, project_id, format_type, progress=report_progress,
+        date_range=date_range, csv_header=False
+    )
+    
+    return {'part_path': part_path, 'rows': rows}
+
+@celery.task(bind=True)
+def finalize_sharded_export_task(self, shard_results, project_id, format_type, parent_id, result_stem=None):
+    """Combine shard part files into the final export"""
+    part_paths = [result['part_path'] for result in shard_results]
+    
+    # CSV parts are concatenated; other formats are packaged as a zip of
+    # parts (for Parquet, a dataset of part files)
+    extension = 'csv' if format_type == 'csv' else f"{export_extension(format_type)}.zip"
+    if result_stem:
+        filename, file_path = result_file_path('export', result_stem, extension)
+    else:
+        filename, file_path = export_file_path(project_id, extension)
+    temp_path = temp_result_path(file_path)
+    
+    try:
+        if format_type == 'csv':
+            concatenate_csv_parts(temp_path, part_paths)
+        else:
+            zip_parts(temp_path, part_paths)
+        publish_result(temp_path, file_path, result_stem)
+    except Exception:
+        _remove_temp_file(temp_path)
+        if result_stem:
+            release_job(result_stem, parent_id)
+        raise
+    finally:
+        if part_paths:
+            shutil.rmtree(os.path.dirname(part_paths[0]), ignore_errors=True)
+    
+    return {
+        'status': 'completed',
+        'filename': filename,
+        'file_path': file_path,
+        'rows': sum(result['rows'] for result in shard_results),
+        'download_url': result_download_url('export', filename)
+    }
+
+@celery.task(bind=True)
+def generate_project_report_task(self, project_id, user_id, result_stem=None):
     """Generate comprehensive project report"""
+    temp_path = None
     try:
         self.update_state(state='PROGRESS', meta={'current': 10, 'total': 100})
         
@@ -137,13 +208,18 @@ def generate_project_report_task(self, project_id, user_id):
         self.update_state(state='PROGRESS', meta={'current': 30, 'total': 100})
         
         # Generate PDF report
-        filename = f"report_{project_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'reports', filename)
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        if result_stem:
+            filename, file_path = result_file_path('report', result_stem, 'pdf')
+        else:
+            filename = f"report_{project_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'reports', filename)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
         
         self.update_state(state='PROGRESS', meta={'current': 70, 'total': 100})
         
-        generate_report_pdf(project, file_path)
+        temp_path = temp_result_path(file_path)
+        generate_report_pdf(project, temp_path)
+        publish_result(temp_path, file_path, result_stem)
         
         self.update_state(state='PROGRESS', meta={'current': 100, 'total': 100})
         
@@ -151,16 +227,122 @@ def generate_project_report_task(self, project_id, user_id):
             'status': 'completed',
             'filename': filename,
             'file_path': file_path,
-            'download_url': f"/api/uploads/reports/{filename}"
+            'download_url': result_download_url('report', filename)
         }
         
     except Exception as e:
+        _remove_temp_file(temp_path)
+        if result_stem:
+            release_job(result_stem, self.request.id)
         self.update_state(
             state='FAILURE',
             meta={'error': str(e)}
         )
         raise
 
+@celery.task(bind=True)
+def generate_custom_report_task(self, project_id, user_id, sections, filters=None, result_stem=None):
+    """Generate a report from independently rendered sections"""
+    temp_path = None
+    try:
+        if result_stem:
+            filename, file_path = result_file_path('report', result_stem, 'pdf')
+        else:
+            filename = f"report_{project_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'reports', filename)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        
+        self.update_state(state='PROGRESS', meta={
+            'current': 10,
+            'total': 100,
+            'message': f'Rendering {len(sections)} sections'
+        })
+        
+        temp_path = temp_result_path(file_path)
+        timings = build_section_report(project_id, temp_path, sections, filters)
+        publish_result(temp_path, file_path, result_stem)
+        
+        current_app.logger.info(f"Custom report {filename} timings: {timings}")
+        
+        return {
+            'status': 'completed',
+            'filename': filename,
+            'file_path': file_path,
+            'download_url': result_download_url('report', filename),
+            'sections': sections,
+            'timings': timings
+        }
+        
+    except Exception as e:
+        _remove_temp_file(temp_path)
+        if result_stem:
+            release_job(result_stem, self.request.id)
+        self.update_state(
+            state='FAILURE',
+            meta={'error': str(e)}
+        )
+        raise
+
+@celery.task(bind=True, max_retries=3, default_retry_delay=60)
+def geocode_observation_task(self, observation_id):
+    """Back-fill an observation's location name from its coordinates"""
+    observation = Observation.query.get(observation_id)
+    if not observation or observation.location_name:
+        return {'status': 'skipped', 'observation_id': observation_id}
+    
+    location_name = reverse_geocode(observation.latitude, observation.longitude)
+    if location_name is None:
+        if self.request.retries < self.max_retries:
+            raise self.retry()
+        location_name = format_coordinates(observation.latitude, observation.longitude)
+    
+    # Do not overwrite a name that was set while the lookup was running
+    updated = Observation.query.filter(
+        Observation.id == observation.id,
+        Observation.location_name.is_(None)
+    ).update({'location_name': location_name}, synchronize_session=False)
+    db.session.commit()
+    if updated:
+        bump_project_data_version(observation.project_id)
+    
+    return {
+        'status': 'updated' if updated else 'skipped',
+        'observation_id': observation_id,
+        'location_name': location_name
+    }
+
+@celery.task
+def geocode_observations_task(observation_ids):
+    """Back-fill location names for a batch of observations"""
+    observations = Observation.query.filter(
+        Observation.id.in_(observation_ids),
+        Observation.location_name.is_(None)
+    ).all()
+    if not observations:
+        return {'status': 'skipped', 'updated': 0}
+    
+    location_names = reverse_geocode_batch(
+        [obs.latitude for obs in observations],
+        [obs.longitude for obs in observations]
+    )
+    
+    updated = 0
+    project_ids = set()
+    for obs, location_name in zip(observations, location_names):
+        # Unavailable lookups are left for a later single-row retry
+        if location_name is None:
+            geocode_observation_task.delay(str(obs.id))
+            continue
+        obs.location_name = location_name
+        project_ids.add(obs.project_id)
+        updated += 1
+    db.session.commit()
+    
+    for project_id in project_ids:
+        bump_project_data_version(project_id)
+    
+    return {'status': 'updated', 'updated': updated}
+
 @celery.task
 def send_notification_email(user_id, subject, message):
     """Send notification email to user"""
@@ -188,24 +370,14 @@ def send_notification_email(user_id, subject, message):
 
 @celery.task
 def cleanup_old_files():
-    """Clean up old temporary files"""
+    """Evict least recently used export and report files over the size budget"""
     try:
-        import time
-        from pathlib import Path
-        
-        # Clean up files older than 7 days
-        cutoff_time = time.time() - (7 * 24 * 60 * 60)
-        
-        export_dir = Path(current_app.config['UPLOAD_FOLDER']) / 'exports'
-        report_dir = Path(current_app.config['UPLOAD_FOLDER']) / 'reports'
+        removed, freed = evict_results(current_app.config['RESULT_CACHE_MAX_BYTES'])
         
-        for directory in [export_dir, report_dir]:
-            if directory.exists():
-                for file_path in directory.iterdir():
-                    if file_path.is_file() and file_path.stat().st_mtime < cutoff_time:
-                        file_path.unlink()
-        
-        return {'status': 'completed', 'message': 'Old files cleaned up'}
+        return {
+            'status': 'completed',
+            'message': f'Removed {removed} files ({freed / 1024 / 1024:.2f} MB)'
+        }
         
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
\ No newline at end of file
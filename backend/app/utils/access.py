@@ -0,0 +1,202 @@
+"""Cached authorization context of users.
+
+Authorization only needs a user's role, active flag and project
+memberships. Access tokens carry them as claims (see
+:func:`access_claims`) together with the user's token version; while the
+version matches the one in the shared cache, the claims are trusted and
+a request needs no authorization queries at all. Otherwise the context
+is loaded in one query and kept in the shared cache for
+``ACCESS_CACHE_TIMEOUT`` seconds. Either way it is kept on ``flask.g``
+for the rest of the request. Membership and role changes must call
+:func:`invalidate_user_access` before committing; it bumps the token
+version in the same transaction, so claims in tokens issued earlier are
+ignored, and once the transaction commits writes the new version to the
+cache and drops the cached context. Cached versions also expire after
+``ACCESS_CACHE_TIMEOUT`` seconds, which bounds how long a process whose
+cache missed the write (e.g. another worker's ``SimpleCache``) trusts
+old claims.
+"""
+import uuid
+from collections import namedtuple
+
+from flask import current_app, g, has_app_context, has_request_context
+from flask_jwt_extended import get_jwt
+from sqlalchemy import event, select, update
+
+from .. import cache
+from ..models import db, User, project_users
+
+_PENDING_KEY = 'invalidated_token_versions'
+
+class UserAccess(namedtuple('UserAccess', ['user_id', 'role', 'is_active', 'project_ids'])):
+    """Role, active flag and member project IDs (strings) of a user."""
+    __slots__ = ()
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+
+    def has_role(self, *roles):
+        return self.role in roles
+
+    def is_member(self, project_id):
+        """Check project membership; malformed project IDs are never members."""
+        try:
+            return str(uuid.UUID(str(project_id))) in self.project_ids
+        except ValueError:
+            return False
+
+    def can_access_project(self, project_id):
+        """Check membership, or admin access to any project."""
+        return self.is_admin or self.is_member(project_id)
+
+def _access_key(user_id):
+    return f"user_access:{user_id}"
+
+def _token_version_key(user_id):
+    return f"token_version:{user_id}"
+
+def _normalize_user_id(user_id):
+    try:
+        return str(uuid.UUID(str(user_id)))
+    except ValueError:
+        return None
+
+def load_user_access(user_id):
+    """Load a user's access context from the database, or None."""
+    statement = select(User.role, User.is_active, project_users.c.project_id).outerjoin(
+        project_users, project_users.c.user_id == User.id
+    ).where(User.id == uuid.UUID(user_id))
+
+    rows = db.session.execute(statement).all()
+    if not rows:
+        return None
+
+    project_ids = frozenset(str(row.project_id) for row in rows if row.project_id is not None)
+    return UserAccess(user_id, rows[0].role, rows[0].is_active, project_ids)
+
+def _cache_timeout():
+    return current_app.config.get('ACCESS_CACHE_TIMEOUT', 60)
+
+def get_token_version(user_id):
+    """Get a user's current token version through the shared cache."""
+    key = _token_version_key(user_id)
+    version = cache.get(key)
+
+    if version is None:
+        version = db.session.execute(
+            select(User.token_version).where(User.id == uuid.UUID(user_id))
+        ).scalar()
+        if version is None:
+            return None
+        # add, not set: a version written by a concurrent invalidation wins
+        # over one this request read before that invalidation committed
+        cache.add(key, version, timeout=_cache_timeout())
+
+    return version
+
+def access_claims(user):
+    """Get the access token claims of a user.
+
+    Member project IDs are left out past ``TOKEN_PROJECT_CLAIMS_MAX`` to
+    keep tokens small; such tokens fall back to the cached lookup.
+    """
+    access = load_user_access(str(user.id))
+    claims = {'role': access.role, 'active': access.is_active, 'tv': user.token_version or 0}
+
+    if len(access.project_ids) <= current_app.config.get('TOKEN_PROJECT_CLAIMS_MAX', 50):
+        claims['projects'] = sorted(access.project_ids)
+
+    return claims
+
+def _claims_access(user_id):
+    # Claims of the verified token, unless stale or issued for another user
+    if not has_request_context():
+        return None
+
+    try:
+        claims = get_jwt()
+    except RuntimeError:
+        return None
+
+    if claims.get('sub') != user_id or 'tv' not in claims or 'projects' not in claims:
+        return None
+    if claims['tv'] != get_token_version(user_id):
+        return None
+
+    return UserAccess(user_id, claims['role'], claims['active'], frozenset(claims['projects']))
+
+def get_user_access(user_id):
+    """Get a user's access context from token claims, the cache or the database."""
+    user_id = _normalize_user_id(user_id)
+    if user_id is None:
+        return None
+
+    registry = g.setdefault('user_access', {})
+    if user_id in registry:
+        return registry[user_id]
+
+    access = _claims_access(user_id)
+    if access is None:
+        cached = cache.get(_access_key(user_id))
+        if cached is not None:
+            role, is_active, project_ids = cached
+            access = UserAccess(user_id, role, is_active, frozenset(project_ids))
+        else:
+            access = load_user_access(user_id)
+            # Unknown users are not cached so accounts created later are found
+            if access is not None:
+                cache.set(
+                    _access_key(user_id),
+                    (access.role, access.is_active, sorted(access.project_ids)),
+                    timeout=_cache_timeout()
+                )
+
+    if access is not None:
+        registry[user_id] = access
+    return access
+
+def invalidate_user_access(*user_ids):
+    """Invalidate the access context and token claims of users.
+
+    Call when their role, active flag or memberships change, before the
+    change is committed: this bumps their token version in the caller's
+    transaction, and the cache is updated once it commits.
+    """
+    user_ids = [_normalize_user_id(user_id) for user_id in user_ids]
+    user_ids = [user_id for user_id in user_ids if user_id is not None]
+    if not user_ids:
+        return
+
+    ids = [uuid.UUID(user_id) for user_id in user_ids]
+    db.session.execute(
+        update(User).where(User.id.in_(ids)).values(token_version=User.token_version + 1)
+    )
+    versions = db.session.execute(select(User.id, User.token_version).where(User.id.in_(ids))).all()
+
+    pending = db.session.info.setdefault(_PENDING_KEY, {})
+    pending.update((str(row.id), row.token_version) for row in versions)
+
+    registry = g.get('user_access', {}) if has_app_context() else {}
+    for user_id in user_ids:
+        registry.pop(user_id, None)
+
+@event.listens_for(db.session, 'after_commit')
+def _publish_token_versions(session):
+    versions = session.info.pop(_PENDING_KEY, None)
+    if not versions:
+        return
+
+    # Not delete_many: it stops at the first key that is not cached
+    for user_id, version in versions.items():
+        cache.set(_token_version_key(user_id), version, timeout=_cache_timeout())
+        cache.delete(_access_key(user_id))
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_token_versions(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+def is_project_member(user_id, project_id):
+    """Check whether a user is a member of a project."""
+    access = get_user_access(user_id)
+    return access is not None and access.is_member(project_id)
@@ -0,0 +1,169 @@
+"""SQL aggregation helpers for observation statistics.
+
+All functions push the counting down into the database and only return
+small grouped result sets, so memory stays bounded by the number of
+species / time buckets rather than the number of observations.
+
+Per-species and temporal aggregates are read from the
+``observation_rollups`` table when the requested date range covers
+whole days, which makes them O(species x days) instead of
+O(observations).
+"""
+from datetime import time
+
+from flask import current_app
+from sqlalchemy import func
+
+from ..models import db, Observation, ObservationRollup
+
+# Interval name -> (date_trunc unit, label format)
+TIME_INTERVALS = {
+    'daily': ('day', '%Y-%m-%d'),
+    'weekly': ('week', '%Y-%m-%d'),
+    'monthly': ('month', '%Y-%m'),
+    'yearly': ('year', '%Y'),
+}
+
+def apply_observation_filters(query, project_id, start_date=None, end_date=None, species_id=None):
+    """Restrict an observation query to a project and optional date/species filters."""
+    query = query.filter(Observation.project_id == project_id)
+
+    if start_date:
+        query = query.filter(Observation.observation_date >= start_date)
+
+    if end_date:
+        query = query.filter(Observation.observation_date <= end_date)
+
+    if species_id:
+        query = query.filter(Observation.species_id == species_id)
+
+    return query
+
+def rollup_day_range(start_date=None, end_date=None):
+    """Translate datetime bounds into inclusive rollup day bounds.
+
+    Returns ``(start_day, end_day)``, or None when rollups cannot answer
+    the query because they are disabled or a bound falls inside a day.
+    """
+    if not current_app.config.get('USE_OBSERVATION_ROLLUPS', False):
+        return None
+
+    start_day = end_day = None
+
+    if start_date:
+        if start_date.time() != time.min:
+            return None
+        start_day = start_date.date()
+
+    if end_date:
+        if end_date.time() != time.max:
+            return None
+        end_day = end_date.date()
+
+    return start_day, end_day
+
+def apply_rollup_filters(query, project_id, start_day=None, end_day=None, species_id=None):
+    """Restrict a rollup query to a project and optional day/species filters."""
+    query = query.filter(ObservationRollup.project_id == project_id)
+
+    if start_day:
+        query = query.filter(ObservationRollup.day >= start_day)
+
+    if end_day:
+        query = query.filter(ObservationRollup.day <= end_day)
+
+    if species_id:
+        query = query.filter(ObservationRollup.species_id == species_id)
+
+    return query
+
+def species_abundance(project_id, start_date=None, end_date=None, species_id=None):
+    """Get per-species abundance rows: (species_id, individuals, observations)."""
+    day_range = rollup_day_range(start_date, end_date)
+    if day_range is not None:
+        query = db.session.query(
+            ObservationRollup.species_id,
+            func.coalesce(func.sum(ObservationRollup.individual_count), 0).label('individuals'),
+            func.coalesce(func.sum(ObservationRollup.observation_count), 0).label('observations')
+        )
+        query = apply_rollup_filters(query, project_id, *day_range, species_id=species_id)
+        return query.group_by(ObservationRollup.species_id).all()
+
+    query = db.session.query(
+        Observation.species_id,
+        func.coalesce(func.sum(Observation.count), 0).label('individuals'),
+        func.count(Observation.id).label('observations')
+    )
+    query = apply_observation_filters(query, project_id, start_date, end_date, species_id)
+
+    return query.group_by(Observation.species_id).all()
+
+def abundance_totals(rows):
+    """Reduce species abundance rows to (observations, richness, individuals)."""
+    total_observations = sum(row.observations for row in rows)
+    total_individuals = sum(row.individuals for row in rows)
+    return total_observations, len(rows), total_individuals
+
+def temporal_counts(project_id, interval='monthly', metric_type='count',
+                    start_date=None, end_date=None, species_id=None):
+    """Get {period_label: value} for observations bucketed by time interval.
+
+    ``metric_type`` is either ``count`` (number of observations) or
+    ``abundance`` (sum of individuals).
+    """
+    unit, label_format = TIME_INTERVALS.get(interval, TIME_INTERVALS['monthly'])
+    day_range = rollup_day_range(start_date, end_date)
+
+    if day_range is not None:
+        period = func.date_trunc(unit, ObservationRollup.day, type_=db.DateTime).label('period')
+        if metric_type == 'abundance':
+            value = func.coalesce(func.sum(ObservationRollup.individual_count), 0)
+        else:
+            value = func.coalesce(func.sum(ObservationRollup.observation_count), 0)
+
+        query = db.session.query(period, value.label('value'))
+        query = apply_rollup_filters(query, project_id, *day_range, species_id=species_id)
+    else:
+        period = func.date_trunc(unit, Observation.observation_date, type_=db.DateTime).label('period')
+        if metric_type == 'abundance':
+            value = func.coalesce(func.sum(Observation.count), 0)
+        else:
+            value = func.count(Observation.id)
+
+        query = db.session.query(period, value.label('value'))
+        query = apply_observation_filters(query, project_id, start_date, end_date, species_id)
+
+    rows = query.group_by(period).order_by(period).all()
+
+    return {row.period.strftime(label_format): row.value for row in rows}
+
+def spatial_grid_counts(project_id, grid_size, species_id=None):
+    """Bin observations into a regular lat/lon grid with a single GROUP BY.
+
+    Each point is assigned to cell ``floor((lat - min_lat) / grid_size)``,
+    ``floor((lon - min_lon) / grid_size)``, so the cost is linear in the
+    number of observations and only non-empty cells are returned.
+
+    Returns ``(min_lat, min_lon, rows)`` where rows are
+    ``(row, col, density)``; ``min_lat``/``min_lon`` are None when there
+    are no observations.
+    """
+    bounds_query = db.session.query(
+        func.min(Observation.latitude),
+        func.min(Observation.longitude)
+    )
+    min_lat, min_lon = apply_observation_filters(
+        bounds_query, project_id, species_id=species_id
+    ).one()
+
+    if min_lat is None or min_lon is None:
+        return None, None, []
+
+    row = func.floor((Observation.latitude - min_lat) / grid_size).label('row')
+    col = func.floor((Observation.longitude - min_lon) / grid_size).label('col')
+
+    query = db.session.query(row, col, func.count(Observation.id).label('density'))
+    query = apply_observation_filters(query, project_id, species_id=species_id)
+    rows = query.group_by(row, col).order_by(row, col).all()
+
+    return min_lat, min_lon, rows
@@ -1,15 +1,14 @@
 from functools import wraps
 from flask import jsonify
 from flask_jwt_extended import get_jwt_identity
-from ..models import User, Project, project_users
+from .access import get_user_access
 
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        access = get_user_access(get_jwt_identity())
         
-        if not user or user.role != 'admin':
+        if not access or not access.is_admin:
             return jsonify({'error': 'Admin access required'}), 403
         
         return f(*args, **kwargs)
@@ -18,10 +17,9 @@ def admin_required(f):
 def researcher_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        access = get_user_access(get_jwt_identity())
         
-        if not user or user.role not in ['admin', 'researcher']:
+        if not access or not access.has_role('admin', 'researcher'):
             return jsonify({'error': 'Researcher access required'}), 403
         
         return f(*args, **kwargs)
@@ -30,23 +28,14 @@ def researcher_required(f):
 def project_member_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        project_id = kwargs.get('project_id') or args[0] if args else None
+        project_id = kwargs.get('project_id') or (args[0] if args else None)
         
         if not project_id:
             return jsonify({'error': 'Project ID required'}), 400
         
-        user = User.query.get(current_user_id)
-        if user.role == 'admin':
-            return f(*args, **kwargs)
-        
-        # Check if user is project member
-        project = Project.query.join(project_users).filter(
-            Project.id == project_id,
-            project_users.c.user_id == current_user_id
-        ).first()
-        
-        if not project:
+        # Admins and project members, from the cached access context
+        access = get_user_access(get_jwt_identity())
+        if not access or not access.can_access_project(project_id):
             return jsonify({'error': 'Project access required'}), 403
         
         return f(*args, **kwargs)
@@ -0,0 +1,201 @@
+"""Batched observation ingestion for the bulk endpoint.
+
+A batch is validated as a whole, project access and species existence
+are resolved with one ``IN`` query each, and valid rows are written in a
+single transaction: with ``COPY`` on PostgreSQL, otherwise with chunked
+batched inserts. Rows that fail are reported by their index in the
+submitted batch.
+"""
+import io
+import json
+import uuid
+from datetime import datetime, timezone
+
+from marshmallow import ValidationError
+
+from ..models import db, Observation, Project, Species, project_users
+from ..schemas import ObservationSchema
+from .rollups import new_rollup_deltas, add_rollup_delta, apply_rollup_deltas, rollup_key
+
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/jsonl', 'application/json-seq')
+
+# Columns filled from the payload; every insert row carries all of them
+OBSERVATION_FIELDS = (
+    'observation_date', 'latitude', 'longitude', 'location_name', 'count',
+    'behavior', 'habitat_description', 'weather_conditions', 'notes',
+    'image_urls', 'audio_urls', 'accuracy', 'altitude'
+)
+
+bulk_observation_schema = ObservationSchema(many=True)
+
+def parse_bulk_payload(request):
+    """Read a JSON array or NDJSON body into (rows, errors).
+
+    ``errors`` maps line indexes to messages for NDJSON lines that are not
+    valid JSON. Raises ValueError when the body has the wrong shape.
+    """
+    if request.mimetype in NDJSON_MIMETYPES:
+        rows, errors = [], {}
+        lines = request.get_data(as_text=True).splitlines()
+        for index, line in enumerate(line for line in lines if line.strip()):
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                rows.append(None)
+                errors[index] = {'_schema': ['Invalid JSON.']}
+        return rows, errors
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('observations')
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON array of observations')
+
+    return data, {}
+
+def _as_uuid(value, parsed=None):
+    # ``parsed`` memoizes IDs that repeat across a batch
+    if parsed is not None and value in parsed:
+        return parsed[value]
+
+    try:
+        result = uuid.UUID(str(value))
+    except ValueError:
+        result = None
+
+    if parsed is not None:
+        parsed[value] = result
+    return result
+
+def _copy_value(value):
+    # A field in COPY's text format
+    if value is None:
+        return '\\N'
+    if isinstance(value, (list, dict)):
+        value = json.dumps(value)
+    elif isinstance(value, datetime):
+        # Naive UTC, as aware datetimes are stored by a UTC session
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        value = value.isoformat()
+    value = str(value)
+    if any(char in value for char in '\\\t\n\r'):
+        value = value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return value
+
+def copy_observations(connection, rows):
+    """Write observation rows with PostgreSQL ``COPY ... FROM STDIN``.
+
+    Returns False, writing nothing, when the connection does not support it.
+    """
+    if connection.dialect.name != 'postgresql':
+        return False
+
+    cursor = connection.connection.cursor()
+    if not hasattr(cursor, 'copy_expert'):
+        cursor.close()
+        return False
+
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(row[column]) for column in columns))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    try:
+        cursor.copy_expert(
+            f"COPY {Observation.__tablename__} ({', '.join(columns)}) FROM STDIN", buffer
+        )
+    finally:
+        cursor.close()
+    return True
+
+def _accessible_project_ids(user, project_ids):
+    """Get the subset of project ids the user may add observations to."""
+    query = db.session.query(Project.id).filter(Project.id.in_(project_ids))
+    if user.role != 'admin':
+        query = query.join(project_users).filter(project_users.c.user_id == user.id)
+    return {row.id for row in query}
+
+def ingest_observations(rows, user, errors=None, chunk_size=500):
+    """Validate and insert a batch of observation payloads for ``user``.
+
+    Returns ``(created, errors)`` where ``created`` is a list of inserted
+    observation rows (dicts) and ``errors`` maps row indexes to messages.
+    The caller commits.
+    """
+    errors = dict(errors or {})
+
+    candidates = [(index, row) for index, row in enumerate(rows) if index not in errors]
+    payloads = [row if isinstance(row, dict) else {} for _, row in candidates]
+
+    try:
+        loaded = bulk_observation_schema.load(payloads)
+    except ValidationError as err:
+        for position, messages in err.messages.items():
+            errors[candidates[position][0]] = messages
+        loaded = err.valid_data
+
+    valid = []
+    parsed_ids = {}
+    for (index, _), data in zip(candidates, loaded):
+        if index in errors:
+            continue
+        project_id = _as_uuid(data['project_id'], parsed_ids)
+        species_id = _as_uuid(data['species_id'], parsed_ids)
+        if project_id is None or species_id is None:
+            errors[index] = {'_schema': ['Invalid project or species ID.']}
+            continue
+        valid.append((index, project_id, species_id, data))
+
+    if not valid:
+        return [], errors
+
+    # Resolve access and species once for the whole batch
+    allowed_projects = _accessible_project_ids(user, {row[1] for row in valid})
+    known_species = {
+        row.id for row in db.session.query(Species.id).filter(
+            Species.id.in_({row[2] for row in valid})
+        )
+    }
+
+    now = datetime.utcnow()
+    created = []
+    for index, project_id, species_id, data in valid:
+        if project_id not in allowed_projects:
+            errors[index] = {'project_id': ['Project not found or access denied.']}
+            continue
+        if species_id not in known_species:
+            errors[index] = {'species_id': ['Species not found.']}
+            continue
+
+        values = {field: data.get(field) for field in OBSERVATION_FIELDS}
+        values.update({
+            'id': uuid.uuid4(),
+            'project_id': project_id,
+            'species_id': species_id,
+            'observer_id': user.id,
+            'count': data.get('count', 1),
+            'image_urls': data.get('image_urls', []),
+            'audio_urls': data.get('audio_urls', []),
+            'created_at': now,
+            'updated_at': now
+        })
+        created.append(values)
+
+    connection = db.session.connection()
+    if created and not copy_observations(connection, created):
+        # executemany of one cached INSERT
+        insert = Observation.__table__.insert()
+        for start in range(0, len(created), chunk_size):
+            db.session.execute(insert, created[start:start + chunk_size])
+
+    # Core inserts bypass the session flush hooks that maintain rollups
+    deltas = new_rollup_deltas()
+    for values in created:
+        key = rollup_key(values['project_id'], values['species_id'], values['observation_date'])
+        add_rollup_delta(deltas, key, 1, values['count'])
+    apply_rollup_deltas(connection, deltas)
+
+    return created, errors
@@ -0,0 +1,131 @@
+"""Versioned caching of data derived from a project's observations.
+
+Cached entries are keyed by a per-project data version that observation
+writes bump with :func:`bump_project_data_version`, so invalidating a
+project is a single cache write and an entry is never served after the
+data it was computed from changed: it is simply never looked up again
+and ages out. Species and observer names appear in the cached data too;
+changing them bumps the reference data version shared by all projects.
+"""
+import hashlib
+import json
+import time
+import uuid
+from functools import wraps
+
+from flask import current_app
+
+from .. import cache
+
+REFERENCE_VERSION_KEY = 'reference_data_version'
+
+# Names of the functions cached with cached_project_data, for statistics
+CACHED_PROJECT_DATA = []
+
+def _project_version_key(project_id):
+    return f"project_data_version:{project_id}"
+
+def _get_version(key):
+    version = cache.get(key)
+
+    if version is None:
+        version = time.time_ns()
+        cache.set(key, version, timeout=0)
+
+    return version
+
+def get_project_data_version(project_id):
+    """Get the current data version for a project's observations.
+
+    Versions are timestamps rather than counters so that a version key
+    evicted from the cache is never re-issued with an old value.
+    """
+    return _get_version(_project_version_key(project_id))
+
+def bump_project_data_version(project_id):
+    """Invalidate all cached data derived from a project's observations."""
+    cache.set(_project_version_key(project_id), time.time_ns(), timeout=0)
+
+def get_reference_data_version():
+    """Get the current version of the species and observer names."""
+    return _get_version(REFERENCE_VERSION_KEY)
+
+def bump_reference_data_version():
+    """Invalidate cached project data after species or observer names change."""
+    cache.set(REFERENCE_VERSION_KEY, time.time_ns(), timeout=0)
+
+def project_cache_key(name, project_id, params):
+    """Build the cache key of ``name`` for a project and its parameters.
+
+    Parameters are normalized (None dropped, keys sorted, values as
+    strings) so equivalent requests share an entry.
+    """
+    project_id = str(uuid.UUID(str(project_id)))
+    normalized = json.dumps(
+        {key: str(value) for key, value in params.items() if value is not None},
+        sort_keys=True, separators=(',', ':')
+    )
+    digest = hashlib.sha1(normalized.encode()).hexdigest()
+    versions = f"{get_project_data_version(project_id)}.{get_reference_data_version()}"
+    return f"project_data:{name}:{project_id}:{versions}:{digest}"
+
+def _stats_key(name, outcome):
+    return f"cache_stats:{name}:{outcome}"
+
+def _count(name, outcome):
+    # Shared by all processes using the cache backend; atomic on Redis,
+    # but a get then a set on SimpleCache, so concurrent hits may be lost
+    cache.cache.inc(_stats_key(name, outcome))
+
+def cached_project_data(name, timeout=None):
+    """Cache a function of ``(project_id, **params)`` per project data version.
+
+    The result must be picklable and not None. Access checks
+    belong in the caller: the cache is shared by all users of a project.
+    ``timeout`` defaults to ``PROJECT_DATA_CACHE_TIMEOUT``.
+    """
+    if name not in CACHED_PROJECT_DATA:
+        CACHED_PROJECT_DATA.append(name)
+
+    def decorator(f):
+        @wraps(f)
+        def wrapper(project_id, **params):
+            key = project_cache_key(name, project_id, params)
+            value = cache.get(key)
+            if value is not None:
+                _count(name, 'hits')
+                return value
+
+            _count(name, 'misses')
+            value = f(project_id, **params)
+            cache.set(
+                key, value,
+                timeout=timeout if timeout is not None else current_app.config.get('PROJECT_DATA_CACHE_TIMEOUT', 3600)
+            )
+            return value
+
+        wrapper.uncached = f
+        return wrapper
+    return decorator
+
+def project_data_cache_stats():
+    """Get hit and miss counts of the project data caches by name."""
+    keys = [_stats_key(name, outcome) for name in CACHED_PROJECT_DATA for outcome in ('hits', 'misses')]
+    counts = dict(zip(keys, cache.get_many(*keys))) if keys else {}
+
+    stats = {}
+    for name in CACHED_PROJECT_DATA:
+        hits = int(counts.get(_stats_key(name, 'hits')) or 0)
+        misses = int(counts.get(_stats_key(name, 'misses')) or 0)
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else None
+        }
+    return stats
+
+def reset_project_data_cache_stats():
+    """Zero the hit and miss counts of the project data caches."""
+    for name in CACHED_PROJECT_DATA:
+        for outcome in ('hits', 'misses'):
+            cache.delete(_stats_key(name, outcome))
@@ -0,0 +1,161 @@
+"""Chart rendering with a file cache and a process pool.
+
+Charts are drawn with matplotlib's object-oriented ``Figure`` API on an
+Agg canvas, so rendering never touches pyplot's global state and is safe
+to run concurrently. Renders run in a small process pool (or inline
+where child processes are not allowed, e.g. inside a Celery prefork
+worker) and the PNG/SVG output is cached on disk under a hash of the
+chart kind, series and options, so the PDF reports and the dashboard
+share one rendered file per distinct chart.
+"""
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+
+from .lazy import lazy_import
+from .result_cache import result_folder, temp_result_path, touch_result
+
+matplotlib_figure = lazy_import('matplotlib.figure')
+backend_agg = lazy_import('matplotlib.backends.backend_agg')
+
+CHART_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def chart_key(kind, labels, values, fmt='png', **options):
+    """Get the cache key (a hex digest) of a chart."""
+    payload = json.dumps(
+        [kind, list(labels), list(values), fmt, options],
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def draw_chart(kind, labels, values, fmt='png', dpi=100, width=6.0, height=3.6,
+               title=None, xlabel=None, ylabel=None, color='skyblue', sizes=None):
+    """Render a chart and return the encoded image bytes.
+
+    ``bar`` and ``line`` charts plot ``values`` against category
+    ``labels``; ``scatter`` charts plot ``values`` (y) against numeric
+    ``labels`` (x) with optional marker ``sizes``.
+    """
+    figure = matplotlib_figure.Figure(figsize=(width, height), dpi=dpi)
+    backend_agg.FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+
+    positions = range(len(labels))
+    if kind == 'bar':
+        axes.bar(positions, values, color=color)
+    elif kind == 'line':
+        axes.plot(positions, values, color=color, marker='o')
+    elif kind == 'scatter':
+        axes.scatter(labels, values, s=sizes, color=color, alpha=0.6, edgecolors='grey')
+    else:
+        raise ValueError(f"Unsupported chart kind: {kind}")
+
+    if kind != 'scatter':
+        axes.set_xticks(list(positions))
+        axes.set_xticklabels(labels, rotation=45, ha='right')
+    if title:
+        axes.set_title(title)
+    if xlabel:
+        axes.set_xlabel(xlabel)
+    if ylabel:
+        axes.set_ylabel(ylabel)
+    figure.tight_layout()
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format=fmt, dpi=dpi, bbox_inches='tight')
+    return buffer.getvalue()
+
+def _can_start_workers():
+    # Daemonic processes (Celery prefork workers) may not have children
+    return not multiprocessing.current_process().daemon
+
+def get_chart_pool():
+    """Get the process-wide chart rendering pool, or None to render inline."""
+    global _pool
+    workers = current_app.config.get('CHART_RENDER_WORKERS', 0)
+    if workers <= 0 or not _can_start_workers():
+        return None
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Spawned workers do not inherit the app's threads or connections
+                _pool = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+                )
+    return _pool
+
+def _reset_chart_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+
+def chart_path(key, fmt):
+    """Get the cache file path of a chart."""
+    return os.path.join(result_folder('chart'), f"chart_{key}.{fmt}")
+
+def _store(file_path, content):
+    temp_path = temp_result_path(file_path)
+    with open(temp_path, 'wb') as f:
+        f.write(content)
+    os.replace(temp_path, file_path)
+
+def render_charts(charts):
+    """Render several charts concurrently, reusing cached files.
+
+    ``charts`` is a list of dicts with ``kind``, ``labels``, ``values``
+    and optional ``fmt`` and drawing options. Returns the cache file path
+    of each chart, in order.
+    """
+    dpi = current_app.config.get('CHART_DPI', 100)
+    pool = get_chart_pool()
+
+    paths = []
+    pending = []
+    for chart in charts:
+        options = {name: value for name, value in chart.items() if name not in ('kind', 'labels', 'values', 'fmt')}
+        options.setdefault('dpi', dpi)
+        fmt = chart.get('fmt', 'png')
+        if fmt not in CHART_FORMATS:
+            raise ValueError(f"Unsupported chart format: {fmt}")
+
+        args = (chart['kind'], list(chart['labels']), list(chart['values']), fmt)
+        file_path = chart_path(chart_key(*args, **options), fmt)
+        paths.append(file_path)
+
+        if touch_result(file_path):
+            continue
+
+        if pool is None:
+            _store(file_path, draw_chart(*args, **options))
+        else:
+            pending.append((file_path, args, options, pool.submit(draw_chart, *args, **options)))
+
+    for file_path, args, options, future in pending:
+        try:
+            content = future.result()
+        except BrokenProcessPool:
+            _reset_chart_pool()
+            content = draw_chart(*args, **options)
+        _store(file_path, content)
+
+    return paths
+
+def render_chart(kind, labels, values, fmt='png', **options):
+    """Render one chart (or reuse its cached file) and return its path."""
+    return render_charts([dict(options, kind=kind, labels=labels, values=values, fmt=fmt)])[0]
@@ -1,7 +1,8 @@
 from functools import wraps
-from flask import jsonify, current_app
+from flask import jsonify, current_app, request
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
-from ..models import User
+from .access import get_user_access
+from .rate_limit import consume, rate_limit_exceeded
 
 def admin_required(f):
     """Decorator to require admin role"""
@@ -9,10 +10,9 @@ def admin_required(f):
     def decorated_function(*args, **kwargs):
         try:
             verify_jwt_in_request()
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
+            access = get_user_access(get_jwt_identity())
             
-            if not user or user.role != 'admin':
+            if not access or not access.is_admin:
                 return jsonify({'error': 'Admin access required'}), 403
                 
             return f(*args, **kwargs)
@@ -29,10 +29,9 @@ def role_required(allowed_roles):
         def decorated_function(*args, **kwargs):
             try:
                 verify_jwt_in_request()
-                current_user_id = get_jwt_identity()
-                user = User.query.get(current_user_id)
+                access = get_user_access(get_jwt_identity())
                 
-                if not user or user.role not in allowed_roles:
+                if not access or not access.has_role(*allowed_roles):
                     return jsonify({
                         'error': f'Access denied. Required roles: {", ".join(allowed_roles)}'
                     }), 403
@@ -51,14 +50,13 @@ def project_member_required(f):
     def decorated_function(*args, **kwargs):
         try:
             verify_jwt_in_request()
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
+            access = get_user_access(get_jwt_identity())
             
-            if not user:
+            if not access:
                 return jsonify({'error': 'User not found'}), 404
             
             # Admin can access all projects
-            if user.role == 'admin':
+            if access.is_admin:
                 return f(*args, **kwargs)
             
             # Get project_id from URL parameters
@@ -66,13 +64,8 @@ def project_member_required(f):
             if not project_id:
                 return jsonify({'error': 'Project ID required'}), 400
             
-            from ..models import Project
-            project = Project.query.get(project_id)
-            if not project:
-                return jsonify({'error': 'Project not found'}), 404
-            
-            # Check if user is project creator or member
-            if project.created_by_id == current_user_id or user in project.members:
+            # Project creators are always members
+            if access.is_member(project_id):
                 return f(*args, **kwargs)
             else:
                 return jsonify({'error': 'Project access required'}), 403
@@ -89,10 +82,9 @@ def active_user_required(f):
     def decorated_function(*args, **kwargs):
         try:
             verify_jwt_in_request()
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
+            access = get_user_access(get_jwt_identity())
             
-            if not user or not user.is_active:
+            if not access or not access.is_active:
                 return jsonify({'error': 'Account is inactive'}), 403
                 
             return f(*args, **kwargs)
@@ -102,24 +94,32 @@ def active_user_required(f):
     
     return decorated_function
 
-def rate_limit(max_requests=100, per_seconds=3600):
-    """Simple rate limiting decorator"""
+def rate_limit(max_requests=100, per_seconds=3600, cost=1, scope=None, identity=None):
+    """Decorator to limit requests per client to an endpoint.
+
+    ``cost`` (a number, or a callable evaluated per request) is what a
+    request draws from the client's shared API budget. ``max_requests``
+    per ``per_seconds`` is an extra budget for this endpoint alone (or for
+    all endpoints sharing ``scope``); None skips it. ``identity`` is a
+    callable returning the owner of that budget per request, by default
+    the JWT user or remote address.
+    """
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # This is a simple implementation
-            # In production, you'd want to use Redis or similar
-            try:
-                verify_jwt_in_request()
-                current_user_id = get_jwt_identity()
-                
-                # For now, just log the request
-                current_app.logger.info(f"Rate limit check for user {current_user_id}")
-                
+            if max_requests is None:
                 return f(*args, **kwargs)
-            except Exception as e:
-                current_app.logger.error(f"Rate limit error: {str(e)}")
-                return jsonify({'error': 'Rate limit exceeded'}), 429
+            
+            result = consume(
+                scope or request.endpoint, max_requests, per_seconds,
+                identity=identity() if identity else None
+            )
+            if result is not None and not result.allowed:
+                return rate_limit_exceeded(result)
+            
+            return f(*args, **kwargs)
         
+        # Read by the shared budget check before the view runs
+        decorated_function.rate_limit_cost = cost
         return decorated_function
-    return decorator 
\ No newline at end of file
+    return decorator
@@ -0,0 +1,238 @@
+"""Vectorized species diversity statistics.
+
+Every estimator takes species abundances either as a 1D array (one
+community) or as a 2D sites x species array (one community per row, e.g.
+projects or sub-sites) and returns a float or one value per site
+respectively, so many communities are summarized in a single call
+without Python loops. Zero abundances are absent species. Richness
+estimators (Chao1, ACE, Fisher's alpha) expect integer counts of
+individuals.
+"""
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# Species with at most this many individuals count as rare in ACE
+ACE_RARE_THRESHOLD = 10
+
+# Bisection steps of the Fisher's alpha solver (on log alpha)
+FISHER_ALPHA_ITERATIONS = 100
+
+def _abundance_matrix(counts):
+    # Returns the counts as a float (sites, species) array and whether the
+    # input was a single community
+    array = np.asarray(counts, dtype=np.float64)
+
+    if array.ndim == 1:
+        array = array[np.newaxis, :]
+        single = True
+    elif array.ndim == 2:
+        single = False
+    else:
+        raise ValueError('Abundances must be a 1D array or a 2D sites x species array')
+
+    if not np.isfinite(array).all() or (array < 0).any():
+        raise ValueError('Abundances must be finite and non-negative')
+
+    return array, single
+
+def _result(values, single):
+    return float(values[0]) if single else values
+
+def _proportions(array):
+    totals = array.sum(axis=1, keepdims=True)
+    return np.divide(array, totals, out=np.zeros_like(array), where=totals > 0)
+
+def _shannon(array):
+    p = _proportions(array)
+    log_p = np.log(p, out=np.zeros_like(p), where=p > 0)
+    # Adding 0.0 turns the -0.0 of empty communities into 0.0
+    return -(p * log_p).sum(axis=1) + 0.0
+
+def _sum_squared_proportions(array):
+    return (_proportions(array) ** 2).sum(axis=1)
+
+def richness(counts):
+    """Number of species present."""
+    array, single = _abundance_matrix(counts)
+    return _result((array > 0).sum(axis=1).astype(np.float64), single)
+
+def shannon(counts):
+    """Shannon index H = -sum(p ln p), in nats; 0 for empty communities."""
+    array, single = _abundance_matrix(counts)
+    return _result(_shannon(array), single)
+
+def simpson(counts):
+    """Gini-Simpson index 1 - sum(p^2); 0 for empty communities."""
+    array, single = _abundance_matrix(counts)
+    values = np.where(array.sum(axis=1) > 0, 1 - _sum_squared_proportions(array), 0.0)
+    return _result(values, single)
+
+def inverse_simpson(counts):
+    """Inverse Simpson index 1 / sum(p^2); 0 for empty communities."""
+    array, single = _abundance_matrix(counts)
+    dominance = _sum_squared_proportions(array)
+    values = np.divide(1.0, dominance, out=np.zeros_like(dominance), where=dominance > 0)
+    return _result(values, single)
+
+def pielou_evenness(counts):
+    """Pielou's evenness H / ln(S); 0 with fewer than two species."""
+    array, single = _abundance_matrix(counts)
+    max_shannon = np.log(np.maximum((array > 0).sum(axis=1), 1))
+    values = np.divide(_shannon(array), max_shannon, out=np.zeros_like(max_shannon), where=max_shannon > 0)
+    return _result(values, single)
+
+def hill_numbers(counts, q):
+    """Hill numbers (effective numbers of species) of order ``q``.
+
+    ``q`` may be a scalar or a sequence of orders; for a sequence the
+    orders form the last axis of the result. q=0 is richness, q=1 the
+    exponential of Shannon and q=2 the inverse Simpson index.
+    """
+    array, single = _abundance_matrix(counts)
+    orders = np.asarray(q, dtype=np.float64)
+    q_values = np.atleast_1d(orders)
+
+    p = _proportions(array)[:, np.newaxis, :]
+    present = p > 0
+    exponents = q_values[np.newaxis, :, np.newaxis]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sums = np.where(present, p ** exponents, 0.0).sum(axis=2)
+        values = sums ** (1 / (1 - q_values))
+
+    # The q -> 1 limit
+    values[:, q_values == 1] = np.exp(_shannon(array))[:, np.newaxis]
+    values[array.sum(axis=1) == 0] = 0.0
+
+    if orders.ndim == 0:
+        values = values[:, 0]
+    return values[0] if single else values
+
+def chao1(counts):
+    """Bias-corrected Chao1 richness estimate from singletons and doubletons."""
+    array, single = _abundance_matrix(counts)
+    observed = (array > 0).sum(axis=1)
+    singletons = (array == 1).sum(axis=1)
+    doubletons = (array == 2).sum(axis=1)
+    totals = array.sum(axis=1)
+
+    correction = np.divide(totals - 1, totals, out=np.zeros_like(totals), where=totals > 0)
+    unseen = np.where(
+        doubletons > 0,
+        singletons ** 2 / (2 * np.maximum(doubletons, 1)),
+        singletons * (singletons - 1) / 2
+    )
+    return _result(observed + correction * unseen, single)
+
+def ace(counts, rare_threshold=ACE_RARE_THRESHOLD):
+    """Abundance-based coverage estimate (ACE) of richness.
+
+    Species with at most ``rare_threshold`` individuals are rare. When
+    every rare species is a singleton the sample coverage is zero and
+    ACE is undefined; Chao1 is returned for those communities instead.
+    """
+    array, single = _abundance_matrix(counts)
+    rare = (array > 0) & (array <= rare_threshold)
+
+    abundant_species = (array > rare_threshold).sum(axis=1)
+    rare_species = rare.sum(axis=1)
+    rare_individuals = np.where(rare, array, 0).sum(axis=1)
+    singletons = (array == 1).sum(axis=1)
+
+    coverage = 1 - np.divide(singletons, rare_individuals, out=np.ones_like(rare_individuals), where=rare_individuals > 0)
+    defined = coverage > 0
+    safe_coverage = np.where(defined, coverage, 1.0)
+
+    # sum over i of i(i-1)F_i is the sum of x(x-1) over rare species
+    pairs = np.where(rare, array * (array - 1), 0).sum(axis=1)
+    pair_total = rare_individuals * (rare_individuals - 1)
+    cv_squared = np.maximum(
+        rare_species / safe_coverage
+        * np.divide(pairs, pair_total, out=np.zeros_like(pairs), where=pair_total > 0) - 1,
+        0
+    )
+
+    estimate = abundant_species + rare_species / safe_coverage + singletons / safe_coverage * cv_squared
+    estimate = np.where(rare_species > 0, estimate, abundant_species)
+    fallback = chao1(array)
+    return _result(np.where(defined | (rare_species == 0), estimate, fallback), single)
+
+def fisher_alpha(counts):
+    """Fisher's log-series alpha, solving S = alpha ln(1 + N / alpha).
+
+    0 for empty communities and infinite when every individual belongs
+    to a different species.
+    """
+    array, single = _abundance_matrix(counts)
+    observed = (array > 0).sum(axis=1).astype(np.float64)
+    totals = array.sum(axis=1)
+    solvable = (observed > 0) & (observed < totals)
+
+    # S(alpha) increases monotonically from 0 to N, so bisect on log alpha
+    low = np.full_like(totals, np.log(1e-9))
+    high = np.log(np.maximum(totals, 2) ** 2 * 10)
+    n = np.where(solvable, totals, 1.0)
+    s = np.where(solvable, observed, 0.5)
+    for _ in range(FISHER_ALPHA_ITERATIONS):
+        middle = (low + high) / 2
+        alpha = np.exp(middle)
+        too_small = alpha * np.log1p(n / alpha) < s
+        low = np.where(too_small, middle, low)
+        high = np.where(too_small, high, middle)
+
+    values = np.where(solvable, np.exp((low + high) / 2), np.where(observed > 0, np.inf, 0.0))
+    return _result(values, single)
+
+def diversity_profile(counts, hill_orders=(0, 1, 2)):
+    """Compute every diversity statistic of one or many communities.
+
+    Returns a dict of statistic name to value (float for a 1D input, one
+    value per site for a 2D input); ``hill_numbers`` maps each order to
+    its Hill number.
+    """
+    array, single = _abundance_matrix(counts)
+    hill = hill_numbers(array, list(hill_orders))
+
+    profile = {
+        'species_richness': richness(array),
+        'total_individuals': array.sum(axis=1),
+        'shannon_index': shannon(array),
+        'simpson_index': simpson(array),
+        'inverse_simpson': inverse_simpson(array),
+        'evenness': pielou_evenness(array),
+        'chao1': chao1(array),
+        'ace': ace(array),
+        'fisher_alpha': fisher_alpha(array),
+    }
+    if single:
+        profile = {name: float(values[0]) for name, values in profile.items()}
+        profile['species_richness'] = int(profile['species_richness'])
+        if profile['total_individuals'].is_integer():
+            profile['total_individuals'] = int(profile['total_individuals'])
+        profile['hill_numbers'] = {order: float(value) for order, value in zip(hill_orders, hill[0])}
+    else:
+        profile['hill_numbers'] = {order: hill[:, index] for index, order in enumerate(hill_orders)}
+
+    return profile
+
+def abundance_matrix(rows):
+    """Pivot ``(site, species, count)`` rows into a sites x species matrix.
+
+    Returns ``(sites, species, matrix)`` with sites and species in sorted
+    order; repeated pairs are summed.
+    """
+    rows = list(rows)
+    sites = sorted({row[0] for row in rows}, key=str)
+    species = sorted({row[1] for row in rows}, key=str)
+    matrix = np.zeros((len(sites), len(species)), dtype=np.float64)
+
+    if rows:
+        site_index = {site: index for index, site in enumerate(sites)}
+        species_index = {name: index for index, name in enumerate(species)}
+        np.add.at(
+            matrix,
+            ([site_index[row[0]] for row in rows], [species_index[row[1]] for row in rows]),
+            [row[2] for row in rows]
+        )
+
+    return sites, species, matrix
@@ -0,0 +1,370 @@
+"""Streaming observation exports.
+
+Observations are read with a server-side cursor (``yield_per``) and only
+the exported columns; species and observer names come from small lookup
+dicts instead of joined ORM objects. Rows are written to the output file
+in fixed-size chunks, so memory does not grow with the export size.
+
+Excel exports use an openpyxl write-only workbook; Parquet and Arrow IPC
+exports need ``pyarrow``. Both are imported on first use.
+"""
+import csv
+import os
+import shutil
+import zipfile
+from datetime import datetime
+
+from flask import current_app
+
+from ..models import db, Observation, Species, User
+
+EXPORT_HEADERS = [
+    'ID', 'Species Scientific Name', 'Species Common Name',
+    'Observer', 'Date', 'Latitude', 'Longitude', 'Location',
+    'Count', 'Behavior', 'Habitat', 'Weather', 'Notes'
+]
+
+EXPORT_BATCH_SIZE = 5000
+
+# Excel sheet limit, including the header row
+XLSX_MAX_ROWS = 1048576
+
+# Rows per Parquet row group / Arrow record batch
+ARROW_BATCH_SIZE = 100000
+
+# Columnar formats -> file extension
+ARROW_FORMATS = {
+    'parquet': 'parquet',
+    'feather': 'feather',
+    'arrow': 'arrow',
+}
+
+def export_file_path(project_id, extension, folder='exports'):
+    """Get (filename, file_path) for a new export file, creating the folder."""
+    filename = f"observations_{project_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], folder, filename)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    return filename, file_path
+
+def apply_date_range(query, date_range=None):
+    """Restrict a query to a shard's ``(after, until)`` date range.
+
+    ``after`` is exclusive and ``until`` inclusive; either may be None.
+    """
+    if date_range:
+        after, until = date_range
+        if after is not None:
+            query = query.filter(Observation.observation_date > after)
+        if until is not None:
+            query = query.filter(Observation.observation_date <= until)
+    return query
+
+def count_export_rows(project_id, date_range=None):
+    """Count the observations an export of ``project_id`` will contain."""
+    query = db.session.query(db.func.count(Observation.id)).filter(
+        Observation.project_id == project_id
+    )
+    return apply_date_range(query, date_range).scalar()
+
+def export_lookups(project_id):
+    """Get {species_id: (scientific, common)} and {user_id: name} for a project."""
+    project_observations = db.session.query(Observation).filter(
+        Observation.project_id == project_id
+    )
+
+    species_ids = project_observations.with_entities(Observation.species_id).distinct()
+    species = {
+        row.id: (row.scientific_name, row.common_name)
+        for row in db.session.query(
+            Species.id, Species.scientific_name, Species.common_name
+        ).filter(Species.id.in_(species_ids.scalar_subquery()))
+    }
+
+    observer_ids = project_observations.with_entities(Observation.observer_id).distinct()
+    observers = {
+        row.id: f"{row.first_name} {row.last_name}"
+        for row in db.session.query(
+            User.id, User.first_name, User.last_name
+        ).filter(User.id.in_(observer_ids.scalar_subquery()))
+    }
+
+    return species, observers
+
+def iter_export_records(project_id, batch_size=EXPORT_BATCH_SIZE, date_range=None):
+    """Stream raw observation rows with only the exported columns."""
+    query = db.session.query(
+        Observation.id,
+        Observation.species_id,
+        Observation.observer_id,
+        Observation.observation_date,
+        Observation.latitude,
+        Observation.longitude,
+        Observation.location_name,
+        Observation.count,
+        Observation.behavior,
+        Observation.habitat_description,
+        Observation.weather_conditions,
+        Observation.notes
+    ).filter(
+        Observation.project_id == project_id
+    )
+
+    return apply_date_range(query, date_range).order_by(
+        Observation.observation_date, Observation.id
+    ).execution_options(yield_per=batch_size)
+
+def iter_export_rows(project_id, batch_size=EXPORT_BATCH_SIZE, date_range=None):
+    """Yield export rows (lists in EXPORT_HEADERS order) for a project.
+
+    Values keep their Python types (datetime, float, ...) so writers can
+    format them; blank text columns are returned as ''.
+    """
+    species, observers = export_lookups(project_id)
+
+    for row in iter_export_records(project_id, batch_size, date_range):
+        scientific_name, common_name = species.get(row.species_id, ('', ''))
+        yield [
+            str(row.id),
+            scientific_name,
+            common_name,
+            observers.get(row.observer_id, ''),
+            row.observation_date,
+            row.latitude,
+            row.longitude,
+            row.location_name or '',
+            row.count,
+            row.behavior or '',
+            row.habitat_description or '',
+            row.weather_conditions or '',
+            row.notes or ''
+        ]
+
+def iter_chunks(rows, chunk_size=EXPORT_BATCH_SIZE):
+    """Group an iterable of rows into lists of at most ``chunk_size``."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def write_csv_export(file_path, rows, progress=None, chunk_size=EXPORT_BATCH_SIZE, header=True):
+    """Write rows to a CSV file chunk by chunk and return the row count.
+
+    ``progress`` is called with the number of rows written after each chunk.
+    """
+    written = 0
+
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(EXPORT_HEADERS)
+
+        for chunk in iter_chunks(rows, chunk_size):
+            # Dates are written in ISO format, as before
+            writer.writerows(
+                [row[:4] + [row[4].isoformat()] + row[5:] for row in chunk]
+            )
+            written += len(chunk)
+            if progress:
+                progress(written)
+
+    return written
+
+def write_xlsx_export(file_path, rows, progress=None, chunk_size=EXPORT_BATCH_SIZE,
+                      max_rows_per_sheet=XLSX_MAX_ROWS):
+    """Write rows to an XLSX file with a write-only workbook.
+
+    Rows are appended as they arrive and a new sheet is started when a
+    sheet reaches ``max_rows_per_sheet`` (header included). Returns the
+    row count.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = None
+    sheet_rows = 0
+    written = 0
+
+    for chunk in iter_chunks(rows, chunk_size):
+        for row in chunk:
+            if sheet is None or sheet_rows >= max_rows_per_sheet:
+                number = len(workbook.worksheets) + 1
+                sheet = workbook.create_sheet(
+                    'Observations' if number == 1 else f'Observations ({number})'
+                )
+                sheet.append(EXPORT_HEADERS)
+                sheet_rows = 1
+            sheet.append(row)
+            sheet_rows += 1
+
+        written += len(chunk)
+        if progress:
+            progress(written)
+
+    if sheet is None:
+        workbook.create_sheet('Observations').append(EXPORT_HEADERS)
+
+    workbook.save(file_path)
+
+    return written
+
+def arrow_export_schema():
+    """Arrow schema of columnar exports; name columns are dictionary-encoded."""
+    import pyarrow as pa
+
+    names = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ('id', pa.string()),
+        ('species_scientific_name', names),
+        ('species_common_name', names),
+        ('observer', names),
+        ('observation_date', pa.timestamp('us')),
+        ('latitude', pa.float64()),
+        ('longitude', pa.float64()),
+        ('location_name', pa.string()),
+        ('count', pa.int32()),
+        ('behavior', pa.string()),
+        ('habitat_description', pa.string()),
+        ('weather_conditions', pa.string()),
+        ('notes', pa.string())
+    ])
+
+def write_arrow_export(file_path, records, species, observers, file_format='parquet',
+                       progress=None, chunk_size=ARROW_BATCH_SIZE):
+    """Write records as Parquet or Arrow IPC (Feather v2), one batch per chunk.
+
+    ``records`` are rows from :func:`iter_export_records`; ``species`` and
+    ``observers`` are the lookups from :func:`export_lookups`. The lookups
+    become the column dictionaries, so every batch shares them and each
+    name is stored once per file. Returns the row count.
+    """
+    import pyarrow as pa
+
+    schema = arrow_export_schema()
+
+    species_index = {species_id: i for i, species_id in enumerate(species)}
+    scientific_names = pa.array([names[0] for names in species.values()], pa.string())
+    common_names = pa.array([names[1] for names in species.values()], pa.string())
+    observer_index = {observer_id: i for i, observer_id in enumerate(observers)}
+    observer_names = pa.array(list(observers.values()), pa.string())
+
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(file_path, schema, compression='zstd')
+        write_batch = lambda batch: writer.write_table(pa.Table.from_batches([batch]))
+    else:
+        writer = pa.ipc.new_file(
+            file_path, schema, options=pa.ipc.IpcWriteOptions(compression='zstd')
+        )
+        write_batch = writer.write_batch
+
+    written = 0
+    try:
+        for chunk in iter_chunks(records, chunk_size):
+            species_codes = pa.array([species_index.get(r.species_id) for r in chunk], pa.int32())
+            observer_codes = pa.array([observer_index.get(r.observer_id) for r in chunk], pa.int32())
+
+            batch = pa.RecordBatch.from_arrays([
+                pa.array([str(r.id) for r in chunk], pa.string()),
+                pa.DictionaryArray.from_arrays(species_codes, scientific_names),
+                pa.DictionaryArray.from_arrays(species_codes, common_names),
+                pa.DictionaryArray.from_arrays(observer_codes, observer_names),
+                pa.array([r.observation_date for r in chunk], pa.timestamp('us')),
+                pa.array([r.latitude for r in chunk], pa.float64()),
+                pa.array([r.longitude for r in chunk], pa.float64()),
+                pa.array([r.location_name for r in chunk], pa.string()),
+                pa.array([r.count for r in chunk], pa.int32()),
+                pa.array([r.behavior for r in chunk], pa.string()),
+                pa.array([r.habitat_description for r in chunk], pa.string()),
+                pa.array([r.weather_conditions for r in chunk], pa.string()),
+                pa.array([r.notes for r in chunk], pa.string())
+            ], schema=schema)
+
+            write_batch(batch)
+            written += len(chunk)
+            if progress:
+                progress(written)
+    finally:
+        writer.close()
+
+    return written
+
+def export_extension(format_type):
+    """Get the file extension for an export format, or raise ValueError."""
+    if format_type == 'csv':
+        return 'csv'
+    if format_type == 'excel':
+        return 'xlsx'
+    if format_type in ARROW_FORMATS:
+        return ARROW_FORMATS[format_type]
+    raise ValueError(f"Unsupported export format: {format_type}")
+
+def write_export(file_path, project_id, format_type, progress=None, date_range=None, csv_header=True):
+    """Write one export file of a project (or of a date-range shard of it)."""
+    if format_type == 'csv':
+        rows = iter_export_rows(project_id, date_range=date_range)
+        return write_csv_export(file_path, rows, progress=progress, header=csv_header)
+
+    if format_type == 'excel':
+        rows = iter_export_rows(project_id, date_range=date_range)
+        return write_xlsx_export(file_path, rows, progress=progress)
+
+    if format_type in ARROW_FORMATS:
+        species, observers = export_lookups(project_id)
+        return write_arrow_export(
+            file_path, iter_export_records(project_id, date_range=date_range), species, observers,
+            file_format='parquet' if format_type == 'parquet' else 'arrow',
+            progress=progress
+        )
+
+    raise ValueError(f"Unsupported export format: {format_type}")
+
+def export_date_ranges(project_id, shards):
+    """Split a project's observations into about ``shards`` date ranges.
+
+    Boundaries are the last date of each ``ntile`` bucket, so shards hold
+    similar row counts. Returns ``(after, until)`` pairs for
+    :func:`apply_date_range`; rows sharing a boundary date stay together.
+    """
+    bucket = db.func.ntile(shards).over(order_by=Observation.observation_date).label('bucket')
+    buckets = db.session.query(
+        Observation.observation_date.label('observation_date'), bucket
+    ).filter(
+        Observation.project_id == project_id
+    ).subquery()
+
+    boundaries = db.session.query(
+        db.func.max(buckets.c.observation_date)
+    ).group_by(buckets.c.bucket).order_by(buckets.c.bucket).all()
+
+    ranges = []
+    after = None
+    for until in sorted({row[0] for row in boundaries}):
+        ranges.append((after, until))
+        after = until
+
+    return ranges
+
+def shard_part_path(parent_id, shard_index, extension):
+    """Get the part file path of one export shard."""
+    folder = os.path.join(current_app.config['UPLOAD_FOLDER'], 'exports', 'parts', parent_id)
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"part-{shard_index:05d}.{extension}")
+
+def concatenate_csv_parts(file_path, part_paths):
+    """Join headerless CSV parts into one CSV file with a header."""
+    with open(file_path, 'w', newline='', encoding='utf-8') as output:
+        csv.writer(output).writerow(EXPORT_HEADERS)
+        for part_path in part_paths:
+            with open(part_path, newline='', encoding='utf-8') as part:
+                shutil.copyfileobj(part, output)
+
+def zip_parts(file_path, part_paths):
+    """Package part files as a zip archive (e.g. a Parquet dataset)."""
+    # Parts are already compressed, so they are stored as-is
+    with zipfile.ZipFile(file_path, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for part_path in part_paths:
+            archive.write(part_path, os.path.basename(part_path))
@@ -0,0 +1,177 @@
+"""Offline reverse geocoding against a local gazetteer.
+
+Places are read from a GeoNames dump (tab-separated, e.g.
+``cities1000.txt``) or a CSV with ``name``, ``latitude`` and
+``longitude`` columns (``admin1`` and ``country_code`` are optional).
+The parsed points are converted to unit-sphere XYZ vectors and cached
+as ``.npy`` arrays, next to the source file or in
+``GAZETTEER_CACHE_DIR``, so later loads skip parsing. Nearest-place
+queries use a KD-tree over the XYZ vectors, where chord distance is
+monotonic with great-circle distance.
+"""
+import csv
+import os
+import threading
+import uuid
+
+import numpy as np
+from flask import current_app
+
+EARTH_RADIUS_KM = 6371.0
+
+# Column positions in the GeoNames "geoname" table dump
+GEONAMES_NAME = 1
+GEONAMES_LATITUDE = 4
+GEONAMES_LONGITUDE = 5
+GEONAMES_COUNTRY_CODE = 8
+GEONAMES_ADMIN1 = 10
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+def to_unit_vectors(latitudes, longitudes):
+    """Convert degree coordinates to an (n, 3) array of unit vectors."""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+def chord_to_km(chord):
+    """Convert unit-sphere chord lengths to great-circle kilometers."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+def _place_label(name, admin1='', country_code=''):
+    return ', '.join(part for part in (name, admin1, country_code) if part)
+
+def read_gazetteer(path):
+    """Parse a gazetteer file into (latitudes, longitudes, labels) lists."""
+    latitudes, longitudes, labels = [], [], []
+
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.csv'):
+            for row in csv.DictReader(f):
+                latitudes.append(float(row['latitude']))
+                longitudes.append(float(row['longitude']))
+                labels.append(_place_label(
+                    row['name'], row.get('admin1', ''), row.get('country_code', '')
+                ))
+        else:
+            for row in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+                if len(row) <= GEONAMES_ADMIN1:
+                    continue
+                latitudes.append(float(row[GEONAMES_LATITUDE]))
+                longitudes.append(float(row[GEONAMES_LONGITUDE]))
+                labels.append(_place_label(
+                    row[GEONAMES_NAME], row[GEONAMES_ADMIN1], row[GEONAMES_COUNTRY_CODE]
+                ))
+
+    return latitudes, longitudes, labels
+
+def _cache_paths(path, cache_dir=None):
+    base, _ = os.path.splitext(path)
+    if cache_dir:
+        base = os.path.join(cache_dir, os.path.basename(base))
+    return f"{base}.xyz.npy", f"{base}.labels.npy"
+
+def _save_array(cache_path, array):
+    # Written to a temporary sibling and renamed into place, so processes
+    # loading concurrently never map a partly written file
+    folder, filename = os.path.split(cache_path)
+    temp_path = os.path.join(folder, f".{filename}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(temp_path, 'wb') as f:
+            np.save(f, array)
+        os.replace(temp_path, cache_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def load_gazetteer(path, cache_dir=None):
+    """Load gazetteer points as (xyz, labels) arrays.
+
+    The arrays are memory-mapped from ``.npy`` caches in ``cache_dir``
+    (next to the source file by default), which are rebuilt whenever the
+    source file is newer. When the cache can't be written the parsed
+    arrays are returned in memory instead.
+    """
+    xyz_path, labels_path = _cache_paths(path, cache_dir)
+    source_mtime = os.path.getmtime(path)
+
+    stale = any(
+        not os.path.exists(cache_path) or os.path.getmtime(cache_path) < source_mtime
+        for cache_path in (xyz_path, labels_path)
+    )
+    if stale:
+        latitudes, longitudes, labels = read_gazetteer(path)
+        xyz = to_unit_vectors(latitudes, longitudes)
+        labels = np.array(labels, dtype=str)
+        try:
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            _save_array(xyz_path, xyz)
+            _save_array(labels_path, labels)
+        except OSError:
+            return xyz, labels
+
+    return np.load(xyz_path, mmap_mode='r'), np.load(labels_path, mmap_mode='r')
+
+class OfflineGeocoder:
+    """Nearest-place lookups over a gazetteer KD-tree.
+
+    The KD-tree holds its own copy of the points in memory; only the
+    labels stay memory-mapped.
+    """
+
+    def __init__(self, xyz, labels, max_distance_km=None):
+        from scipy.spatial import cKDTree
+
+        self.labels = labels
+        self.max_distance_km = max_distance_km
+        self.tree = cKDTree(xyz)
+
+    @classmethod
+    def from_file(cls, path, max_distance_km=None, cache_dir=None):
+        xyz, labels = load_gazetteer(path, cache_dir)
+        return cls(xyz, labels, max_distance_km)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def reverse_batch(self, latitudes, longitudes):
+        """Get the nearest place label for each coordinate pair.
+
+        Entries are None when the nearest place is further away than
+        ``max_distance_km``.
+        """
+        if len(self.labels) == 0:
+            return [None] * len(latitudes)
+
+        chords, indexes = self.tree.query(to_unit_vectors(latitudes, longitudes))
+        distances = chord_to_km(chords)
+
+        return [
+            None if self.max_distance_km is not None and distance > self.max_distance_km
+            else str(self.labels[index])
+            for distance, index in zip(distances, indexes)
+        ]
+
+    def reverse(self, latitude, longitude):
+        """Get the nearest place label for one coordinate pair."""
+        return self.reverse_batch([latitude], [longitude])[0]
+
+def get_offline_geocoder():
+    """Get the process-wide geocoder for the configured gazetteer."""
+    global _geocoder
+    if _geocoder is None:
+        with _geocoder_lock:
+            if _geocoder is None:
+                path = current_app.config.get('GAZETTEER_PATH')
+                if not path:
+                    raise RuntimeError('GAZETTEER_PATH is not configured')
+                _geocoder = OfflineGeocoder.from_file(
+                    path,
+                    current_app.config.get('GAZETTEER_MAX_DISTANCE_KM'),
+                    current_app.config.get('GAZETTEER_CACHE_DIR')
+                )
+    return _geocoder
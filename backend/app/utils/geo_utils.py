@@ -3,6 +3,82 @@ from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 from flask import current_app
 
+from .. import cache
+
+_geolocator = None
+
+def get_geolocator():
+    """Get the process-wide Nominatim client"""
+    global _geolocator
+    if _geolocator is None:
+        _geolocator = Nominatim(user_agent="species_monitoring_app")
+    return _geolocator
+
+def format_coordinates(latitude, longitude):
+    """Fallback location name for coordinates without an address"""
+    return f"Location ({latitude:.4f}, {longitude:.4f})"
+
+def quantize_coordinates(latitude, longitude, precision=None):
+    """Round coordinates to the geocode cache grid"""
+    if precision is None:
+        precision = current_app.config['GEOCODE_CACHE_PRECISION']
+    return round(latitude, precision), round(longitude, precision)
+
+def reverse_geocode_cached(latitude, longitude):
+    """Get a location name through the shared geocode cache.
+
+    Lookups are made for the rounded coordinates so every point in a grid
+    cell shares one cache entry. Returns None when the geocoding service
+    is unavailable; such failures are not cached.
+    """
+    precision = current_app.config['GEOCODE_CACHE_PRECISION']
+    latitude, longitude = quantize_coordinates(latitude, longitude, precision)
+    cache_key = f"geocode:{latitude:.{precision}f}:{longitude:.{precision}f}"
+    
+    location_name = cache.get(cache_key)
+    if location_name is not None:
+        return location_name
+    
+    try:
+        location = get_geolocator().reverse(
+            f"{latitude}, {longitude}", timeout=current_app.config['GEOCODE_TIMEOUT']
+        )
+    except (GeocoderTimedOut, GeocoderServiceError) as e:
+        current_app.logger.warning(f"Geocoding error: {str(e)}")
+        return None
+    
+    location_name = location.address if location else format_coordinates(latitude, longitude)
+    cache.set(cache_key, location_name, timeout=current_app.config['GEOCODE_CACHE_TIMEOUT'])
+    
+    return location_name
+
+def reverse_geocode(latitude, longitude):
+    """Get a location name with the configured geocoder backend.
+
+    Returns None when the backend is temporarily unavailable.
+    """
+    if current_app.config['GEOCODER_BACKEND'] == 'offline':
+        from .gazetteer import get_offline_geocoder
+        location_name = get_offline_geocoder().reverse(latitude, longitude)
+        return location_name or format_coordinates(latitude, longitude)
+    
+    return reverse_geocode_cached(latitude, longitude)
+
+def reverse_geocode_batch(latitudes, longitudes):
+    """Get location names for many coordinates, e.g. for imports"""
+    if current_app.config['GEOCODER_BACKEND'] == 'offline':
+        from .gazetteer import get_offline_geocoder
+        names = get_offline_geocoder().reverse_batch(latitudes, longitudes)
+        return [
+            name or format_coordinates(latitude, longitude)
+            for name, latitude, longitude in zip(names, latitudes, longitudes)
+        ]
+    
+    return [
+        reverse_geocode_cached(latitude, longitude)
+        for latitude, longitude in zip(latitudes, longitudes)
+    ]
+
 def get_location_name(latitude, longitude):
     """Get human-readable location name from coordinates"""
     try:
@@ -0,0 +1,41 @@
+"""Per-request identity cache for frequently re-read rows.
+
+Rows are kept on ``flask.g`` so a request that resolves the same user or
+species more than once (decorators, permission checks, serialization)
+only queries the database the first time.
+"""
+from flask import g, has_app_context
+
+from ..models import Species, User
+
+def _registry(model):
+    registry = g.setdefault('identity_cache', {})
+    return registry.setdefault(model.__name__, {})
+
+def get_cached(model, identity):
+    """Get a row by primary key, at most once per request."""
+    if identity is None:
+        return None
+
+    if not has_app_context():
+        return model.query.get(identity)
+
+    registry = _registry(model)
+    key = str(identity)
+
+    instance = registry.get(key)
+    if instance is None:
+        instance = model.query.get(identity)
+        # Misses are not cached so rows created later in the request are found
+        if instance is not None:
+            registry[key] = instance
+
+    return instance
+
+def get_user(user_id):
+    """Get a user by id through the per-request cache."""
+    return get_cached(User, user_id)
+
+def get_species(species_id):
+    """Get a species by id through the per-request cache."""
+    return get_cached(Species, species_id)
@@ -0,0 +1,50 @@
+"""Deferred imports for heavy libraries.
+
+``lazy_import('matplotlib.pyplot')`` returns a module facade that imports
+the real module on first attribute access. Modules that only need
+plotting, PDF or dataframe libraries for a few code paths can bind them
+at module level without every worker and CLI invocation paying their
+import time and memory at startup.
+"""
+import importlib
+import threading
+import types
+
+class LazyModule(types.ModuleType):
+    """Module facade that imports ``name`` on first attribute access."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+        self.__dict__['_lazy_lock'] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with self.__dict__['_lazy_lock']:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__['_lazy_module'] = module
+        return module
+
+    @property
+    def is_loaded(self):
+        return self.__dict__['_lazy_module'] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.is_loaded else 'not loaded'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+def lazy_import(name):
+    """Get a facade for module ``name`` that is imported on first use."""
+    return LazyModule(name)
@@ -0,0 +1,127 @@
+"""Minimal Mapbox Vector Tile (MVT v2) encoding helpers.
+
+Only point geometries are supported, which is all the observation map
+needs. Used as the local fallback when PostGIS ``ST_AsMVT`` is not
+available.
+"""
+import math
+import struct
+
+EARTH_CIRCUMFERENCE = 2 * math.pi * 6378137.0
+MAX_MERCATOR_LATITUDE = 85.0511287798
+
+# Protobuf wire types
+WIRE_VARINT = 0
+WIRE_FIXED64 = 1
+WIRE_LENGTH_DELIMITED = 2
+
+# MVT geometry constants
+GEOM_POINT = 1
+CMD_MOVE_TO = 1
+
+def tile_bounds(z, x, y):
+    """Get (west, south, east, north) in degrees for an XYZ tile."""
+    n = 2 ** z
+    west = x / n * 360.0 - 180.0
+    east = (x + 1) / n * 360.0 - 180.0
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return west, south, east, north
+
+def tile_width_meters(z):
+    """Width of a tile at zoom ``z`` in Web Mercator meters."""
+    return EARTH_CIRCUMFERENCE / (2 ** z)
+
+def lonlat_to_tile_coords(longitude, latitude, z, x, y, extent=4096):
+    """Project a lon/lat point to integer coordinates inside tile z/x/y."""
+    n = 2 ** z
+    latitude = max(min(latitude, MAX_MERCATOR_LATITUDE), -MAX_MERCATOR_LATITUDE)
+    lat_rad = math.radians(latitude)
+
+    world_x = (longitude + 180.0) / 360.0 * n
+    world_y = (1.0 - math.log(math.tan(lat_rad) + 1.0 / math.cos(lat_rad)) / math.pi) / 2.0 * n
+
+    return int(round((world_x - x) * extent)), int(round((world_y - y) * extent))
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        bits = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
+
+def _zigzag(value):
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+def _field(number, wire_type):
+    return _varint((number << 3) | wire_type)
+
+def _length_delimited(number, payload):
+    return _field(number, WIRE_LENGTH_DELIMITED) + _varint(len(payload)) + payload
+
+def _packed(number, values):
+    return _length_delimited(number, b''.join(_varint(v) for v in values))
+
+def _encode_value(value):
+    if isinstance(value, bool):
+        return _field(7, WIRE_VARINT) + _varint(int(value))
+    if isinstance(value, int):
+        if value >= 0:
+            return _field(5, WIRE_VARINT) + _varint(value)
+        return _field(6, WIRE_VARINT) + _varint(_zigzag(value))
+    if isinstance(value, float):
+        return _field(3, WIRE_FIXED64) + struct.pack('<d', value)
+    return _length_delimited(1, str(value).encode('utf-8'))
+
+def _encode_point(px, py):
+    command = (CMD_MOVE_TO & 0x7) | (1 << 3)
+    return [command, _zigzag(px), _zigzag(py)]
+
+def encode_point_layer(name, features, extent=4096):
+    """Encode a layer of point features.
+
+    ``features`` is an iterable of dicts with ``geometry`` (an ``(x, y)``
+    tuple in tile coordinates) and ``properties`` (a flat dict of str,
+    int, float or bool values; None values are skipped).
+    """
+    keys, key_index = [], {}
+    values, value_index = [], {}
+    encoded_features = []
+
+    for feature_id, feature in enumerate(features, start=1):
+        tags = []
+        for key, value in feature.get('properties', {}).items():
+            if value is None:
+                continue
+            if key not in key_index:
+                key_index[key] = len(keys)
+                keys.append(key)
+            value_key = (type(value).__name__, value)
+            if value_key not in value_index:
+                value_index[value_key] = len(values)
+                values.append(value)
+            tags.extend([key_index[key], value_index[value_key]])
+
+        px, py = feature['geometry']
+        body = (
+            _field(1, WIRE_VARINT) + _varint(feature_id) +
+            _packed(2, tags) +
+            _field(3, WIRE_VARINT) + _varint(GEOM_POINT) +
+            _packed(4, _encode_point(px, py))
+        )
+        encoded_features.append(_length_delimited(2, body))
+
+    layer = (
+        _field(15, WIRE_VARINT) + _varint(2) +
+        _length_delimited(1, name.encode('utf-8')) +
+        b''.join(encoded_features) +
+        b''.join(_length_delimited(3, key.encode('utf-8')) for key in keys) +
+        b''.join(_length_delimited(4, _encode_value(value)) for value in values) +
+        _field(5, WIRE_VARINT) + _varint(extent)
+    )
+
+    return _length_delimited(3, layer)
@@ -0,0 +1,83 @@
+"""Password hashing with a configurable algorithm and cost.
+
+``PASSWORD_HASH_METHOD`` selects ``pbkdf2`` or ``scrypt`` (werkzeug's
+hash formats) or ``argon2`` (argon2-cffi), each tuned by the cost
+settings next to it in the config. Hashing runs inline in the request:
+gunicorn's sync workers serve one request each, so at most one hash per
+worker process runs at once. Hashes made with other settings still
+verify, and :func:`needs_rehash` reports them so logins can upgrade
+them in place.
+"""
+from collections import namedtuple
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from .lazy import lazy_import
+
+argon2 = lazy_import('argon2')
+argon2_exceptions = lazy_import('argon2.exceptions')
+
+ARGON2_PREFIX = '$argon2'
+
+HashSettings = namedtuple('HashSettings', ['method', 'werkzeug_method', 'argon2_params'])
+
+def hash_settings(config=None):
+    """Get the hash settings configured in ``config`` (the app config by default)."""
+    config = config if config is not None else current_app.config
+    method = config.get('PASSWORD_HASH_METHOD', 'scrypt')
+
+    if method == 'pbkdf2':
+        return HashSettings(method, f"pbkdf2:sha256:{config.get('PBKDF2_ITERATIONS', 600000)}", None)
+
+    if method == 'scrypt':
+        werkzeug_method = 'scrypt:{}:{}:{}'.format(
+            config.get('SCRYPT_N', 2 ** 15), config.get('SCRYPT_R', 8), config.get('SCRYPT_P', 1)
+        )
+        return HashSettings(method, werkzeug_method, None)
+
+    if method == 'argon2':
+        params = {
+            'time_cost': config.get('ARGON2_TIME_COST', 3),
+            'memory_cost': config.get('ARGON2_MEMORY_COST', 64 * 1024),
+            'parallelism': config.get('ARGON2_PARALLELISM', 1),
+        }
+        return HashSettings(method, None, params)
+
+    raise ValueError(f"Unsupported password hash method: {method}")
+
+def _hash(password, settings):
+    if settings.method == 'argon2':
+        return argon2.PasswordHasher(**settings.argon2_params).hash(password)
+    return generate_password_hash(password, method=settings.werkzeug_method)
+
+def _verify(password_hash, password):
+    if not password_hash:
+        return False
+
+    if password_hash.startswith(ARGON2_PREFIX):
+        try:
+            return argon2.PasswordHasher().verify(password_hash, password)
+        except (argon2_exceptions.VerificationError, argon2_exceptions.InvalidHashError):
+            return False
+
+    return check_password_hash(password_hash, password)
+
+def hash_password(password):
+    """Hash a password with the configured method and cost."""
+    return _hash(password, hash_settings())
+
+def verify_password(password_hash, password):
+    """Check a password against a hash made with any supported settings."""
+    return _verify(password_hash, password)
+
+def needs_rehash(password_hash):
+    """Check whether a hash was made with other than the configured settings."""
+    settings = hash_settings()
+
+    if settings.method == 'argon2':
+        if not password_hash.startswith(ARGON2_PREFIX):
+            return True
+        return argon2.PasswordHasher(**settings.argon2_params).check_needs_rehash(password_hash)
+
+    return password_hash.split('$', 1)[0] != settings.werkzeug_method
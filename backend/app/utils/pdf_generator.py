@@ -1,35 +1,33 @@
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
-import io
-import base64
+from .charts import render_chart
+from .lazy import lazy_import
+from .report_data import build_report_data
 
-from ..models import Observation, Species
+# PDF libraries are imported on first use
+colors = lazy_import('reportlab.lib.colors')
+enums = lazy_import('reportlab.lib.enums')
+pagesizes = lazy_import('reportlab.lib.pagesizes')
+reportlab_styles = lazy_import('reportlab.lib.styles')
+units = lazy_import('reportlab.lib.units')
+platypus = lazy_import('reportlab.platypus')
 
-def generate_report_pdf(project, file_path):
-    """Generate comprehensive project report as PDF"""
-    
-    doc = SimpleDocTemplate(file_path, pagesize=A4)
-    story = []
-    styles = getSampleStyleSheet()
+# Charts are drawn at their printed size (6 x 3.6 in)
+PDF_CHART_DPI = 150
+
+def report_styles():
+    """Get (styles, title_style, heading_style) for report flowables."""
+    styles = reportlab_styles.getSampleStyleSheet()
     
     # Custom styles
-    title_style = ParagraphStyle(
+    title_style = reportlab_styles.ParagraphStyle(
         'CustomTitle',
         parent=styles['Heading1'],
         fontSize=24,
         spaceAfter=30,
-        alignment=TA_CENTER,
+        alignment=enums.TA_CENTER,
         textColor=colors.darkblue
     )
     
-    heading_style = ParagraphStyle(
+    heading_style = reportlab_styles.ParagraphStyle(
         'CustomHeading',
         parent=styles['Heading2'],
         fontSize=16,
@@ -37,31 +35,56 @@ def generate_report_pdf(project, file_path):
         textColor=colors.darkgreen
     )
     
-    # Title page
-    story.append(Paragraph("Species Monitoring Report", title_style))
-    story.append(Spacer(1, 20))
-    
-    story.append(Paragraph(f"Project: {project.name}", styles['Heading2']))
-    story.append(Spacer(1, 12))
+    return styles, title_style, heading_style
+
+def _header_table_style(font_size=10, padding=12, striped=False):
+    """Table style with a grey header row."""
+    commands = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), font_size),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), padding),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]
+    if striped:
+        commands.append(('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]))
+    return platypus.TableStyle(commands)
+
+def title_block(data, styles, title_style):
+    """Title page flowables: report title, project name and description."""
+    project = data['project']
+    story = [
+        platypus.Paragraph("Species Monitoring Report", title_style),
+        platypus.Spacer(1, 20),
+        platypus.Paragraph(f"Project: {project['name']}", styles['Heading2']),
+        platypus.Spacer(1, 12)
+    ]
     
-    if project.description:
-        story.append(Paragraph(f"Description: {project.description}", styles['Normal']))
-        story.append(Spacer(1, 12))
+    if project['description']:
+        story.append(platypus.Paragraph(f"Description: {project['description']}", styles['Normal']))
+        story.append(platypus.Spacer(1, 12))
     
-    # Project details table
+    return story
+
+def project_details_block(data):
+    """Project details table flowables."""
+    project = data['project']
     project_data = [
         ['Project Details', ''],
-        ['Location', project.location or 'Not specified'],
-        ['Start Date', project.start_date.strftime('%Y-%m-%d') if project.start_date else 'Not specified'],
-        ['End Date', project.end_date.strftime('%Y-%m-%d') if project.end_date else 'Ongoing'],
-        ['Status', project.status.title()],
-        ['Created By', f"{project.created_by.first_name} {project.created_by.last_name}"],
-        ['Members', str(len(project.members))],
-        ['Report Generated', datetime.now().strftime('%Y-%m-%d %H:%M:%S')]
+        ['Location', project['location'] or 'Not specified'],
+        ['Start Date', project['start_date'].strftime('%Y-%m-%d') if project['start_date'] else 'Not specified'],
+        ['End Date', project['end_date'].strftime('%Y-%m-%d') if project['end_date'] else 'Ongoing'],
+        ['Status', project['status'].title()],
+        ['Created By', project['created_by']],
+        ['Members', str(project['members_count'])],
+        ['Report Generated', data['generated_at'].strftime('%Y-%m-%d %H:%M:%S')]
     ]
     
-    project_table = Table(project_data, colWidths=[2*inch, 4*inch])
-    project_table.setStyle(TableStyle([
+    project_table = platypus.Table(project_data, colWidths=[2*units.inch, 4*units.inch])
+    project_table.setStyle(platypus.TableStyle([
         ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
         ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
         ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
@@ -74,114 +97,102 @@ def generate_report_pdf(project, file_path):
         ('GRID', (0, 0), (-1, -1), 1, colors.black)
     ]))
     
-    story.append(project_table)
-    story.append(Spacer(1, 30))
+    return [project_table, platypus.Spacer(1, 30)]
+
+def summary_block(data, heading_style):
+    """Summary statistics table flowables."""
+    statistics = data['statistics']
+    summary_data = [
+        ['Metric', 'Value'],
+        ['Total Observations', str(statistics['total_observations'])],
+        ['Unique Species', str(statistics['unique_species'])],
+        ['Total Individuals Observed', str(statistics['total_individuals'])],
+        ['Number of Observers', str(statistics['unique_observers'])]
+    ]
     
-    # Get observations data
-    observations = Observation.query.filter_by(project_id=project.id).all()
+    if statistics['date_range']:
+        start, end = statistics['date_range']
+        summary_data.append(['Observation Period', f"{start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')}"])
     
-    # Summary statistics
-    story.append(Paragraph("Summary Statistics", heading_style))
+    summary_table = platypus.Table(summary_data, colWidths=[3*units.inch, 2*units.inch])
+    summary_table.setStyle(_header_table_style())
     
-    total_observations = len(observations)
-    unique_species = len(set(obs.species_id for obs in observations))
-    total_individuals = sum(obs.count for obs in observations)
-    unique_observers = len(set(obs.observer_id for obs in observations))
+    return [platypus.Paragraph("Summary Statistics", heading_style), summary_table, platypus.Spacer(1, 30)]
+
+def species_block(data, heading_style):
+    """Species breakdown table and chart flowables."""
+    if not data['species']:
+        return []
     
-    summary_data = [
-        ['Metric', 'Value'],
-        ['Total Observations', str(total_observations)],
-        ['Unique Species', str(unique_species)],
-        ['Total Individuals Observed', str(total_individuals)],
-        ['Number of Observers', str(unique_observers)]
-    ]
+    species_data = [['Species', 'Total Count', 'Observations']]
+    for species in data['species']:
+        species_data.append([species['name'], str(species['individuals']), str(species['observations'])])
     
-    if observations:
-        date_range = f"{min(obs.observation_date for obs in observations).strftime('%Y-%m-%d')} to {max(obs.observation_date for obs in observations).strftime('%Y-%m-%d')}"
-        summary_data.append(['Observation Period', date_range])
+    species_table = platypus.Table(species_data, colWidths=[3*units.inch, 1*units.inch, 1*units.inch])
+    species_table.setStyle(_header_table_style(font_size=9, padding=8, striped=True))
     
-    summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    story = [platypus.Paragraph("Species Breakdown", heading_style), species_table, platypus.Spacer(1, 20)]
     
-    story.append(summary_table)
-    story.append(Spacer(1, 30))
+    # Generate and include charts
+    try:
+        species_counts = {species['name']: species['individuals'] for species in data['species']}
+        chart_image = generate_species_chart(species_counts)
+        if chart_image:
+            story.append(platypus.Paragraph("Species Distribution", heading_style))
+            story.append(chart_image)
+            story.append(platypus.Spacer(1, 20))
+    except Exception as e:
+        # Skip chart if generation fails
+        pass
     
-    # Species breakdown
-    if observations:
-        story.append(Paragraph("Species Breakdown", heading_style))
-        
-        species_counts = {}
-        for obs in observations:
-            species_name = obs.species.common_name
-            species_counts[species_name] = species_counts.get(species_name, 0) + obs.count
-        
-        species_data = [['Species', 'Total Count', 'Observations']]
-        for species_name in sorted(species_counts.keys()):
-            obs_count = len([obs for obs in observations if obs.species.common_name == species_name])
-            species_data.append([species_name, str(species_counts[species_name]), str(obs_count)])
-        
-        species_table = Table(species_data, colWidths=[3*inch, 1*inch, 1*inch])
-        species_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
-        ]))
-        
-        story.append(species_table)
-        story.append(Spacer(1, 20))
-        
-        # Generate and include charts
-        try:
-            chart_image = generate_species_chart(species_counts)
-            if chart_image:
-                story.append(Paragraph("Species Distribution", heading_style))
-                story.append(chart_image)
-                story.append(Spacer(1, 20))
-        except Exception as e:
-            # Skip chart if generation fails
-            pass
-    
-    # Conservation status summary
-    if observations:
-        story.append(Paragraph("Conservation Status Summary", heading_style))
-        
-        conservation_counts = {}
-        for obs in observations:
-            status = obs.species.conservation_status or 'Unknown'
-            conservation_counts[status] = conservation_counts.get(status, 0) + 1
-        
-        conservation_data = [['Conservation Status', 'Number of Species']]
-        for status in sorted(conservation_counts.keys()):
-            conservation_data.append([status, str(conservation_counts[status])])
-        
-        conservation_table = Table(conservation_data, colWidths=[3*inch, 2*inch])
-        conservation_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(conservation_table)
+    return story
+
+def conservation_block(data, heading_style):
+    """Conservation status table flowables (distinct species per status)."""
+    if not data['conservation_status']:
+        return []
+    
+    conservation_data = [['Conservation Status', 'Number of Species']]
+    for status, species_count in data['conservation_status'].items():
+        conservation_data.append([status, str(species_count)])
+    
+    conservation_table = platypus.Table(conservation_data, colWidths=[3*units.inch, 2*units.inch])
+    conservation_table.setStyle(_header_table_style())
+    
+    return [platypus.Paragraph("Conservation Status Summary", heading_style), conservation_table]
+
+def table_block(title, rows, heading_style, col_widths):
+    """Heading and striped table flowables; ``rows`` starts with the header row."""
+    if len(rows) < 2:
+        return []
+    
+    table = platypus.Table(rows, colWidths=[width*units.inch for width in col_widths])
+    table.setStyle(_header_table_style(font_size=9, padding=8, striped=True))
+    
+    return [platypus.Paragraph(title, heading_style), table, platypus.Spacer(1, 20)]
+
+def chart_block(title, chart_path, heading_style):
+    """Heading and chart image flowables."""
+    return [
+        platypus.Paragraph(title, heading_style),
+        platypus.Image(chart_path, width=6*units.inch, height=3.6*units.inch),
+        platypus.Spacer(1, 20)
+    ]
+
+def generate_report_pdf(project, file_path, report_data=None):
+    """Generate comprehensive project report as PDF"""
+    if report_data is None:
+        report_data = build_report_data(project)
+    
+    doc = platypus.SimpleDocTemplate(file_path, pagesize=pagesizes.A4)
+    styles, title_style, heading_style = report_styles()
+    
+    story = []
+    story.extend(title_block(report_data, styles, title_style))
+    story.extend(project_details_block(report_data))
+    story.extend(summary_block(report_data, heading_style))
+    story.extend(species_block(report_data, heading_style))
+    story.extend(conservation_block(report_data, heading_style))
     
     # Build PDF
     doc.build(story)
@@ -189,33 +200,21 @@ def generate_report_pdf(project, file_path):
 def generate_species_chart(species_counts):
     """Generate species distribution chart"""
     try:
-        # Create matplotlib figure
-        plt.figure(figsize=(10, 6))
-        
         # Get top 10 species
         sorted_species = sorted(species_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-        species_names = [item[0] for item in sorted_species]
-        counts = [item[1] for item in sorted_species]
         
-        # Create bar chart
-        plt.bar(range(len(species_names)), counts, color='skyblue')
-        plt.xlabel('Species')
-        plt.ylabel('Total Count')
-        plt.title('Top 10 Most Observed Species')
-        plt.xticks(range(len(species_names)), species_names, rotation=45, ha='right')
-        plt.tight_layout()
-        
-        # Save to bytes
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
-        img_buffer.seek(0)
+        chart_path = render_chart(
+            'bar',
+            [item[0] for item in sorted_species],
+            [item[1] for item in sorted_species],
+            dpi=PDF_CHART_DPI,
+            title='Top 10 Most Observed Species',
+            xlabel='Species',
+            ylabel='Total Count'
+        )
         
         # Create ReportLab Image
-        chart_image = Image(img_buffer, width=6*inch, height=3.6*inch)
-        
-        plt.close()  # Clean up
-        
-        return chart_image
+        return platypus.Image(chart_path, width=6*units.inch, height=3.6*units.inch)
         
     except Exception as e:
-        return None
\ No newline at end of file
+        return None
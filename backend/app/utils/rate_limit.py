@@ -0,0 +1,200 @@
+"""Token bucket rate limiting.
+
+Each client (the JWT user, or the remote address for anonymous requests)
+has a shared API budget of ``RATE_LIMIT_USER_BUDGET`` units that refills
+over ``RATE_LIMIT_USER_WINDOW`` seconds; every API request draws its
+endpoint's cost from it (1 unless the view declares a weight with
+:func:`~app.utils.decorators.rate_limit`). Endpoints may also have their
+own request budget on top of it.
+
+Buckets live in Redis (``RATE_LIMIT_STORAGE_URL``), where one Lua script
+refills and draws a bucket atomically using the Redis server clock, so
+all API processes share the same budgets. ``memory://`` keeps them in
+the process instead (tests, single-process development). If the store
+is unreachable, or slower than ``RATE_LIMIT_REDIS_TIMEOUT``, requests are
+let through rather than failing the API.
+"""
+import math
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+from .lazy import lazy_import
+
+redis = lazy_import('redis')
+
+RateLimitResult = namedtuple('RateLimitResult', ['allowed', 'limit', 'remaining', 'reset', 'retry_after'])
+
+# KEYS[1]: bucket; ARGV: capacity, refill per second, cost.
+# Returns {allowed, tokens left, server time} (as strings: Lua numbers
+# are truncated to integers on the way out).
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+-- Redis < 7 needs effect replication for scripts that read the clock
+if redis.replicate_commands then
+    redis.replicate_commands()
+end
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(tokens), tostring(now)}
+"""
+
+class MemoryBucketStore:
+    """In-process token buckets."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate, cost):
+        """Refill and draw ``cost`` from a bucket; return ``(allowed, tokens, now)``."""
+        now = time.time()
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+        return allowed, tokens, now
+
+class RedisBucketStore:
+    """Token buckets in Redis, drawn atomically by a Lua script."""
+
+    def __init__(self, url, connect_timeout=None, timeout=None):
+        self._client = redis.Redis.from_url(
+            url, socket_connect_timeout=connect_timeout, socket_timeout=timeout
+        )
+        self._script = self._client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def consume(self, key, capacity, rate, cost):
+        """Refill and draw ``cost`` from a bucket; return ``(allowed, tokens, now)``."""
+        allowed, tokens, now = self._script(keys=[key], args=[capacity, rate, cost])
+        return bool(allowed), float(tokens), float(now)
+
+def get_bucket_store():
+    """Get the app's bucket store for ``RATE_LIMIT_STORAGE_URL``."""
+    store = current_app.extensions.get('rate_limit_store')
+    if store is None:
+        url = current_app.config.get('RATE_LIMIT_STORAGE_URL') or 'memory://'
+        if url.startswith('memory://'):
+            store = MemoryBucketStore()
+        else:
+            store = RedisBucketStore(
+                url,
+                connect_timeout=current_app.config.get('RATE_LIMIT_REDIS_CONNECT_TIMEOUT'),
+                timeout=current_app.config.get('RATE_LIMIT_REDIS_TIMEOUT')
+            )
+        current_app.extensions['rate_limit_store'] = store
+    return store
+
+def client_identity():
+    """Get the rate limit identity of the request: its JWT user or remote address."""
+    try:
+        verify_jwt_in_request(optional=True)
+        user_id = get_jwt_identity()
+    except Exception:
+        # Invalid tokens are rejected by the view itself
+        user_id = None
+
+    if user_id:
+        return f"user:{user_id}"
+    return f"ip:{request.remote_addr}"
+
+def consume(scope, limit, per_seconds, cost=1, identity=None):
+    """Draw ``cost`` units from the client's ``scope`` bucket.
+
+    The bucket holds ``limit`` units and refills completely over
+    ``per_seconds``. ``identity`` replaces :func:`client_identity` as the
+    bucket's owner. The result is also recorded for the response headers.
+    Returns None when limiting is disabled or the store is unreachable.
+    """
+    if not current_app.config.get('RATE_LIMIT_ENABLED', True):
+        return None
+
+    rate = limit / per_seconds
+    # A cost above the bucket size could never be paid
+    cost = min(cost, limit)
+    key = f"rate_limit:{scope}:{identity or client_identity()}"
+
+    try:
+        allowed, tokens, now = get_bucket_store().consume(key, limit, rate, cost)
+    except Exception as e:
+        current_app.logger.warning(f"Rate limit store error: {str(e)}")
+        return None
+
+    result = RateLimitResult(
+        allowed=allowed,
+        limit=limit,
+        remaining=max(0, math.floor(tokens)),
+        reset=math.ceil(now + (limit - tokens) / rate),
+        retry_after=0 if allowed else math.ceil((cost - tokens) / rate)
+    )
+    g.setdefault('rate_limits', []).append(result)
+    return result
+
+def view_cost(view_function):
+    """Get the budget cost of a request to a view (its declared weight, or 1)."""
+    cost = getattr(view_function, 'rate_limit_cost', 1)
+    return cost() if callable(cost) else cost
+
+def rate_limit_exceeded(result):
+    """Build the 429 response of a denied request."""
+    response = jsonify({'error': 'Rate limit exceeded', 'retry_after': result.retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(result.retry_after)
+    return response
+
+def _charge_client_budget():
+    g.rate_limits = []
+    if request.method == 'OPTIONS' or not request.path.startswith('/api/'):
+        return None
+
+    view_function = current_app.view_functions.get(request.endpoint)
+    if view_function is None:
+        return None
+
+    result = consume(
+        'client',
+        current_app.config['RATE_LIMIT_USER_BUDGET'],
+        current_app.config['RATE_LIMIT_USER_WINDOW'],
+        view_cost(view_function)
+    )
+    if result is not None and not result.allowed:
+        return rate_limit_exceeded(result)
+    return None
+
+def _add_rate_limit_headers(response):
+    results = g.get('rate_limits')
+    if results:
+        # Report the bucket closest to running out
+        result = min(results, key=lambda r: r.remaining / r.limit)
+        response.headers['X-RateLimit-Limit'] = str(result.limit)
+        response.headers['X-RateLimit-Remaining'] = str(result.remaining)
+        response.headers['X-RateLimit-Reset'] = str(result.reset)
+    return response
+
+def init_app(app):
+    """Charge every API request to the client's budget and add rate limit headers."""
+    app.before_request(_charge_client_budget)
+    app.after_request(_add_rate_limit_headers)
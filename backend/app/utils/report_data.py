@@ -0,0 +1,283 @@
+"""Project report data built from grouped SQL.
+
+The summary breakdowns (per species, observer, month and location) are
+``GROUP BY`` queries combined with ``UNION ALL`` and sent as a single
+statement, so a summary costs one round trip whose result grows with the
+number of groups rather than the number of observations. Project totals
+are derived from the breakdown rows.
+
+:func:`build_report_data` assembles the same aggregates into a report
+data model that renderers (PDF and others) work from without touching
+individual observations.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import String, Numeric, case, cast, func, literal, null, select, union_all
+
+from ..models import db, Observation, Species, User, project_users
+from .cache_utils import cached_project_data
+
+TOP_SPECIES_LIMIT = 10
+
+# Report map cells are rounded to 1 decimal degree (about 11 km)
+GRID_CELL_DECIMALS = 1
+
+# Dashboard charts: chart type -> drawing options for render_chart
+PROJECT_CHARTS = {
+    'species': {
+        'kind': 'bar',
+        'title': 'Top 10 Most Observed Species',
+        'xlabel': 'Species',
+        'ylabel': 'Total Count'
+    },
+    'monthly': {
+        'kind': 'line',
+        'title': 'Observations per Month',
+        'xlabel': 'Month',
+        'ylabel': 'Observations'
+    },
+}
+
+def observation_criteria(project_id, filters=None):
+    """Get the WHERE clauses selecting a project's (filtered) observations.
+
+    ``filters`` may hold ``start_date``/``end_date`` datetimes and a list
+    of ``species_ids``.
+    """
+    filters = filters or {}
+    criteria = [Observation.project_id == project_id]
+
+    if filters.get('start_date'):
+        criteria.append(Observation.observation_date >= filters['start_date'])
+
+    if filters.get('end_date'):
+        criteria.append(Observation.observation_date <= filters['end_date'])
+
+    if filters.get('species_ids'):
+        criteria.append(Observation.species_id.in_(filters['species_ids']))
+
+    return criteria
+
+def _breakdown(criteria, dimension, key, label_a=None, label_b=None, join=None):
+    """Build one grouped arm of the summary query.
+
+    Every arm has the same columns: the dimension name, an optional group
+    key, two optional label columns, and the group's aggregates.
+    """
+    group_by = [expression for expression in (key, label_a, label_b) if expression is not None]
+
+    query = select(
+        literal(dimension, String).label('dimension'),
+        cast(key if key is not None else null(), String).label('key'),
+        cast(label_a if label_a is not None else null(), String).label('label_a'),
+        cast(label_b if label_b is not None else null(), String).label('label_b'),
+        func.count(Observation.id).label('observations'),
+        func.coalesce(func.sum(Observation.count), 0).label('individuals'),
+        func.min(Observation.observation_date).label('first_date'),
+        func.max(Observation.observation_date).label('last_date')
+    ).select_from(Observation)
+
+    if join is not None:
+        query = query.outerjoin(*join)
+
+    return query.where(*criteria).group_by(*group_by)
+
+def _breakdown_arm(criteria, dimension):
+    """Build the grouped query of one summary dimension."""
+    if dimension == 'species':
+        return _breakdown(
+            criteria, 'species', Observation.species_id, Species.common_name, Species.conservation_status,
+            join=(Species, Species.id == Observation.species_id)
+        )
+
+    if dimension == 'observer':
+        return _breakdown(
+            criteria, 'observer', Observation.observer_id, User.first_name, User.last_name,
+            join=(User, User.id == Observation.observer_id)
+        )
+
+    if dimension == 'month':
+        month = func.date_trunc('month', Observation.observation_date, type_=db.DateTime)
+        return _breakdown(criteria, 'month', month)
+
+    if dimension == 'location':
+        # Unnamed locations are grouped by coordinates rounded to 2 decimals
+        unnamed = Observation.location_name.is_(None)
+        return _breakdown(
+            criteria, 'location', Observation.location_name,
+            case((unnamed, func.round(cast(Observation.latitude, Numeric), 2))),
+            case((unnamed, func.round(cast(Observation.longitude, Numeric), 2)))
+        )
+
+    if dimension == 'grid':
+        # Map cells of GRID_CELL_DECIMALS decimal degrees
+        return _breakdown(
+            criteria, 'grid', None,
+            func.round(cast(Observation.latitude, Numeric), GRID_CELL_DECIMALS),
+            func.round(cast(Observation.longitude, Numeric), GRID_CELL_DECIMALS)
+        )
+
+    raise ValueError(f"Unknown summary dimension: {dimension}")
+
+def summary_breakdown_rows(project_id, dimensions=('species', 'observer', 'month', 'location'), filters=None):
+    """Get the grouped summary rows of a project in one statement.
+
+    Returns ``{dimension: rows}``. Species rows carry the common name in
+    ``label_a`` and the conservation status in ``label_b``.
+    """
+    criteria = observation_criteria(project_id, filters)
+    statement = union_all(*(_breakdown_arm(criteria, dimension) for dimension in dimensions))
+
+    rows = defaultdict(list)
+    for row in db.session.execute(statement):
+        rows[row.dimension].append(row)
+    return rows
+
+def observer_name(row):
+    """Get the display name of an observer breakdown row."""
+    if row.label_a is None and row.label_b is None:
+        return 'Unknown'
+    return f"{row.label_a} {row.label_b}"
+
+def _location_name(row):
+    if row.key is not None:
+        return row.key
+    return f"{float(row.label_a):.2f}, {float(row.label_b):.2f}"
+
+def report_statistics(rows):
+    """Reduce breakdown rows to project totals and the observation date range."""
+    species_rows = rows['species']
+
+    date_range = None
+    if species_rows:
+        date_range = (
+            min(row.first_date for row in species_rows),
+            max(row.last_date for row in species_rows)
+        )
+
+    return {
+        'total_observations': sum(row.observations for row in species_rows),
+        'unique_species': len(species_rows),
+        'total_individuals': sum(row.individuals for row in species_rows),
+        'unique_observers': len(rows['observer']),
+        'date_range': date_range
+    }
+
+def species_totals(species_rows):
+    """Get {common_name: (individuals, observations)}.
+
+    Species sharing a common name are reported together.
+    """
+    totals = defaultdict(lambda: [0, 0])
+    for row in species_rows:
+        entry = totals[row.label_a or 'Unknown']
+        entry[0] += row.individuals
+        entry[1] += row.observations
+    return {name: tuple(entry) for name, entry in totals.items()}
+
+def species_entries(species_rows):
+    """Get the per-species report entries, sorted by name."""
+    return [
+        {'name': name, 'individuals': individuals, 'observations': observations}
+        for name, (individuals, observations) in sorted(species_totals(species_rows).items())
+    ]
+
+def conservation_counts(species_rows):
+    """Get {conservation_status: number of distinct species}."""
+    counts = defaultdict(int)
+    for row in species_rows:
+        counts[row.label_b or 'Unknown'] += 1
+    return dict(sorted(counts.items()))
+
+def project_overview(project):
+    """Get the project details section of the report data model."""
+    members_count = db.session.query(project_users).filter(
+        project_users.c.project_id == project.id
+    ).count()
+
+    return {
+        'id': project.id,
+        'name': project.name,
+        'description': project.description,
+        'location': project.location,
+        'status': project.status,
+        'start_date': project.start_date,
+        'end_date': project.end_date,
+        'created_by': f"{project.created_by.first_name} {project.created_by.last_name}",
+        'members_count': members_count
+    }
+
+def build_report_data(project, filters=None):
+    """Build the report data model of a project.
+
+    All observation aggregates come from one grouped query. Values keep
+    their Python types (dates stay datetimes) so each renderer can format
+    them.
+    """
+    rows = summary_breakdown_rows(project.id, dimensions=('species', 'observer'), filters=filters)
+
+    return {
+        'project': project_overview(project),
+        'statistics': report_statistics(rows),
+        'species': species_entries(rows['species']),
+        'conservation_status': conservation_counts(rows['species']),
+        'generated_at': datetime.now()
+    }
+
+@cached_project_data('reports_summary')
+def project_summary(project_id):
+    """Get the statistics and breakdowns of a project summary report."""
+    rows = summary_breakdown_rows(project_id)
+
+    statistics = report_statistics(rows)
+    if statistics['date_range']:
+        start, end = statistics['date_range']
+        statistics['date_range'] = {'start': start.isoformat(), 'end': end.isoformat()}
+
+    totals = species_totals(rows['species'])
+    species_counts = {name: individuals for name, (individuals, _) in totals.items()}
+    species_observations = {name: observations for name, (_, observations) in totals.items()}
+
+    observer_counts = defaultdict(int)
+    for row in rows['observer']:
+        observer_counts[observer_name(row)] += row.observations
+
+    location_counts = defaultdict(int)
+    for row in rows['location']:
+        location_counts[_location_name(row)] += row.observations
+
+    monthly_counts = {
+        row.key[:7]: row.observations
+        for row in sorted(rows['month'], key=lambda row: row.key)
+    }
+
+    top_species = sorted(species_counts.items(), key=lambda x: x[1], reverse=True)[:TOP_SPECIES_LIMIT]
+
+    return {
+        'statistics': statistics,
+        'species_breakdown': {
+            'counts': species_counts,
+            'observations': species_observations,
+            'top_species': top_species
+        },
+        'observer_contributions': dict(observer_counts),
+        'temporal_distribution': monthly_counts,
+        'location_distribution': dict(location_counts)
+    }
+
+def project_chart(project_id, chart_type):
+    """Get the ``render_chart`` arguments of a project dashboard chart."""
+    chart = dict(PROJECT_CHARTS[chart_type])
+
+    if chart_type == 'species':
+        totals = species_totals(summary_breakdown_rows(project_id, dimensions=('species',))['species'])
+        top_species = sorted(totals.items(), key=lambda x: x[1][0], reverse=True)[:TOP_SPECIES_LIMIT]
+        chart['labels'] = [name for name, _ in top_species]
+        chart['values'] = [individuals for _, (individuals, _) in top_species]
+    else:
+        months = sorted(summary_breakdown_rows(project_id, dimensions=('month',))['month'], key=lambda row: row.key)
+        chart['labels'] = [row.key[:7] for row in months]
+        chart['values'] = [row.observations for row in months]
+
+    return chart
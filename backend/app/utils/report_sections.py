@@ -0,0 +1,234 @@
+"""Section-based report engine.
+
+A report is an ordered list of named sections. Each section computes its
+own aggregates and renders its own flowables, and the sections of a
+report run concurrently on a thread pool (each thread in its own
+application context, so each has its own database session). A report
+therefore takes about as long as its slowest section; the flowables are
+assembled into one PDF in section order afterwards. Per-section timings
+are returned so slow sections can be spotted in the task results.
+"""
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from flask import current_app
+
+from ..models import db, Project
+from .charts import render_chart
+from .pdf_generator import (
+    PDF_CHART_DPI, platypus, pagesizes, report_styles, title_block, project_details_block,
+    summary_block, species_block, conservation_block, table_block, chart_block
+)
+from .report_data import (
+    summary_breakdown_rows, report_statistics, species_entries,
+    conservation_counts, project_overview, observer_name
+)
+
+# Rows of the busiest map cells table
+MAP_TABLE_CELLS = 10
+
+ReportContext = namedtuple('ReportContext', ['project_id', 'filters', 'generated_at'])
+
+def overview_section(context):
+    """Title page and project details."""
+    project = db.session.get(Project, context.project_id)
+    styles, title_style, _ = report_styles()
+    data = {'project': project_overview(project), 'generated_at': context.generated_at}
+    return title_block(data, styles, title_style) + project_details_block(data)
+
+def summary_section(context):
+    """Totals and observation period."""
+    rows = summary_breakdown_rows(context.project_id, ('species', 'observer'), context.filters)
+    _, _, heading_style = report_styles()
+    return summary_block({'statistics': report_statistics(rows)}, heading_style)
+
+def species_section(context):
+    """Per-species counts and the top species chart."""
+    rows = summary_breakdown_rows(context.project_id, ('species',), context.filters)
+    _, _, heading_style = report_styles()
+    return species_block({'species': species_entries(rows['species'])}, heading_style)
+
+def conservation_section(context):
+    """Distinct species per conservation status."""
+    rows = summary_breakdown_rows(context.project_id, ('species',), context.filters)
+    _, _, heading_style = report_styles()
+    return conservation_block({'conservation_status': conservation_counts(rows['species'])}, heading_style)
+
+def time_series_section(context):
+    """Monthly observations chart and table."""
+    rows = summary_breakdown_rows(context.project_id, ('month',), context.filters)
+    months = sorted(rows['month'], key=lambda row: row.key)
+    if not months:
+        return []
+
+    _, _, heading_style = report_styles()
+    labels = [row.key[:7] for row in months]
+    chart_path = render_chart(
+        'line', labels, [row.observations for row in months], dpi=PDF_CHART_DPI,
+        title='Observations per Month', xlabel='Month', ylabel='Observations'
+    )
+
+    table_rows = [['Month', 'Observations', 'Individuals']]
+    table_rows.extend([label, str(row.observations), str(row.individuals)] for label, row in zip(labels, months))
+
+    return (
+        chart_block('Observations Over Time', chart_path, heading_style)
+        + table_block('Monthly Observations', table_rows, heading_style, [2, 1.5, 1.5])
+    )
+
+def map_section(context):
+    """Observation density per map cell."""
+    rows = summary_breakdown_rows(context.project_id, ('grid',), context.filters)
+    cells = sorted(rows['grid'], key=lambda row: row.observations, reverse=True)
+    if not cells:
+        return []
+
+    _, _, heading_style = report_styles()
+    largest = cells[0].observations
+    chart_path = render_chart(
+        'scatter',
+        [float(row.label_b) for row in cells],
+        [float(row.label_a) for row in cells],
+        sizes=[20 + 300 * row.observations / largest for row in cells],
+        dpi=PDF_CHART_DPI, xlabel='Longitude', ylabel='Latitude', title='Observation Density'
+    )
+
+    table_rows = [['Latitude', 'Longitude', 'Observations', 'Individuals']]
+    table_rows.extend(
+        [row.label_a, row.label_b, str(row.observations), str(row.individuals)]
+        for row in cells[:MAP_TABLE_CELLS]
+    )
+
+    return (
+        chart_block('Observation Map', chart_path, heading_style)
+        + table_block('Busiest Map Cells', table_rows, heading_style, [1.5, 1.5, 1.5, 1.5])
+    )
+
+def observers_section(context):
+    """Observations and individuals per observer."""
+    rows = summary_breakdown_rows(context.project_id, ('observer',), context.filters)
+    observers = sorted(rows['observer'], key=lambda row: row.observations, reverse=True)
+    _, _, heading_style = report_styles()
+
+    table_rows = [['Observer', 'Observations', 'Individuals']]
+    table_rows.extend([observer_name(row), str(row.observations), str(row.individuals)] for row in observers)
+
+    return table_block('Observer Contributions', table_rows, heading_style, [3, 1.5, 1.5])
+
+REPORT_SECTIONS = {
+    'overview': overview_section,
+    'summary': summary_section,
+    'species': species_section,
+    'conservation': conservation_section,
+    'time_series': time_series_section,
+    'map': map_section,
+    'observers': observers_section,
+}
+
+REPORT_TEMPLATES = {
+    'standard': ['overview', 'summary', 'species', 'conservation'],
+    'summary': ['overview', 'summary'],
+    'scientific': ['overview', 'summary', 'species', 'time_series', 'map', 'observers', 'conservation'],
+    'conservation': ['overview', 'summary', 'conservation', 'species'],
+}
+
+def resolve_sections(template_id='standard', sections=None):
+    """Get the ordered section names of a template or an explicit list.
+
+    Explicit lists always start with the overview. Raises ValueError for
+    unknown templates or sections.
+    """
+    if not sections:
+        if template_id not in REPORT_TEMPLATES:
+            raise ValueError(f"Unknown report template: {template_id}")
+        return list(REPORT_TEMPLATES[template_id])
+
+    unknown = [name for name in sections if name not in REPORT_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown report sections: {', '.join(unknown)}")
+
+    names = list(dict.fromkeys(sections))
+    if 'overview' in names:
+        names.remove('overview')
+    return ['overview'] + names
+
+def parse_report_filters(date_range=None, species_filter=None):
+    """Validate request filters into a JSON-safe dict for the report task.
+
+    Raises ValueError for malformed dates or species IDs.
+    """
+    filters = {}
+
+    if date_range:
+        if not isinstance(date_range, dict):
+            raise ValueError('date_range must be an object with start and end dates')
+        for bound, key in (('start', 'start_date'), ('end', 'end_date')):
+            value = date_range.get(bound)
+            if not value:
+                continue
+            if not isinstance(value, str):
+                raise ValueError(f"date_range.{bound} must be an ISO 8601 date string")
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            # Observation dates are stored as naive UTC
+            if parsed.tzinfo is not None:
+                parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+            # A bare end date includes the whole day
+            if bound == 'end' and len(value) == 10:
+                parsed = parsed.replace(hour=23, minute=59, second=59, microsecond=999999)
+            filters[key] = parsed.isoformat()
+
+    if species_filter:
+        if isinstance(species_filter, str):
+            species_filter = [species_filter]
+        if not isinstance(species_filter, list):
+            raise ValueError('species_filter must be a species ID or a list of species IDs')
+        filters['species_ids'] = sorted(str(uuid.UUID(str(species_id))) for species_id in species_filter)
+
+    return filters
+
+def _query_filters(filters):
+    filters = dict(filters or {})
+    for key in ('start_date', 'end_date'):
+        if filters.get(key):
+            filters[key] = datetime.fromisoformat(filters[key])
+    return filters
+
+def _run_section(app, name, context):
+    with app.app_context():
+        started = time.perf_counter()
+        flowables = REPORT_SECTIONS[name](context)
+        return name, flowables, time.perf_counter() - started
+
+def render_sections(names, context, max_workers=None):
+    """Compute and render sections concurrently.
+
+    Returns ``(name, flowables, seconds)`` tuples in section order.
+    """
+    app = current_app._get_current_object()
+    max_workers = max_workers or current_app.config.get('REPORT_SECTION_WORKERS', 4)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(names)))) as pool:
+        futures = [pool.submit(_run_section, app, name, context) for name in names]
+        return [future.result() for future in futures]
+
+def build_section_report(project_id, file_path, names, filters=None):
+    """Build a PDF from report sections and return its timings in seconds."""
+    started = time.perf_counter()
+    context = ReportContext(uuid.UUID(str(project_id)), _query_filters(filters), datetime.now())
+
+    results = render_sections(names, context)
+
+    assembly_started = time.perf_counter()
+    story = []
+    for _, flowables, _ in results:
+        story.extend(flowables)
+    platypus.SimpleDocTemplate(file_path, pagesize=pagesizes.A4).build(story)
+
+    return {
+        'sections': {name: round(seconds, 3) for name, _, seconds in results},
+        'assembly': round(time.perf_counter() - assembly_started, 3),
+        'total': round(time.perf_counter() - started, 3)
+    }
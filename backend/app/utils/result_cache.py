@@ -0,0 +1,205 @@
+"""Content-addressed cache for export and report files.
+
+A result is named after a digest of what it is computed from: the kind
+of job, the project, the format, any filters and the project's data
+and reference data versions (see :mod:`app.utils.cache_utils`). An identical request is answered with the finished file, or
+with the task id of the identical job that is still running, instead of
+queueing the work again. Files are evicted least recently used first
+once the result folders grow past ``RESULT_CACHE_MAX_BYTES``.
+"""
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+from flask import current_app
+
+from .. import cache
+from .cache_utils import get_project_data_version, get_reference_data_version
+
+RESULT_FOLDERS = {
+    'export': 'exports',
+    'report': 'reports',
+    'chart': 'charts',
+}
+
+RESULT_PREFIXES = {
+    'export': 'observations',
+    'report': 'report',
+    'chart': 'chart',
+}
+
+# Temporary files and shard part folders older than this are leftovers
+# of failed jobs
+STALE_TEMP_AGE = 24 * 3600
+
+def _job_key(stem):
+    return f"result_job:{stem}"
+
+def project_result_version(project_id):
+    """Get a version string that changes whenever a project's data does.
+
+    Combines the project's data version, bumped by every observation and
+    project write, with the reference data version, bumped when species
+    or observer names change. No query is run.
+    """
+    project_id = str(uuid.UUID(str(project_id)))
+    return f"{get_project_data_version(project_id)}.{get_reference_data_version()}"
+
+def result_stem(kind, project_id, format_type, filters=None, version=None):
+    """Get the content-addressed file name (without extension) of a result."""
+    payload = json.dumps(
+        [kind, str(project_id), format_type, filters or {}, version],
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+    return f"{RESULT_PREFIXES[kind]}_{project_id}_{digest}"
+
+def result_folder(kind):
+    """Get the folder holding results of ``kind``, creating it."""
+    folder = os.path.join(current_app.config['UPLOAD_FOLDER'], RESULT_FOLDERS[kind])
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+def result_download_url(kind, filename):
+    return f"/api/uploads/{RESULT_FOLDERS[kind]}/{filename}"
+
+def result_file_path(kind, stem, extension):
+    """Get (filename, file_path) of a result file."""
+    filename = f"{stem}.{extension}"
+    return filename, os.path.join(result_folder(kind), filename)
+
+def touch_result(file_path):
+    """Mark a result file as used for LRU eviction. Returns False if it is gone."""
+    try:
+        os.utime(file_path)
+        return True
+    except OSError:
+        return False
+
+def find_result(kind, stem):
+    """Get (filename, file_path) of a finished result, or None."""
+    pattern = os.path.join(glob.escape(result_folder(kind)), f"{glob.escape(stem)}.*")
+    for file_path in glob.glob(pattern):
+        if touch_result(file_path):
+            return os.path.basename(file_path), file_path
+    return None
+
+def publish_result(temp_path, file_path, stem=None):
+    """Move a fully written result into place and end its in-flight job."""
+    os.replace(temp_path, file_path)
+    if stem:
+        cache.delete(_job_key(stem))
+
+def temp_result_path(file_path):
+    """Get a hidden sibling path to write a result to before publishing it."""
+    folder, filename = os.path.split(file_path)
+    return os.path.join(folder, f".{filename}.{uuid.uuid4().hex[:8]}.tmp")
+
+def release_job(stem, task_id):
+    """Forget the in-flight job of ``stem`` if ``task_id`` still owns it."""
+    key = _job_key(stem)
+    if cache.get(key) == task_id:
+        cache.delete(key)
+
+def _job_running(task, task_id):
+    result = task.AsyncResult(task_id)
+    # A sharded export's parent finishes early; its finalizer writes the file
+    if result.state == 'SUCCESS' and isinstance(result.info, dict) and result.info.get('finalizer_task_id'):
+        result = task.AsyncResult(result.info['finalizer_task_id'])
+    return result.state not in ('SUCCESS', 'FAILURE', 'REVOKED')
+
+def submit_result_job(task, kind, stem, *args):
+    """Get the finished result for ``stem`` or the job computing it.
+
+    Returns ``{'status': 'completed', 'filename', 'download_url'}`` when
+    the file exists. Otherwise returns ``{'status': 'pending', 'task_id',
+    'queued'}``, queueing ``task`` with ``args`` (and ``result_stem``)
+    only when no identical job is in flight.
+    """
+    found = find_result(kind, stem)
+    if found:
+        filename, _ = found
+        return {
+            'status': 'completed',
+            'filename': filename,
+            'download_url': result_download_url(kind, filename)
+        }
+
+    key = _job_key(stem)
+    timeout = current_app.config['RESULT_JOB_TIMEOUT']
+
+    running_id = cache.get(key)
+    if running_id:
+        if _job_running(task, running_id):
+            return {'status': 'pending', 'task_id': running_id, 'queued': False}
+        release_job(stem, running_id)
+
+    # Only the request that registers the job queues it
+    task_id = str(uuid.uuid4())
+    if not cache.add(key, task_id, timeout=timeout):
+        running_id = cache.get(key)
+        if running_id:
+            return {'status': 'pending', 'task_id': running_id, 'queued': False}
+        cache.set(key, task_id, timeout=timeout)
+
+    try:
+        task.apply_async(args=args, kwargs={'result_stem': stem}, task_id=task_id)
+    except Exception:
+        release_job(stem, task_id)
+        raise
+
+    return {'status': 'pending', 'task_id': task_id, 'queued': True}
+
+def evict_results(max_bytes, kinds=('export', 'report', 'chart')):
+    """Delete least recently used result files until they fit ``max_bytes``.
+
+    Stale temporary files and shard part folders are removed regardless.
+    Returns ``(files_removed, bytes_freed)``.
+    """
+    stale_before = time.time() - STALE_TEMP_AGE
+    removed = 0
+    freed = 0
+    files = []
+
+    for kind in kinds:
+        with os.scandir(result_folder(kind)) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+
+                if entry.is_dir():
+                    if entry.name == 'parts':
+                        for part_dir in os.scandir(entry.path):
+                            if part_dir.stat().st_mtime < stale_before:
+                                shutil.rmtree(part_dir.path, ignore_errors=True)
+                    continue
+
+                if entry.name.startswith('.'):
+                    # Results still being written are not evicted
+                    if entry.name.endswith('.tmp') and stat.st_mtime < stale_before:
+                        os.remove(entry.path)
+                        removed += 1
+                        freed += stat.st_size
+                    continue
+
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, file_path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(file_path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+        freed += size
+
+    return removed, freed
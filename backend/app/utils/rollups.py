@@ -0,0 +1,182 @@
+"""Write-through maintenance of per-(project, species, day) observation rollups.
+
+Session listeners collect the count changes caused by every flushed
+``Observation`` insert, update and delete and apply them to
+``observation_rollups`` in the same transaction. Writes that bypass the
+ORM (bulk inserts) must call :func:`apply_rollup_deltas` themselves.
+"""
+import uuid
+from collections import defaultdict
+from datetime import date, datetime
+
+from sqlalchemy import event, func, inspect, delete
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..models import db, Observation, ObservationRollup
+from .cache_utils import bump_project_data_version
+
+_PENDING_KEY = 'observation_rollup_deltas'
+
+def _as_uuid(value):
+    if value is None or isinstance(value, uuid.UUID):
+        return value
+    return uuid.UUID(str(value))
+
+def _as_day(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return None
+
+def rollup_key(project_id, species_id, observation_date):
+    """Build the (project, species, day) rollup key for an observation."""
+    key = (_as_uuid(project_id), _as_uuid(species_id), _as_day(observation_date))
+    return key if None not in key else None
+
+def _committed_value(state, attr):
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return state.attrs[attr].value
+
+def _current_entry(observation, default_count=0):
+    key = rollup_key(observation.project_id, observation.species_id, observation.observation_date)
+    count = observation.count if observation.count is not None else default_count
+    return key, count
+
+def _committed_entry(observation):
+    state = inspect(observation)
+    key = rollup_key(
+        _committed_value(state, 'project_id'),
+        _committed_value(state, 'species_id'),
+        _committed_value(state, 'observation_date')
+    )
+    return key, _committed_value(state, 'count') or 0
+
+def add_rollup_delta(deltas, key, observations, individuals):
+    """Accumulate a change for one rollup key into ``deltas``."""
+    if key is None:
+        return
+    entry = deltas[key]
+    entry[0] += observations
+    entry[1] += individuals
+
+def new_rollup_deltas():
+    """Create an empty delta accumulator."""
+    return defaultdict(lambda: [0, 0])
+
+def apply_rollup_deltas(connection, deltas):
+    """Upsert accumulated deltas and drop rollup rows that reach zero."""
+    rows = [
+        {
+            'project_id': project_id,
+            'species_id': species_id,
+            'day': day,
+            'observation_count': observations,
+            'individual_count': individuals
+        }
+        for (project_id, species_id, day), (observations, individuals) in deltas.items()
+        if observations or individuals
+    ]
+    if not rows:
+        return
+
+    table = ObservationRollup.__table__
+    insert = postgresql.insert if connection.dialect.name == 'postgresql' else sqlite.insert
+
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.project_id, table.c.species_id, table.c.day],
+        set_={
+            'observation_count': table.c.observation_count + statement.excluded.observation_count,
+            'individual_count': table.c.individual_count + statement.excluded.individual_count
+        }
+    )
+    connection.execute(statement, rows)
+
+    project_ids = {row['project_id'] for row in rows}
+    connection.execute(
+        delete(table).where(
+            table.c.project_id.in_(project_ids),
+            table.c.observation_count <= 0
+        )
+    )
+
+def _track_previous_value(target, value, oldvalue, initiator):
+    return value
+
+# Load the previous value before it is replaced, even on expired instances,
+# so the committed side of an update is always known at flush time.
+for _attr in (Observation.project_id, Observation.species_id,
+              Observation.observation_date, Observation.count):
+    event.listen(_attr, 'set', _track_previous_value, active_history=True, retval=True)
+
+@event.listens_for(db.session, 'before_flush')
+def _collect_observation_deltas(session, flush_context, instances):
+    deltas = session.info.setdefault(_PENDING_KEY, new_rollup_deltas())
+
+    for obj in session.new:
+        if isinstance(obj, Observation):
+            # Column default applies on insert when count is not set
+            key, count = _current_entry(obj, default_count=1)
+            add_rollup_delta(deltas, key, 1, count)
+
+    for obj in session.deleted:
+        if isinstance(obj, Observation):
+            key, count = _committed_entry(obj)
+            add_rollup_delta(deltas, key, -1, -count)
+
+    for obj in session.dirty:
+        if isinstance(obj, Observation) and session.is_modified(obj):
+            old_key, old_count = _committed_entry(obj)
+            new_key, new_count = _current_entry(obj)
+            if old_key != new_key or old_count != new_count:
+                add_rollup_delta(deltas, old_key, -1, -old_count)
+                add_rollup_delta(deltas, new_key, 1, new_count)
+
+@event.listens_for(db.session, 'after_flush')
+def _apply_observation_deltas(session, flush_context):
+    deltas = session.info.pop(_PENDING_KEY, None)
+    if deltas:
+        apply_rollup_deltas(session.connection(), deltas)
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_observation_deltas(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+def rebuild_project_rollups(project_id):
+    """Recompute all rollup rows for a project from raw observations.
+
+    Data cached from the old rollups is invalidated once the rebuild commits.
+    """
+    project_id = _as_uuid(project_id)
+    table = ObservationRollup.__table__
+    day = func.date(Observation.observation_date)
+
+    db.session.execute(delete(table).where(table.c.project_id == project_id))
+
+    source = db.session.query(
+        Observation.project_id,
+        Observation.species_id,
+        day,
+        func.count(Observation.id),
+        func.coalesce(func.sum(Observation.count), 0)
+    ).filter(
+        Observation.project_id == project_id
+    ).group_by(Observation.project_id, Observation.species_id, day)
+
+    result = db.session.execute(
+        table.insert().from_select(
+            ['project_id', 'species_id', 'day', 'observation_count', 'individual_count'],
+            source.statement
+        )
+    )
+    db.session.commit()
+    bump_project_data_version(project_id)
+
+    return result.rowcount
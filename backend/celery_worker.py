@@ -45,8 +45,12 @@ celery_app.conf.update(
     # Task routing
     task_routes={
         'app.tasks.export_observations_task': {'queue': 'exports'},
+        'app.tasks.export_observations_shard_task': {'queue': 'exports'},
+        'app.tasks.finalize_sharded_export_task': {'queue': 'exports'},
         'app.tasks.generate_project_report_task': {'queue': 'reports'},
+        'app.tasks.generate_custom_report_task': {'queue': 'reports'},
         'app.tasks.send_notification_email': {'queue': 'notifications'},
+        'app.tasks.geocode_observation_task': {'queue': 'geocoding'},
         'app.tasks.cleanup_old_files': {'queue': 'maintenance'},
     },
     
@@ -82,7 +86,7 @@ celery_app.conf.update(
     beat_schedule={
         'cleanup-old-files': {
             'task': 'app.tasks.cleanup_old_files',
-            'schedule': 86400.0,  # Run daily
+            'schedule': 3600.0,  # Run hourly to keep results within their size budget
         },
         'generate-daily-reports': {
             'task': 'app.tasks.generate_daily_reports',
@@ -204,7 +208,7 @@ if __name__ == '__main__':
     # Configure worker options
     worker_options = {
         'loglevel': 'INFO',
-        'queues': ['default', 'exports', 'reports', 'notifications', 'maintenance'],
+        'queues': ['default', 'exports', 'reports', 'notifications', 'geocoding', 'maintenance'],
         'concurrency': int(os.getenv('CELERY_CONCURRENCY', '4')),
         'max_tasks_per_child': 1000,
     }
@@ -17,6 +17,7 @@ CREATE TABLE users (
     last_name VARCHAR(50) NOT NULL,
     role user_role DEFAULT 'observer',
     is_active BOOLEAN DEFAULT TRUE,
+    token_version INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     last_login TIMESTAMP
 );
@@ -80,6 +81,16 @@ CREATE TABLE observations (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Observation rollups table (per project, species and day)
+CREATE TABLE observation_rollups (
+    project_id UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    species_id UUID NOT NULL REFERENCES species(id),
+    day DATE NOT NULL,
+    observation_count INTEGER NOT NULL DEFAULT 0,
+    individual_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (project_id, species_id, day)
+);
+
 -- Indicators table
 CREATE TABLE indicators (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -125,6 +136,7 @@ CREATE INDEX idx_observations_project_id ON observations(project_id);
 CREATE INDEX idx_observations_species_id ON observations(species_id);
 CREATE INDEX idx_observations_observer_id ON observations(observer_id);
 CREATE INDEX idx_observations_date ON observations(observation_date);
+CREATE INDEX idx_observations_project_date_id ON observations(project_id, observation_date DESC, id DESC);
 CREATE INDEX idx_observations_location ON observations(latitude, longitude);
 
 CREATE INDEX idx_indicators_project_id ON indicators(project_id);
@@ -15,6 +15,7 @@ CREATE TABLE IF NOT EXISTS users (
     last_name VARCHAR(50) NOT NULL,
     role VARCHAR(20) DEFAULT 'observer',
     is_active BOOLEAN DEFAULT TRUE,
+    token_version INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     last_login TIMESTAMP
 );
@@ -78,6 +79,16 @@ CREATE TABLE IF NOT EXISTS observations (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Create observation rollups table (per project, species and day)
+CREATE TABLE IF NOT EXISTS observation_rollups (
+    project_id UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    species_id UUID NOT NULL REFERENCES species(id),
+    day DATE NOT NULL,
+    observation_count INTEGER NOT NULL DEFAULT 0,
+    individual_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (project_id, species_id, day)
+);
+
 -- Create indicators table
 CREATE TABLE IF NOT EXISTS indicators (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -110,6 +121,7 @@ CREATE INDEX IF NOT EXISTS idx_observations_project_id ON observations(project_i
 CREATE INDEX IF NOT EXISTS idx_observations_species_id ON observations(species_id);
 CREATE INDEX IF NOT EXISTS idx_observations_observer_id ON observations(observer_id);
 CREATE INDEX IF NOT EXISTS idx_observations_date ON observations(observation_date);
+CREATE INDEX IF NOT EXISTS idx_observations_project_date_id ON observations(project_id, observation_date DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_observations_location ON observations(latitude, longitude);
 CREATE INDEX IF NOT EXISTS idx_projects_created_by ON projects(created_by_id);
 CREATE INDEX IF NOT EXISTS idx_resources_created_by ON resources(created_by_id);
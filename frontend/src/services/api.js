@@ -92,6 +92,12 @@ export const observationsAPI = {
   exportObservations: (params) => api.get('/observations/export', { params }),
 };
 
+// Map tiles API
+export const tilesAPI = {
+  // URL template for clustered observation vector tiles (MVT)
+  getObservationTileUrl: (projectId) => `${API_BASE_URL}/tiles/${projectId}/{z}/{x}/{y}.mvt`,
+};
+
 // Species API
 export const speciesAPI = {
   getSpecies: (params) => api.get('/species', { params }),
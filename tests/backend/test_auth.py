@@ -112,4 +112,37 @@ def test_unauthorized_access(client):
     """Test accessing protected route without authentication."""
     response = client.get('/api/auth/profile')
     
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+
+def test_access_token_claims(app, client, auth_headers, sample_project):
+    """Test that access tokens carry role, membership and token version claims."""
+    from flask_jwt_extended import decode_token
+    from app.utils.access import get_token_version, invalidate_user_access
+    
+    response = client.post('/api/auth/login', json={'username': 'testuser', 'password': 'testpass123'})
+    claims = decode_token(response.json['access_token'])
+    
+    assert claims['role'] == 'observer'
+    assert claims['active'] is True
+    assert claims['projects'] == [sample_project['id']]
+    
+    # Creating the project revoked the claims of earlier tokens
+    assert claims['tv'] == get_token_version(claims['sub']) == 1
+    
+    invalidate_user_access(claims['sub'])
+    db.session.commit()
+    assert get_token_version(claims['sub']) == 2
+
+def test_profile_edit_keeps_access_claims(client, auth_headers):
+    """Test that only role or active changes to a profile revoke access claims."""
+    from flask_jwt_extended import decode_token
+    from app.utils.access import get_token_version
+    
+    user_id = decode_token(auth_headers['Authorization'].split()[1])['sub']
+    version = get_token_version(user_id)
+    
+    client.put('/api/auth/profile', json={'first_name': 'Renamed', 'email': 'renamed@example.com'}, headers=auth_headers)
+    assert get_token_version(user_id) == version
+    
+    client.put('/api/auth/profile', json={'is_active': False}, headers=auth_headers)
+    assert get_token_version(user_id) == version + 1
@@ -0,0 +1,82 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.utils.diversity import (
+    richness, shannon, simpson, inverse_simpson, pielou_evenness, hill_numbers,
+    chao1, ace, fisher_alpha, diversity_profile, abundance_matrix
+)
+
+COMMUNITY = [10, 5, 3, 1, 1, 2, 20, 1]
+
+def test_classic_indices():
+    """Test Shannon, Simpson and evenness against their definitions."""
+    total = sum(COMMUNITY)
+    proportions = [count / total for count in COMMUNITY]
+    expected_shannon = -sum(p * math.log(p) for p in proportions)
+    expected_dominance = sum(p ** 2 for p in proportions)
+    
+    assert shannon(COMMUNITY) == pytest.approx(expected_shannon)
+    assert simpson(COMMUNITY) == pytest.approx(1 - expected_dominance)
+    assert inverse_simpson(COMMUNITY) == pytest.approx(1 / expected_dominance)
+    assert pielou_evenness(COMMUNITY) == pytest.approx(expected_shannon / math.log(8))
+    assert richness([0, 3, 0, 1]) == 2
+
+def test_hill_numbers_match_classic_indices():
+    """Test that Hill numbers of order 0, 1 and 2 reduce to richness, exp(H) and 1/D."""
+    orders = hill_numbers(COMMUNITY, [0, 1, 2])
+    
+    assert orders == pytest.approx([8, math.exp(shannon(COMMUNITY)), inverse_simpson(COMMUNITY)])
+    assert hill_numbers(COMMUNITY, 1) == pytest.approx(orders[1])
+    assert hill_numbers([5, 5, 5, 5], 3) == pytest.approx(4)
+
+def test_richness_estimators():
+    """Test Chao1, ACE and Fisher's alpha on a worked example."""
+    # S=8, N=43, 3 singletons, 1 doubleton
+    assert chao1(COMMUNITY) == pytest.approx(8 + 42 / 43 * 9 / 2)
+    assert ace(COMMUNITY) == pytest.approx(12.0766, abs=1e-4)
+    
+    alpha = fisher_alpha(COMMUNITY)
+    assert alpha * math.log(1 + 43 / alpha) == pytest.approx(8)
+    
+    # No singletons or rare species: nothing unseen
+    assert chao1([5, 5]) == 2
+    assert ace([50, 40]) == 2
+    assert fisher_alpha([1, 1, 1]) == math.inf
+
+def test_site_matrix_matches_single_sites():
+    """Test that a sites x species matrix gives each site's single-community result."""
+    matrix = np.array([COMMUNITY, [0] * 8, [1] * 8, [5, 5, 0, 0, 0, 0, 0, 0]])
+    
+    for estimator in (shannon, simpson, inverse_simpson, pielou_evenness, chao1, ace, fisher_alpha):
+        values = estimator(matrix)
+        assert values.shape == (4,)
+        assert list(values) == pytest.approx([estimator(row) for row in matrix])
+    
+    assert hill_numbers(matrix, [0, 2]).shape == (4, 2)
+
+def test_empty_community():
+    """Test that empty communities have zero diversity."""
+    profile = diversity_profile([])
+    
+    assert profile['species_richness'] == 0
+    assert profile['shannon_index'] == 0
+    assert profile['fisher_alpha'] == 0
+    assert profile['hill_numbers'] == {0: 0, 1: 0, 2: 0}
+    assert diversity_profile([0, 0])['simpson_index'] == 0
+
+def test_invalid_abundances():
+    """Test that negative or non-finite abundances are rejected."""
+    with pytest.raises(ValueError):
+        shannon([3, -1])
+    with pytest.raises(ValueError):
+        shannon([[[1]]])
+
+def test_abundance_matrix():
+    """Test pivoting grouped rows into a sites x species matrix."""
+    sites, species, matrix = abundance_matrix([('b', 'x', 2), ('a', 'y', 3), ('b', 'x', 1)])
+    
+    assert sites == ['a', 'b']
+    assert species == ['x', 'y']
+    assert matrix.tolist() == [[0, 3], [3, 0]]
@@ -143,4 +143,100 @@ def test_comparative_indicators(client, auth_headers, sample_project):
     )
     
     # Until implemented, expect 404
-    assert response.status_code in [200, 404]
\ No newline at end of file
+    assert response.status_code in [200, 404]
+
+def test_shannon_diversity_from_abundances():
+    """Test Shannon index computed from per-species abundance vectors."""
+    import math
+    from app.routes.indicators import calculate_shannon_diversity
+    
+    # Two equally abundant species -> ln(2)
+    assert abs(calculate_shannon_diversity([5, 5]) - math.log(2)) < 1e-9
+    
+    # A single individual has no diversity
+    assert calculate_shannon_diversity([1]) == 0
+    assert calculate_shannon_diversity([]) == 0
+
+def test_simpson_diversity_from_abundances():
+    """Test Simpson index computed from per-species abundance vectors."""
+    from app.routes.indicators import calculate_simpson_diversity
+    
+    assert abs(calculate_simpson_diversity([5, 5]) - 0.5) < 1e-9
+    assert calculate_simpson_diversity([10]) == 0
+
+def test_observation_rollups_follow_writes(app):
+    """Test that rollups stay in sync with observation inserts, updates and deletes."""
+    from datetime import datetime
+    from app.models import Observation, ObservationRollup, Project, Species, User
+    from app.utils.rollups import rebuild_project_rollups
+    
+    with app.app_context():
+        user = User(username='rollup', email='rollup@example.com', first_name='Roll', last_name='Up')
+        user.set_password('password')
+        db.session.add(user)
+        db.session.flush()
+        
+        project = Project(name='Rollup Project', created_by_id=user.id)
+        lion = Species(scientific_name='Panthera leo', common_name='African Lion')
+        cheetah = Species(scientific_name='Acinonyx jubatus', common_name='Cheetah')
+        db.session.add_all([project, lion, cheetah])
+        db.session.commit()
+        
+        observations = []
+        for i in range(6):
+            observation = Observation(
+                project_id=project.id,
+                species_id=(lion if i % 2 else cheetah).id,
+                observer_id=user.id,
+                observation_date=datetime(2024, 1, 1 + i % 3, 10, 30),
+                latitude=-1.2921,
+                longitude=36.8219,
+                count=i + 1
+            )
+            db.session.add(observation)
+            observations.append(observation)
+        db.session.commit()
+        
+        observations[0].count = 10
+        observations[1].species_id = cheetah.id
+        observations[2].observation_date = datetime(2024, 2, 1, 8, 0)
+        db.session.delete(observations[3])
+        db.session.commit()
+        
+        def snapshot():
+            return sorted(
+                (str(r.species_id), r.day, r.observation_count, r.individual_count)
+                for r in ObservationRollup.query.filter_by(project_id=project.id)
+            )
+        
+        incremental = snapshot()
+        rebuild_project_rollups(project.id)
+        
+        assert incremental == snapshot()
+        assert sum(row[2] for row in incremental) == 5
+
+def test_rollup_rebuild_invalidates_cached_data(app):
+    """Test that rebuilding a project's rollups bumps its data version."""
+    from app import cache
+    from app.models import Project, User
+    from app.utils.cache_utils import get_project_data_version
+    from app.utils.rollups import rebuild_project_rollups
+    
+    cache.init_app(app, config={'CACHE_TYPE': 'SimpleCache'})
+    
+    with app.app_context():
+        user = User(username='rebuild', email='rebuild@example.com', first_name='Re', last_name='Build')
+        user.set_password('password')
+        db.session.add(user)
+        db.session.flush()
+        
+        project = Project(name='Rebuild Project', created_by_id=user.id)
+        db.session.add(project)
+        db.session.commit()
+        
+        version = get_project_data_version(project.id)
+        assert get_project_data_version(project.id) == version
+        
+        rebuild_project_rollups(str(project.id).upper())
+        
+        assert get_project_data_version(project.id) != version
@@ -251,4 +251,227 @@ def test_observation_export(client, auth_headers, sample_project):
     
     assert response.status_code == 200
     assert 'task_id' in response.json
-    assert 'Export started' in response.json['message']
\ No newline at end of file
+    assert 'Export started' in response.json['message']
+
+def test_observation_list_query_count(app, client, auth_headers, sample_project):
+    """Test that listing observations uses a fixed number of queries per page."""
+    from sqlalchemy import event
+    
+    # Distinct species so lazy loads cannot be served from the identity map
+    with app.app_context():
+        species = [
+            Species(scientific_name=f'Testus species{i}', common_name=f'Test Species {i}')
+            for i in range(12)
+        ]
+        db.session.add_all(species)
+        db.session.commit()
+        species_ids = [str(s.id) for s in species]
+    
+    for i in range(12):
+        observation_data = {
+            'project_id': sample_project['id'],
+            'species_id': species_ids[i],
+            'observation_date': f'2024-01-{i + 1:02d}T10:30:00Z',
+            'latitude': -1.2921,
+            'longitude': 36.8219,
+            'count': 1
+        }
+        client.post('/api/observations', json=observation_data, headers=auth_headers)
+    
+    def count_queries(per_page):
+        statements = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            response = client.get(f'/api/observations?per_page={per_page}', headers=auth_headers)
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+        
+        assert response.status_code == 200
+        assert len(response.json['observations']) == min(per_page, 12)
+        assert all(obs['species'] and obs['observer'] for obs in response.json['observations'])
+        return len(statements)
+    
+    assert count_queries(2) == count_queries(12)
+
+def test_observation_cursor_pagination(app, client, auth_headers, sample_project):
+    """Test walking observations with keyset cursors."""
+    with app.app_context():
+        species = Species(scientific_name='Loxodonta africana', common_name='African Elephant')
+        db.session.add(species)
+        db.session.commit()
+        species_id = str(species.id)
+    
+    for i in range(5):
+        observation_data = {
+            'project_id': sample_project['id'],
+            'species_id': species_id,
+            'observation_date': f'2024-01-{i + 1:02d}T10:30:00Z',
+            'latitude': -1.2921,
+            'longitude': 36.8219,
+            'count': 1
+        }
+        client.post('/api/observations', json=observation_data, headers=auth_headers)
+    
+    seen = []
+    cursor = ''
+    while cursor is not None:
+        response = client.get(f'/api/observations?per_page=2&cursor={cursor}', headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert 'total' not in response.json
+        seen.extend(response.json['observations'])
+        cursor = response.json['next_cursor']
+    
+    dates = [obs['observation_date'] for obs in seen]
+    assert len(seen) == 5
+    assert len({obs['id'] for obs in seen}) == 5
+    assert dates == sorted(dates, reverse=True)
+
+def test_observation_invalid_cursor(client, auth_headers):
+    """Test that a malformed cursor is rejected."""
+    response = client.get('/api/observations?cursor=garbage', headers=auth_headers)
+    
+    assert response.status_code == 400
+
+def test_bulk_create_observations(app, client, auth_headers, sample_project):
+    """Test creating a batch of observations with per-row errors."""
+    with app.app_context():
+        species = Species(scientific_name='Loxodonta africana', common_name='African Elephant')
+        db.session.add(species)
+        db.session.commit()
+        species_id = str(species.id)
+    
+    valid = {
+        'project_id': sample_project['id'],
+        'species_id': species_id,
+        'observation_date': '2024-01-15T10:30:00Z',
+        'latitude': -1.2921,
+        'longitude': 36.8219,
+        'location_name': 'Nairobi',
+        'count': 2
+    }
+    rows = [
+        valid,
+        dict(valid, latitude=91.0),
+        dict(valid, species_id='00000000-0000-0000-0000-000000000000'),
+        dict(valid, count=5)
+    ]
+    
+    response = client.post('/api/observations/bulk', json=rows, headers=auth_headers)
+    
+    assert response.status_code == 201
+    assert response.json['created'] == 2
+    assert set(response.json['errors']) == {'1', '2'}
+    assert 'latitude' in response.json['errors']['1']
+    assert 'species_id' in response.json['errors']['2']
+    
+    response = client.get(f'/api/observations?project_id={sample_project["id"]}', headers=auth_headers)
+    assert response.json['total'] == 2
+    assert sorted(obs['count'] for obs in response.json['observations']) == [2, 5]
+
+def test_bulk_create_observations_ndjson(app, client, auth_headers, sample_project):
+    """Test creating observations from an NDJSON body."""
+    import json
+    
+    with app.app_context():
+        species = Species(scientific_name='Loxodonta africana', common_name='African Elephant')
+        db.session.add(species)
+        db.session.commit()
+        species_id = str(species.id)
+    
+    row = {
+        'project_id': sample_project['id'],
+        'species_id': species_id,
+        'observation_date': '2024-01-15T10:30:00Z',
+        'latitude': -1.2921,
+        'longitude': 36.8219,
+        'location_name': 'Nairobi'
+    }
+    body = '\n'.join([json.dumps(row), '{not json', json.dumps(row)])
+    
+    response = client.post(
+        '/api/observations/bulk',
+        data=body,
+        headers=dict(auth_headers, **{'Content-Type': 'application/x-ndjson'})
+    )
+    
+    assert response.status_code == 201
+    assert response.json['created'] == 2
+    assert list(response.json['errors']) == ['1']
+
+
+def test_copy_value_escaping():
+    """Test that COPY text fields escape separators and encode NULLs and JSON."""
+    from app.utils.bulk_import import _copy_value
+    
+    assert _copy_value(None) == '\\N'
+    assert _copy_value('a\tb\nc\\d') == 'a\\tb\\nc\\\\d'
+    assert _copy_value(['http://x/a.jpg']) == '["http://x/a.jpg"]'
+    assert _copy_value(datetime(2024, 1, 15, 10, 30)) == '2024-01-15T10:30:00'
+    assert _copy_value(datetime.fromisoformat('2024-01-15T13:30:00+03:00')) == '2024-01-15T10:30:00'
+
+def test_copy_observations_skipped_without_postgresql(app):
+    """Test that COPY is not attempted on databases other than PostgreSQL."""
+    from app.utils.bulk_import import copy_observations
+    
+    if db.engine.dialect.name == 'postgresql':
+        pytest.skip('COPY is supported on PostgreSQL')
+    
+    assert copy_observations(db.session.connection(), [{'count': 1}]) is False
+
+def test_copy_observations_on_postgresql(app):
+    """Test that COPY writes rows with escaped text, JSON lists and UTC dates."""
+    import uuid
+    from app.utils.bulk_import import copy_observations
+    
+    if db.engine.dialect.name != 'postgresql':
+        pytest.skip('COPY needs PostgreSQL')
+    
+    user = User(username='copier', email='copier@example.com', first_name='Co', last_name='Py')
+    user.set_password('password')
+    species = Species(scientific_name='Loxodonta africana', common_name='African Elephant')
+    db.session.add_all([user, species])
+    db.session.flush()
+    project = Project(name='Copy Project', created_by_id=user.id)
+    db.session.add(project)
+    db.session.flush()
+    
+    now = datetime.utcnow()
+    observation_id = uuid.uuid4()
+    assert copy_observations(db.session.connection(), [{
+        'id': observation_id,
+        'project_id': project.id,
+        'species_id': species.id,
+        'observer_id': user.id,
+        'observation_date': datetime.fromisoformat('2024-01-15T13:30:00+03:00'),
+        'latitude': -1.2921,
+        'longitude': 36.8219,
+        'location_name': None,
+        'count': 3,
+        'notes': 'tab\there\nnew line \\ backslash',
+        'image_urls': ['http://example.com/a.jpg'],
+        'created_at': now,
+        'updated_at': now
+    }])
+    db.session.commit()
+    
+    observation = db.session.get(Observation, observation_id)
+    assert observation.notes == 'tab\there\nnew line \\ backslash'
+    assert observation.location_name is None
+    assert observation.image_urls == ['http://example.com/a.jpg']
+    assert observation.observation_date.replace(tzinfo=None) == datetime(2024, 1, 15, 10, 30)
+
+def test_benchmark_bulk_ingest_command(app, runner):
+    """Test that the bulk ingestion benchmark runs and removes its data."""
+    result = runner.invoke(args=['benchmark-bulk-ingest', '--single-rows', '2', '--bulk-rows', '5'])
+    
+    assert result.exit_code == 0, result.output
+    assert 'Speedup' in result.output
+    assert Observation.query.count() == 0
+    assert User.query.filter_by(username='bulk-benchmark').first() is None
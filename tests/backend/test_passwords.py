@@ -0,0 +1,84 @@
+import os
+import time
+
+import pytest
+
+from app.config import Config
+from app.models import db, User
+from app.utils.passwords import hash_password, verify_password, needs_rehash
+
+# Expected single-core login rate with the production hash settings.
+# Too slow starves shift-start logins; too fast means the cost was weakened.
+LOGINS_PER_CORE_MIN = float(os.environ.get('LOGINS_PER_CORE_MIN', 3))
+LOGINS_PER_CORE_MAX = float(os.environ.get('LOGINS_PER_CORE_MAX', 50))
+BENCHMARK_LOGINS = 10
+
+@pytest.mark.parametrize('settings', [
+    {'PASSWORD_HASH_METHOD': 'pbkdf2', 'PBKDF2_ITERATIONS': 1000},
+    {'PASSWORD_HASH_METHOD': 'scrypt', 'SCRYPT_N': 2 ** 10},
+    {'PASSWORD_HASH_METHOD': 'argon2', 'ARGON2_TIME_COST': 1, 'ARGON2_MEMORY_COST': 1024},
+])
+def test_hash_and_verify(app, settings):
+    """Test hashing and verification with each hash method."""
+    if settings['PASSWORD_HASH_METHOD'] == 'argon2':
+        pytest.importorskip('argon2')
+    app.config.update(settings)
+
+    password_hash = hash_password('s3cret')
+
+    assert verify_password(password_hash, 's3cret')
+    assert not verify_password(password_hash, 'wrong')
+    assert not needs_rehash(password_hash)
+
+def test_needs_rehash_after_settings_change(app):
+    """Test that hashes made with other settings need rehashing."""
+    password_hash = hash_password('s3cret')
+
+    app.config['PBKDF2_ITERATIONS'] = 2000
+    assert needs_rehash(password_hash)
+    assert verify_password(password_hash, 's3cret')
+
+    app.config['PASSWORD_HASH_METHOD'] = 'scrypt'
+    assert needs_rehash(password_hash)
+
+def test_login_rehashes_password(app, client):
+    """Test that logging in upgrades a hash made with older settings."""
+    user = User(username='rehash', email='rehash@example.com', first_name='Re', last_name='Hash')
+    user.set_password('password123')
+    db.session.add(user)
+    db.session.commit()
+
+    app.config.update(PASSWORD_HASH_METHOD='scrypt', SCRYPT_N=2 ** 10)
+    response = client.post('/api/auth/login', json={'username': 'rehash', 'password': 'password123'})
+
+    assert response.status_code == 200
+    user = User.query.filter_by(username='rehash').first()
+    assert user.password_hash.startswith('scrypt:1024:8:1$')
+    assert user.check_password('password123')
+
+def test_login_throughput_per_core(app, client):
+    """Benchmark single-core logins per second with the production hash settings."""
+    app.config.update({
+        key: getattr(Config, key) for key in (
+            'PASSWORD_HASH_METHOD', 'PBKDF2_ITERATIONS', 'SCRYPT_N', 'SCRYPT_R', 'SCRYPT_P',
+            'ARGON2_TIME_COST', 'ARGON2_MEMORY_COST', 'ARGON2_PARALLELISM'
+        )
+    })
+    if app.config['PASSWORD_HASH_METHOD'] == 'argon2':
+        pytest.importorskip('argon2')
+
+    user = User(username='bench', email='bench@example.com', first_name='Bench', last_name='User')
+    user.set_password('password123')
+    db.session.add(user)
+    db.session.commit()
+
+    started = time.perf_counter()
+    for _ in range(BENCHMARK_LOGINS):
+        response = client.post('/api/auth/login', json={'username': 'bench', 'password': 'password123'})
+        assert response.status_code == 200
+    rate = BENCHMARK_LOGINS / (time.perf_counter() - started)
+
+    assert LOGINS_PER_CORE_MIN <= rate <= LOGINS_PER_CORE_MAX, (
+        f'{rate:.1f} logins/s per core with {app.config["PASSWORD_HASH_METHOD"]} '
+        f'(expected {LOGINS_PER_CORE_MIN:.0f}-{LOGINS_PER_CORE_MAX:.0f})'
+    )
@@ -0,0 +1,129 @@
+import pytest
+from app.models import db, Species
+
+def test_project_summary(app, client, auth_headers, sample_project):
+    """Test the grouped project summary breakdowns."""
+    with app.app_context():
+        lion = Species(scientific_name='Panthera leo', common_name='African Lion')
+        zebra = Species(scientific_name='Equus quagga', common_name='Plains Zebra')
+        db.session.add_all([lion, zebra])
+        db.session.commit()
+        lion_id, zebra_id = str(lion.id), str(zebra.id)
+    
+    base = {
+        'project_id': sample_project['id'],
+        'latitude': -1.2921,
+        'longitude': 36.8219
+    }
+    rows = [
+        dict(base, species_id=lion_id, count=2, location_name='Nairobi', observation_date='2024-01-15T10:30:00Z'),
+        dict(base, species_id=lion_id, count=3, location_name='Nairobi', observation_date='2024-02-01T08:00:00Z'),
+        dict(base, species_id=zebra_id, count=10, observation_date='2024-02-20T16:45:00Z')
+    ]
+    client.post('/api/observations/bulk', json=rows, headers=auth_headers)
+    
+    response = client.get(f'/api/reports/summary?project_id={sample_project["id"]}', headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert response.json['statistics'] == {
+        'total_observations': 3,
+        'unique_species': 2,
+        'total_individuals': 15,
+        'unique_observers': 1,
+        'date_range': {'start': '2024-01-15T10:30:00', 'end': '2024-02-20T16:45:00'}
+    }
+    assert response.json['species_breakdown']['counts'] == {'African Lion': 5, 'Plains Zebra': 10}
+    assert response.json['species_breakdown']['top_species'] == [['Plains Zebra', 10], ['African Lion', 5]]
+    assert response.json['observer_contributions'] == {'Test User': 3}
+    assert response.json['temporal_distribution'] == {'2024-01': 1, '2024-02': 2}
+    assert response.json['location_distribution'] == {'Nairobi': 2, '-1.29, 36.82': 1}
+    assert response.json['project']['members_count'] == 1
+
+def test_project_summary_requires_project_id(client, auth_headers):
+    """Test that the summary needs a project ID."""
+    response = client.get('/api/reports/summary', headers=auth_headers)
+    
+    assert response.status_code == 400
+
+def test_build_report_data(app, client, auth_headers, sample_project):
+    """Test the report data model counts distinct species per conservation status."""
+    from app.models import Project
+    from app.utils.report_data import build_report_data
+    
+    with app.app_context():
+        species = [
+            Species(scientific_name='Panthera leo', common_name='African Lion', conservation_status='VU'),
+            Species(scientific_name='Diceros bicornis', common_name='Black Rhino', conservation_status='CR'),
+            Species(scientific_name='Equus quagga', common_name='Plains Zebra')
+        ]
+        db.session.add_all(species)
+        db.session.commit()
+        species_ids = [str(s.id) for s in species]
+    
+    rows = [
+        {
+            'project_id': sample_project['id'],
+            'species_id': species_ids[i % 3],
+            'observation_date': f'2024-03-{i + 1:02d}T09:00:00Z',
+            'latitude': -1.2921,
+            'longitude': 36.8219,
+            'count': 2
+        }
+        for i in range(7)
+    ]
+    client.post('/api/observations/bulk', json=rows, headers=auth_headers)
+    
+    with app.app_context():
+        project = Project.query.filter_by(name='Test Project').first()
+        data = build_report_data(project)
+    
+    assert data['statistics']['total_observations'] == 7
+    assert data['statistics']['total_individuals'] == 14
+    assert data['statistics']['date_range'][0].day == 1
+    assert data['conservation_status'] == {'CR': 1, 'Unknown': 1, 'VU': 1}
+    assert [s['name'] for s in data['species']] == ['African Lion', 'Black Rhino', 'Plains Zebra']
+    assert [s['observations'] for s in data['species']] == [3, 2, 2]
+    assert data['project']['members_count'] == 1
+
+def test_resolve_report_sections():
+    """Test that templates and explicit lists resolve to ordered sections."""
+    from app.utils.report_sections import REPORT_TEMPLATES, resolve_sections
+    
+    assert resolve_sections('scientific') == REPORT_TEMPLATES['scientific']
+    assert resolve_sections('standard', ['map', 'summary', 'map']) == ['overview', 'map', 'summary']
+    
+    with pytest.raises(ValueError):
+        resolve_sections('unknown')
+    with pytest.raises(ValueError):
+        resolve_sections('standard', ['summary', 'appendix'])
+
+def test_custom_report_rejects_unknown_section(client, auth_headers, sample_project):
+    """Test that a custom report with an unknown section is rejected."""
+    response = client.post('/api/reports/custom', json={
+        'project_id': sample_project['id'],
+        'sections': ['summary', 'appendix']
+    }, headers=auth_headers)
+    
+    assert response.status_code == 400
+    assert 'appendix' in response.json['error']
+
+def test_custom_report_rejects_non_string_dates(client, auth_headers, sample_project):
+    """Test that a custom report with a numeric date bound is rejected."""
+    response = client.post('/api/reports/custom', json={
+        'project_id': sample_project['id'],
+        'date_range': {'start': 20240101}
+    }, headers=auth_headers)
+    
+    assert response.status_code == 400
+    assert 'date_range.start' in response.json['error']
+
+def test_report_filters_validate_species_and_convert_dates():
+    """Test that report filters reject non-list species IDs and convert dates to UTC."""
+    from app.utils.report_sections import parse_report_filters
+    
+    for species_filter in (5, True, {'id': 'x'}):
+        with pytest.raises(ValueError):
+            parse_report_filters(species_filter=species_filter)
+    
+    filters = parse_report_filters(date_range={'start': '2024-01-15T13:30:00+03:00', 'end': '2024-01-31'})
+    assert filters == {'start_date': '2024-01-15T10:30:00', 'end_date': '2024-01-31T23:59:59.999999'}
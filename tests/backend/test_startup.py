@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import app as app_package
+
+# Total import time budget for `create_app()`; override on slow machines
+STARTUP_IMPORT_BUDGET_MS = float(os.environ.get('STARTUP_IMPORT_BUDGET_MS', 1500))
+
+# Libraries only some code paths need; they must be imported lazily
+DEFERRED_MODULES = ['matplotlib', 'seaborn', 'pandas', 'reportlab', 'scipy', 'pyarrow', 'openpyxl', 'numpy']
+
+STARTUP_SCRIPT = """
+import json, sys
+from app import create_app
+create_app('testing')
+print(json.dumps(sorted(name for name in {modules} if name in sys.modules)))
+"""
+
+def run_startup(*python_args):
+    """Run create_app() in a fresh interpreter and return the finished process."""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(app_package.__file__)))
+    return subprocess.run(
+        [sys.executable, *python_args, '-c', STARTUP_SCRIPT.format(modules=DEFERRED_MODULES)],
+        cwd=backend_dir,
+        capture_output=True,
+        text=True,
+        timeout=120
+    )
+
+def parse_importtime(stderr):
+    """Sum the self times (in ms) of a `python -X importtime` report."""
+    total_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us = line.split(':', 1)[1].split('|')[0]
+        total_us += int(self_us)
+    return total_us / 1000
+
+def test_create_app_does_not_import_heavy_libraries():
+    """Test that plotting, PDF and dataframe libraries are not loaded at startup."""
+    result = run_startup()
+    
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == '[]'
+
+def test_create_app_import_time_budget():
+    """Test that create_app() stays within its import time budget."""
+    result = run_startup('-X', 'importtime')
+    
+    assert result.returncode == 0, result.stderr
+    
+    import_ms = parse_importtime(result.stderr)
+    assert 0 < import_ms <= STARTUP_IMPORT_BUDGET_MS, (
+        f'create_app() imports took {import_ms:.0f} ms '
+        f'(budget {STARTUP_IMPORT_BUDGET_MS:.0f} ms)'
+    )
@@ -268,4 +268,572 @@ class TestGeoUtils:
         assert isinstance(result, str)
         
         result = get_location_name(-90.0, -180.0)  # South Pole area
-        assert isinstance(result, str)
\ No newline at end of file
+        assert isinstance(result, str)
+
+@patch('app.utils.geo_utils.get_geolocator')
+def test_reverse_geocode_cached_quantizes(mock_get_geolocator, app):
+    """Test that cached reverse geocoding looks up rounded coordinates."""
+    from app.utils.geo_utils import reverse_geocode_cached
+    
+    mock_location = MagicMock()
+    mock_location.address = "Nairobi, Kenya"
+    mock_get_geolocator.return_value.reverse.return_value = mock_location
+    
+    with app.app_context():
+        app.config['GEOCODE_CACHE_PRECISION'] = 3
+        result = reverse_geocode_cached(-1.29214, 36.82191)
+    
+    assert result == "Nairobi, Kenya"
+    query = mock_get_geolocator.return_value.reverse.call_args[0][0]
+    assert query == "-1.292, 36.822"
+
+@patch('app.utils.geo_utils.get_geolocator')
+def test_reverse_geocode_cached_service_error(mock_get_geolocator, app):
+    """Test that geocoding service errors are reported as None."""
+    from geopy.exc import GeocoderServiceError
+    from app.utils.geo_utils import reverse_geocode_cached
+    
+    mock_get_geolocator.return_value.reverse.side_effect = GeocoderServiceError()
+    
+    with app.app_context():
+        assert reverse_geocode_cached(-1.2921, 36.8219) is None
+
+class TestVectorTiles:
+    """Test class for Mapbox Vector Tile helpers."""
+    
+    def test_world_tile_bounds(self):
+        """Test bounds of the single zoom-0 tile."""
+        from app.utils.mvt import tile_bounds
+        
+        west, south, east, north = tile_bounds(0, 0, 0)
+        
+        assert west == -180.0 and east == 180.0
+        assert abs(north - 85.0511) < 1e-3
+        assert abs(south + 85.0511) < 1e-3
+    
+    def test_lonlat_to_tile_coords(self):
+        """Test projecting points into tile coordinates."""
+        from app.utils.mvt import lonlat_to_tile_coords
+        
+        # Null island is the center of the world tile
+        assert lonlat_to_tile_coords(0, 0, 0, 0, 0) == (2048, 2048)
+        
+        # At zoom 1 it is the top-left corner of tile 1/1/1
+        assert lonlat_to_tile_coords(0, 0, 1, 1, 1) == (0, 0)
+    
+    def test_encode_point_layer(self):
+        """Test encoding a point layer into protobuf bytes."""
+        from app.utils.mvt import encode_point_layer
+        
+        tile = encode_point_layer('observations', [
+            {'geometry': (25, 17), 'properties': {'point_count': 3, 'species_id': 'abc'}},
+            {'geometry': (1, 1), 'properties': {'point_count': 3, 'species_id': None}}
+        ])
+        
+        # Tile.layers is field 3, length-delimited
+        assert tile[0] == 0x1A
+        assert b'observations' in tile
+        assert b'point_count' in tile
+        # Shared values are only stored once
+        assert tile.count(b'point_count') == 1
+        # MoveTo(1) followed by zigzag-encoded 25, 17
+        assert bytes([9, 50, 34]) in tile
+
+class TestPagination:
+    """Test class for keyset pagination helpers."""
+    
+    def test_cursor_round_trip(self):
+        """Test that cursors decode to the sort key they were built from."""
+        import uuid
+        from datetime import datetime
+        from app.utils.pagination import encode_cursor, decode_cursor
+        
+        row_id = uuid.uuid4()
+        observed = datetime(2024, 1, 15, 10, 30)
+        cursor = encode_cursor(observed, row_id)
+        
+        assert '=' not in cursor
+        assert decode_cursor(cursor) == (observed, row_id)
+    
+    def test_invalid_cursor(self):
+        """Test that malformed cursors are rejected."""
+        from app.utils.pagination import decode_cursor
+        
+        with pytest.raises(ValueError):
+            decode_cursor('not-a-cursor')
+
+class TestGazetteer:
+    """Test class for the offline gazetteer geocoder."""
+    
+    def test_unit_vectors_and_distance(self):
+        """Test that chord distances convert back to great-circle km."""
+        from app.utils.gazetteer import to_unit_vectors, chord_to_km
+        
+        xyz = to_unit_vectors([0.0, 0.0], [0.0, 1.0])
+        chord = ((xyz[0] - xyz[1]) ** 2).sum() ** 0.5
+        
+        assert abs(float(chord_to_km(chord)) - calculate_distance(0.0, 0.0, 0.0, 1.0)) < 1e-6
+    
+    def test_nearest_place(self, tmp_path):
+        """Test nearest-place lookups from a CSV gazetteer."""
+        pytest.importorskip('scipy')
+        from app.utils.gazetteer import OfflineGeocoder
+        
+        gazetteer = tmp_path / 'places.csv'
+        gazetteer.write_text(
+            'name,latitude,longitude,admin1,country_code\n'
+            'Nairobi,-1.2864,36.8172,Nairobi,KE\n'
+            'Mombasa,-4.0435,39.6682,Mombasa,KE\n'
+        )
+        
+        geocoder = OfflineGeocoder.from_file(str(gazetteer), max_distance_km=50)
+        
+        assert len(geocoder) == 2
+        assert geocoder.reverse(-1.2921, 36.8219) == 'Nairobi, Nairobi, KE'
+        assert geocoder.reverse_batch([-4.05, 10.0], [39.67, 10.0]) == ['Mombasa, Mombasa, KE', None]
+        # Parsed points are cached as memory-mappable arrays
+        assert (tmp_path / 'places.xyz.npy').exists()
+    
+    def test_gazetteer_cache_dir(self, tmp_path):
+        """Test that parsed arrays are cached in the cache folder, or kept in memory if it can't be written."""
+        import numpy as np
+        from app.utils.gazetteer import load_gazetteer
+        
+        gazetteer = tmp_path / 'places.csv'
+        gazetteer.write_text('name,latitude,longitude\nNairobi,-1.2864,36.8172\n')
+        cache_dir = tmp_path / 'cache'
+        
+        xyz, labels = load_gazetteer(str(gazetteer), str(cache_dir))
+        
+        assert isinstance(labels, np.memmap)
+        assert sorted(p.name for p in cache_dir.iterdir()) == ['places.labels.npy', 'places.xyz.npy']
+        assert not (tmp_path / 'places.xyz.npy').exists()
+        
+        # A file where the folder should be makes the cache unwritable
+        blocked = tmp_path / 'blocked'
+        blocked.write_text('')
+        xyz, labels = load_gazetteer(str(gazetteer), str(blocked))
+        assert list(labels) == ['Nairobi']
+        assert xyz.shape == (1, 3)
+
+class TestExportUtils:
+    """Test class for streaming export helpers."""
+    
+    def test_write_csv_export_in_chunks(self, tmp_path):
+        """Test that CSV rows are written chunk by chunk with progress."""
+        import csv
+        from datetime import datetime
+        from app.utils.export_utils import EXPORT_HEADERS, write_csv_export
+        
+        rows = (
+            [str(i), 'Panthera leo', 'African Lion', 'Test User', datetime(2024, 1, 15, 10, 30),
+             -1.2921, 36.8219, '', 1, '', '', '', '']
+            for i in range(5)
+        )
+        progress = []
+        file_path = tmp_path / 'export.csv'
+        
+        written = write_csv_export(str(file_path), rows, progress=progress.append, chunk_size=2)
+        
+        with open(file_path, newline='', encoding='utf-8') as f:
+            content = list(csv.reader(f))
+        
+        assert written == 5
+        assert progress == [2, 4, 5]
+        assert content[0] == EXPORT_HEADERS
+        assert content[1][4] == '2024-01-15T10:30:00'
+        assert len(content) == 6
+    
+    def test_write_arrow_export(self, tmp_path):
+        """Test writing typed, dictionary-encoded Parquet in batches."""
+        pq = pytest.importorskip('pyarrow.parquet')
+        import uuid
+        from collections import namedtuple
+        from datetime import datetime
+        from app.utils.export_utils import write_arrow_export
+        
+        Record = namedtuple('Record', [
+            'id', 'species_id', 'observer_id', 'observation_date', 'latitude', 'longitude',
+            'location_name', 'count', 'behavior', 'habitat_description', 'weather_conditions', 'notes'
+        ])
+        lion, observer = uuid.uuid4(), uuid.uuid4()
+        records = [
+            Record(uuid.uuid4(), lion, observer, datetime(2024, 1, 15, 10, 30), -1.2921, 36.8219,
+                   None, i + 1, None, None, None, None)
+            for i in range(5)
+        ]
+        file_path = tmp_path / 'export.parquet'
+        progress = []
+        
+        written = write_arrow_export(
+            str(file_path), iter(records), {lion: ('Panthera leo', 'African Lion')},
+            {observer: 'Test User'}, progress=progress.append, chunk_size=2
+        )
+        table = pq.read_table(str(file_path))
+        
+        assert written == 5
+        assert progress == [2, 4, 5]
+        assert pq.ParquetFile(str(file_path)).num_row_groups == 3
+        assert str(table.schema.field('species_common_name').type).startswith('dictionary')
+        assert table.column('count').to_pylist() == [1, 2, 3, 4, 5]
+        assert table.column('observation_date')[0].as_py() == datetime(2024, 1, 15, 10, 30)
+    
+    def test_write_xlsx_export_splits_sheets(self, tmp_path):
+        """Test that XLSX exports start a new sheet at the row limit."""
+        openpyxl = pytest.importorskip('openpyxl')
+        from datetime import datetime
+        from app.utils.export_utils import EXPORT_HEADERS, write_xlsx_export
+        
+        rows = (
+            [str(i), 'Panthera leo', 'African Lion', 'Test User', datetime(2024, 1, 15, 10, 30),
+             -1.2921, 36.8219, '', 1, '', '', '', '']
+            for i in range(5)
+        )
+        file_path = tmp_path / 'export.xlsx'
+        
+        written = write_xlsx_export(str(file_path), rows, chunk_size=2, max_rows_per_sheet=3)
+        workbook = openpyxl.load_workbook(str(file_path), read_only=True)
+        sheets = [list(sheet.values) for sheet in workbook.worksheets]
+        
+        assert written == 5
+        assert workbook.sheetnames == ['Observations', 'Observations (2)', 'Observations (3)']
+        assert all(list(sheet[0]) == EXPORT_HEADERS for sheet in sheets)
+        assert [len(sheet) - 1 for sheet in sheets] == [2, 2, 1]
+    
+    def test_concatenate_csv_parts(self, tmp_path):
+        """Test that headerless shard parts are joined under one header."""
+        import csv
+        from app.utils.export_utils import EXPORT_HEADERS, concatenate_csv_parts
+        
+        part_paths = []
+        for index in range(3):
+            part_path = tmp_path / f'part-{index:05d}.csv'
+            part_path.write_text(f'row-{index}-a\r\nrow-{index}-b\r\n', encoding='utf-8')
+            part_paths.append(str(part_path))
+        file_path = tmp_path / 'export.csv'
+        
+        concatenate_csv_parts(str(file_path), part_paths)
+        
+        with open(file_path, newline='', encoding='utf-8') as f:
+            content = list(csv.reader(f))
+        
+        assert content[0] == EXPORT_HEADERS
+        assert [row[0] for row in content[1:]] == [
+            'row-0-a', 'row-0-b', 'row-1-a', 'row-1-b', 'row-2-a', 'row-2-b'
+        ]
+
+class TestResultCache:
+    """Test class for the content-addressed export/report cache."""
+    
+    def test_result_stem_is_content_addressed(self):
+        """Test that stems depend on format, filters and data version only."""
+        from app.utils.result_cache import result_stem
+        
+        stem = result_stem('export', 'p1', 'csv', version='v1')
+        
+        assert stem == result_stem('export', 'p1', 'csv', version='v1')
+        assert stem.startswith('observations_p1_')
+        assert stem != result_stem('export', 'p1', 'csv', version='v2')
+        assert stem != result_stem('export', 'p1', 'parquet', version='v1')
+        assert result_stem('report', 'p1', 'pdf', {'a': 1, 'b': 2}) == \
+            result_stem('report', 'p1', 'pdf', {'b': 2, 'a': 1})
+    
+    def test_project_result_version_follows_data_versions(self, app):
+        """Test that result versions change with project and reference data writes."""
+        import uuid
+        from app import cache
+        from app.utils.cache_utils import bump_project_data_version, bump_reference_data_version
+        from app.utils.result_cache import project_result_version
+        
+        cache.init_app(app, config={'CACHE_TYPE': 'SimpleCache'})
+        project_id = uuid.uuid4()
+        
+        version = project_result_version(str(project_id).upper())
+        assert project_result_version(project_id) == version
+        
+        bump_project_data_version(project_id)
+        assert project_result_version(project_id) != version
+        
+        version = project_result_version(project_id)
+        bump_reference_data_version()
+        assert project_result_version(project_id) != version
+    
+    def test_submit_result_job_reuses_finished_file(self, app, tmp_path):
+        """Test that a finished result is returned without queueing a task."""
+        from app.utils.result_cache import result_file_path, submit_result_job
+        
+        app.config['UPLOAD_FOLDER'] = str(tmp_path)
+        task = MagicMock()
+        
+        job = submit_result_job(task, 'export', 'observations_p1_abc', 'p1', 'csv', 'u1')
+        assert job['status'] == 'pending'
+        assert job['queued'] is True
+        task.apply_async.assert_called_once_with(
+            args=('p1', 'csv', 'u1'), kwargs={'result_stem': 'observations_p1_abc'}, task_id=job['task_id']
+        )
+        
+        filename, file_path = result_file_path('export', 'observations_p1_abc', 'csv')
+        with open(file_path, 'w') as f:
+            f.write('ID\n')
+        task.reset_mock()
+        
+        job = submit_result_job(task, 'export', 'observations_p1_abc', 'p1', 'csv', 'u1')
+        assert job == {
+            'status': 'completed',
+            'filename': filename,
+            'download_url': f'/api/uploads/exports/{filename}'
+        }
+        task.apply_async.assert_not_called()
+    
+    def test_evict_results_least_recently_used(self, app, tmp_path):
+        """Test that eviction removes the least recently used files first."""
+        import os
+        from app.utils.result_cache import evict_results, touch_result
+        
+        app.config['UPLOAD_FOLDER'] = str(tmp_path)
+        exports = tmp_path / 'exports'
+        exports.mkdir()
+        for age, name in enumerate(['newest.csv', 'middle.csv', 'oldest.csv']):
+            file_path = exports / name
+            file_path.write_bytes(b'x' * 100)
+            os.utime(file_path, (1000000 - age * 10, 1000000 - age * 10))
+        # Reading a file makes it the most recently used
+        touch_result(str(exports / 'oldest.csv'))
+        (exports / '.partial.csv.1234.tmp').write_bytes(b'x' * 100)
+        
+        removed, freed = evict_results(200)
+        
+        assert (removed, freed) == (1, 100)
+        assert sorted(os.listdir(exports)) == ['.partial.csv.1234.tmp', 'newest.csv', 'oldest.csv']
+
+class TestCharts:
+    """Test class for cached chart rendering."""
+    
+    def test_render_chart_is_cached_by_series(self, app, tmp_path):
+        """Test that identical series reuse one rendered file."""
+        pytest.importorskip('matplotlib')
+        import os
+        from app.utils.charts import render_chart, render_charts
+        
+        app.config['UPLOAD_FOLDER'] = str(tmp_path)
+        
+        png_path = render_chart('bar', ['Lion', 'Zebra'], [5, 10], title='Species')
+        svg_path, line_path = render_charts([
+            {'kind': 'bar', 'labels': ['Lion', 'Zebra'], 'values': [5, 10], 'fmt': 'svg', 'title': 'Species'},
+            {'kind': 'line', 'labels': ['2024-01', '2024-02'], 'values': [3, 4]}
+        ])
+        
+        with open(png_path, 'rb') as f:
+            assert f.read(8) == b'\x89PNG\r\n\x1a\n'
+        with open(svg_path, encoding='utf-8') as f:
+            assert '<svg' in f.read()
+        assert render_chart('bar', ['Lion', 'Zebra'], [5, 10], title='Species') == png_path
+        assert render_chart('bar', ['Lion', 'Zebra'], [5, 11], title='Species') != png_path
+        assert len(os.listdir(tmp_path / 'charts')) == 4
+
+class TestUserAccess:
+    """Test class for the cached authorization context."""
+    
+    def test_access_context_and_invalidation(self, app):
+        """Test that memberships are loaded once and refreshed after invalidation."""
+        from app.models import db, User, Project
+        from app.utils.access import get_user_access, invalidate_user_access
+        
+        with app.test_request_context():
+            user = User(username='member', email='member@test.com', first_name='M', last_name='U', role='researcher')
+            user.set_password('password')
+            project = Project(name='Access Project', created_by=user)
+            db.session.add_all([user, project])
+            db.session.commit()
+            
+            access = get_user_access(str(user.id))
+            assert access.has_role('admin', 'researcher')
+            assert not access.is_admin
+            assert not access.can_access_project(project.id)
+            
+            project.members.append(user)
+            db.session.commit()
+            assert get_user_access(user.id) is access
+            
+            invalidate_user_access(user.id)
+            db.session.commit()
+            access = get_user_access(user.id)
+            assert access.is_member(project.id)
+            assert access.is_member(str(project.id).upper())
+            assert not access.is_member('not-a-uuid')
+    
+    def test_token_version_published_on_commit(self, app):
+        """Test that a bumped token version reaches the cache only once committed."""
+        from app import cache
+        from app.models import db, User
+        from app.utils.access import get_token_version, invalidate_user_access
+        
+        cache.init_app(app, config={'CACHE_TYPE': 'SimpleCache'})
+        with app.test_request_context():
+            user = User(username='versioned', email='versioned@test.com', first_name='V', last_name='U')
+            user.set_password('password')
+            db.session.add(user)
+            db.session.commit()
+            user_id = str(user.id)
+            assert get_token_version(user_id) == 0
+            
+            invalidate_user_access(user_id)
+            db.session.rollback()
+            assert get_token_version(user_id) == 0
+            
+            invalidate_user_access(user_id)
+            assert cache.get(f'token_version:{user_id}') == 0
+            db.session.commit()
+            assert get_token_version(user_id) == 1
+            
+            # A reader that loaded the old version before the commit cannot pin it
+            cache.add(f'token_version:{user_id}', 0)
+            assert get_token_version(user_id) == 1
+    
+    def test_unknown_user(self, app):
+        """Test that unknown or malformed user IDs have no access context."""
+        import uuid
+        from app.utils.access import get_user_access
+        
+        with app.test_request_context():
+            assert get_user_access(str(uuid.uuid4())) is None
+            assert get_user_access('not-a-uuid') is None
+            assert get_user_access(None) is None
+
+class TestRateLimit:
+    """Test class for the token bucket rate limiter."""
+    
+    def test_memory_bucket_refills(self, monkeypatch):
+        """Test that a bucket denies draws past its capacity until it refills."""
+        from app.utils import rate_limit
+        
+        now = [1000.0]
+        monkeypatch.setattr(rate_limit.time, 'time', lambda: now[0])
+        store = rate_limit.MemoryBucketStore()
+        
+        assert store.consume('key', 5, 1.0, 3)[:2] == (True, 2.0)
+        assert store.consume('key', 5, 1.0, 3)[:2] == (False, 2.0)
+        
+        now[0] += 1.5
+        assert store.consume('key', 5, 1.0, 3)[:2] == (True, 0.5)
+    
+    def test_weighted_requests_exhaust_budget(self, app, client, auth_headers, sample_project):
+        """Test that weighted endpoints draw more of the client budget and get 429s."""
+        app.config.update(RATE_LIMIT_ENABLED=True, RATE_LIMIT_USER_BUDGET=25, RATE_LIMIT_USER_WINDOW=60)
+        url = f'/api/indicators/spatial?project_id={sample_project["id"]}&grid_size=0.01'
+        
+        responses = [client.get(url, headers=auth_headers) for _ in range(3)]
+        
+        assert [r.status_code for r in responses[:2]] == [200, 200]
+        assert responses[1].headers['X-RateLimit-Limit'] == '25'
+        assert responses[1].headers['X-RateLimit-Remaining'] == '5'
+        assert responses[2].status_code == 429
+        assert int(responses[2].headers['Retry-After']) > 0
+        
+        # Unweighted requests still fit in what is left
+        response = client.get('/api/species', headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers['X-RateLimit-Remaining'] == '4'
+    
+    def test_forwarded_clients_get_separate_buckets(self, monkeypatch):
+        """Test that clients behind the trusted proxy are limited by their own address."""
+        from app import create_app
+        from app.config import config
+        
+        monkeypatch.setattr(config['testing'], 'PROXY_FIX_HOPS', 1)
+        app = create_app('testing')
+        app.config.update(RATE_LIMIT_ENABLED=True, RATE_LIMIT_USER_BUDGET=2, RATE_LIMIT_USER_WINDOW=60)
+        client = app.test_client()
+        
+        def get(address):
+            return client.get('/api/species', headers={'X-Forwarded-For': address})
+        
+        assert [get('203.0.113.1').status_code for _ in range(3)][-1] == 429
+        
+        response = get('203.0.113.2')
+        assert response.status_code != 429
+        assert response.headers['X-RateLimit-Remaining'] == '1'
+    
+    def test_forwarded_for_ignored_without_proxy(self, app, client):
+        """Test that a forged X-Forwarded-For doesn't get a fresh bucket by default."""
+        app.config.update(RATE_LIMIT_ENABLED=True, RATE_LIMIT_USER_BUDGET=2, RATE_LIMIT_USER_WINDOW=60)
+        
+        for i in range(2):
+            client.get('/api/species', headers={'X-Forwarded-For': f'203.0.113.{i}'})
+        
+        response = client.get('/api/species', headers={'X-Forwarded-For': '203.0.113.9'})
+        assert response.status_code == 429
+    
+    def test_login_limited_per_username(self, app, client):
+        """Test that failed logins for one username don't lock out others from the same address."""
+        app.config.update(RATE_LIMIT_ENABLED=True, RATE_LIMIT_USER_BUDGET=100)
+        
+        def login(username):
+            return client.post('/api/auth/login', json={'username': username, 'password': 'wrong'})
+        
+        assert [login('alice').status_code for _ in range(11)][-1] == 429
+        assert login('bob').status_code == 401
+    
+    def test_redis_store_uses_short_timeouts(self, app):
+        """Test that the Redis bucket store is built with the configured socket timeouts."""
+        pytest.importorskip('redis')
+        from app.utils import rate_limit
+        
+        app.config.update(
+            RATE_LIMIT_STORAGE_URL='redis://localhost:6379/0',
+            RATE_LIMIT_REDIS_CONNECT_TIMEOUT=0.1,
+            RATE_LIMIT_REDIS_TIMEOUT=0.3
+        )
+        app.extensions.pop('rate_limit_store', None)
+        
+        with app.app_context():
+            store = rate_limit.get_bucket_store()
+        
+        options = store._client.connection_pool.connection_kwargs
+        assert options['socket_connect_timeout'] == 0.1
+        assert options['socket_timeout'] == 0.3
+
+class TestProjectDataCache:
+    """Test class for the versioned indicator and summary cache."""
+    
+    def test_cache_hits_until_observation_write(self, app, client, auth_headers, admin_headers, sample_project, sample_species):
+        """Test that cached results are reused until the project's observations change."""
+        from app import cache
+        from app.models import Species
+        
+        cache.init_app(app, config={'CACHE_TYPE': 'SimpleCache'})
+        species_id = str(Species.query.filter_by(species_code='PLEO').first().id)
+        url = f'/api/indicators/diversity?project_id={sample_project["id"]}'
+        
+        assert client.get(url, headers=auth_headers).json['species_richness'] == 0
+        assert client.get(url, headers=auth_headers).json['species_richness'] == 0
+        
+        response = client.post('/api/observations', json={
+            'project_id': sample_project['id'],
+            'species_id': species_id,
+            'observation_date': '2024-01-15T10:30:00Z',
+            'latitude': -1.2921,
+            'longitude': 36.8219,
+            'count': 3
+        }, headers=auth_headers)
+        assert response.status_code == 201
+        assert client.get(url, headers=auth_headers).json['species_richness'] == 1
+        
+        # Equivalent query args share an entry
+        summary_url = f'/api/indicators/summary?project_id={sample_project["id"]}'
+        client.get(summary_url + '&start_date=2024-01-01', headers=auth_headers)
+        client.get(summary_url + '&start_date=2024-01-01T00:00:00', headers=auth_headers)
+        
+        stats = client.get('/api/indicators/cache-stats', headers=admin_headers).json['caches']
+        assert stats['indicators_diversity'] == {'hits': 1, 'misses': 2, 'hit_rate': 0.333}
+        assert stats['indicators_summary']['hits'] == 1
+        
+        assert client.delete('/api/indicators/cache-stats', headers=admin_headers).status_code == 200
+        stats = client.get('/api/indicators/cache-stats', headers=admin_headers).json['caches']
+        assert stats['indicators_diversity']['hits'] == 0
+    
+    def test_cache_stats_require_admin(self, client, auth_headers):
+        """Test that cache statistics are admin-only."""
+        response = client.get('/api/indicators/cache-stats', headers=auth_headers)
+        
+        assert response.status_code == 403